@@ -2,25 +2,45 @@ import os
 import time
 import json
 import requests
-import pandas as pd
-from flask import Flask, request, jsonify, send_file, render_template
+from flask import Flask, request, jsonify, send_file, render_template, Response, stream_with_context
 from flask_cors import CORS
-from flask_socketio import SocketIO, emit
+from flask_socketio import SocketIO, emit, join_room, leave_room
 from bs4 import BeautifulSoup
 from dotenv import load_dotenv
 import openai
 import logging
 import re
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 import tempfile
-import uuid
+import csv
+import io
+import hashlib
+import base64
+import binascii
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 import glob
 import sqlite3
 import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future, wait, as_completed, FIRST_COMPLETED
+from email.utils import parsedate_to_datetime
+import uuid
+import random
+import zlib
+import gzip
 
+from collections import Counter, OrderedDict, deque
 from contextlib import contextmanager
-from urllib.parse import urljoin
+from urllib.parse import urljoin, urlsplit, urlunsplit, parse_qsl, urlencode
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet export is optional
+    pa = pq = None
+
+from place_codec import encode_place, decode_place, measure as measure_place_codec
+from migrate_database import migrate, table_exists, split_location_path, index_place_for_search, listing_columns
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -41,69 +61,23 @@ openai.api_key = OPENAI_API_KEY
 # SQLite database setup
 DB_PATH = "autism_services.db"
 
+FTS_AVAILABLE = False
+
+def build_fts_query(text, prefix=True):
+    """Turn free text into a safe FTS5 query: every word quoted, optionally as a prefix match"""
+    terms = re.findall(r'\w+', text or '')
+    return ' '.join(f'"{term}"*' if prefix else f'"{term}"' for term in terms)
+
 def init_db():
+    """Bring the database schema up to date (see migrate_database.py)"""
+    global FTS_AVAILABLE
+    applied = migrate(DB_PATH)
+    if applied:
+        logger.info(f"Applied database migrations: {applied}")
     with sqlite3.connect(DB_PATH) as conn:
-        c = conn.cursor()
-        # Places table
-        c.execute('''
-            CREATE TABLE IF NOT EXISTS places (
-                place_id TEXT PRIMARY KEY,
-                location TEXT,
-                scraped_at TEXT,
-                data JSON,
-                wp_synced INTEGER DEFAULT 0,
-                wp_post_id INTEGER,
-                wp_sync_date TEXT
-            )
-        ''')
-        c.execute('CREATE INDEX IF NOT EXISTS idx_location ON places (location)')
-        
-        # Keywords table
-        c.execute('''
-            CREATE TABLE IF NOT EXISTS search_keywords (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                keyword TEXT NOT NULL,
-                category TEXT,
-                active INTEGER DEFAULT 1,
-                created_at TEXT,
-                last_used TEXT
-            )
-        ''')
-        
-        # Initialize default keywords if table is empty
-        c.execute("SELECT COUNT(*) FROM search_keywords")
-        if c.fetchone()[0] == 0:
-            default_keywords = [
-                ('autism therapy centers', 'Autism Core'),
-                ('autism treatment clinics', 'Autism Core'),
-                ('autism support services', 'Autism Core'),
-                ('ABA therapy centers', 'Autism Core'),
-                ('autism behavioral therapy', 'Autism Core'),
-                ('autism diagnostic centers', 'Autism Core'),
-                ('developmental disabilities services', 'Autism Core'),
-                ('special needs therapy', 'Autism Core'),
-                ('ADHD therapy centers', 'ADHD'),
-                ('ADHD coaching clinics', 'ADHD'),
-                ('behavioral therapy ADHD', 'ADHD'),
-                ('parent training autism ADHD', 'ADHD'),
-                ('speech therapy autism ADHD', 'Therapy'),
-                ('occupational therapy sensory integration', 'Therapy'),
-                ('sensory integration therapy', 'Therapy'),
-                ('sensory gyms autism ADHD', 'Therapy'),
-                ('dyslexia learning centers', 'Learning'),
-                ('learning disability centers', 'Learning'),
-                ('social skills groups autism ADHD', 'Community'),
-                ('special needs camps autism ADHD', 'Community'),
-                ('adaptive sports autism ADHD', 'Community'),
-                ('autism ADHD inclusive recreation centers', 'Community'),
-                ('autism ADHD support groups', 'Community')
-            ]
-            created_at = datetime.now().isoformat()
-            for keyword, category in default_keywords:
-                c.execute("INSERT INTO search_keywords (keyword, category, active, created_at) VALUES (?, ?, 1, ?)",
-                         (keyword, category, created_at))
-        
-        conn.commit()
+        FTS_AVAILABLE = table_exists(conn.cursor(), 'places_fts')
+    if not FTS_AVAILABLE:
+        logger.warning("FTS5 not available, /api/places/search disabled")
 
 init_db()
 
@@ -126,8 +100,6 @@ def cleanup_temp_files():
         except Exception as e:
             logger.warning(f"Failed to delete old temp file: {temp_file}: {e}")
 
-cleanup_temp_files()
-
 def is_domain_resolvable(url):
     try:
         domain = url.split("//")[-1].split("/")[0]
@@ -136,15 +108,528 @@ def is_domain_resolvable(url):
     except socket.gaierror:
         return False
 
+# ==================== Known Place IDs ====================
+class PlaceIdIndex:
+    """
+    Process-wide set of every place_id in the database, loaded once on first use.
+    Discovery checks it so places already scraped under an overlapping location
+    (e.g. "Los Angeles" vs "California") are not enriched again.
+    """
+    def __init__(self):
+        self._ids = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        with get_db() as conn:
+            c = conn.cursor()
+            c.execute("SELECT place_id FROM places")
+            self._ids = {row[0] for row in c.fetchall()}
+        logger.info(f"Loaded {len(self._ids)} known place IDs")
+
+    def __contains__(self, place_id):
+        with self._lock:
+            if self._ids is None:
+                self._load()
+            return place_id in self._ids
+
+    def __len__(self):
+        with self._lock:
+            if self._ids is None:
+                self._load()
+            return len(self._ids)
+
+    def add(self, place_id):
+        with self._lock:
+            if self._ids is not None:
+                self._ids.add(place_id)
+
+    def invalidate(self):
+        """Drop the in-memory set after bulk deletes; it is reloaded on next use"""
+        with self._lock:
+            self._ids = None
+
+place_id_index = PlaceIdIndex()
+
+# ==================== Progress Events ====================
+PROGRESS_INTERVAL = float(os.getenv("PROGRESS_INTERVAL", "0.25"))  # seconds between progress events
+PROGRESS_MAX_PLACES = 50  # place deltas per event; the results panel shows the latest 50
+PROGRESS_CLIENT_RATE = float(os.getenv("PROGRESS_CLIENT_RATE", "4"))  # progress events per second per client, across jobs; 0 = no cap
+PROGRESS_FIELDS = ('Title', 'Google Address', 'Location', 'Tagline', 'Phone', 'Website', 'Category', 'Status', 'Logo Image')
+
+def progress_delta(place):
+    """Compact card fields for a place - the full record comes from /api/listings/<place_id>"""
+    delta = {'id': place.get('Place ID')}
+    for key in PROGRESS_FIELDS:
+        if place.get(key):
+            delta[key] = place[key]
+    if place.get('Description'):
+        delta['enriched'] = True
+    return delta
+
+class ProgressCoalescer:
+    """
+    Collects scraper progress and emits it as at most one 'progress_batch' event
+    per interval. Counters are exact; only the most recent place deltas are kept
+    when more than max_places arrive within one window.
+    """
+    def __init__(self, socketio, room=None, interval=PROGRESS_INTERVAL, max_places=PROGRESS_MAX_PLACES, relay=None):
+        self.socketio = socketio
+        self.room = room
+        self.relay = relay
+        self.interval = interval
+        self.max_places = max_places
+        self._lock = threading.Lock()
+        self._last_flush = 0.0
+        self._scheduled = False
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._state = {'completed': 0, 'total': 0}
+            self._places = OrderedDict()
+            self._counts = {'new': 0, 'with_website': 0, 'enriched': 0}
+            self._dropped = 0
+            self._dirty = False
+
+    def update(self, completed=None, total=None, message=None, place=None):
+        with self._lock:
+            if completed is not None:
+                self._state['completed'] = completed
+            if total is not None:
+                self._state['total'] = total
+            if message is not None:
+                self._state['message'] = message
+            if place is not None:
+                delta = progress_delta(place)
+                self._counts['new'] += place.get('Status') == 'New'
+                self._counts['with_website'] += bool(place.get('Website'))
+                self._counts['enriched'] += bool(place.get('Description'))
+                self._places[delta['id']] = {**self._places.pop(delta['id'], {}), **delta}
+                if len(self._places) > self.max_places:
+                    self._places.popitem(last=False)
+                    self._dropped += 1
+            self._dirty = True
+            wait = self.interval - (time.monotonic() - self._last_flush)
+            if wait > 0:
+                if not self._scheduled:
+                    self._scheduled = True
+                    self.socketio.start_background_task(self._flush_later, wait)
+                return
+            batch = self._take()
+        self._emit(batch)
+
+    def flush(self):
+        """Emit anything pending right away, e.g. when a run finishes"""
+        with self._lock:
+            batch = self._take() if self._dirty else None
+        if batch:
+            self._emit(batch)
+
+    def _emit(self, batch):
+        if self.relay:
+            self.relay.send(batch, self.room)
+        else:
+            self.socketio.emit('progress_batch', batch, to=self.room, namespace='/')
+
+    def _flush_later(self, wait):
+        self.socketio.sleep(wait)
+        with self._lock:
+            self._scheduled = False
+        self.flush()
+
+    def _take(self):
+        batch = dict(self._state)
+        batch.update(places=list(self._places.values()), counts=self._counts, dropped=self._dropped)
+        self._places = OrderedDict()
+        self._counts = {'new': 0, 'with_website': 0, 'enriched': 0}
+        self._dropped = 0
+        self._dirty = False
+        self._last_flush = time.monotonic()
+        return batch
+
+def merge_progress_batches(older, newer, max_places=PROGRESS_MAX_PLACES):
+    """One batch equivalent to older followed by newer: counters add up, the latest state and deltas win"""
+    merged = dict(older)
+    merged.update((k, v) for k, v in newer.items() if k not in ('places', 'counts', 'dropped'))
+    places = OrderedDict((place['id'], place) for place in older['places'])
+    for place in newer['places']:
+        places[place['id']] = {**places.pop(place['id'], {}), **place}
+    dropped = older['dropped'] + newer['dropped']
+    while len(places) > max_places:
+        places.popitem(last=False)
+        dropped += 1
+    merged.update(places=list(places.values()), dropped=dropped,
+                  counts={k: older['counts'].get(k, 0) + newer['counts'].get(k, 0)
+                          for k in {**older['counts'], **newer['counts']}})
+    return merged
+
+class ProgressRelay:
+    """
+    Delivers job progress batches to each client in the job's room, at most
+    `rate` events per second per client however many jobs it watches. While a
+    client is over its budget its batches are merged per job and sent in turn.
+    """
+    def __init__(self, socketio, rate=PROGRESS_CLIENT_RATE):
+        self.socketio = socketio
+        self.interval = 1.0 / rate if rate > 0 else 0
+        self._pending = {}  # sid -> OrderedDict(room -> merged batch)
+        self._next_at = {}  # sid -> monotonic time its next event may go out
+        self._scheduled = set()
+        self._lock = threading.Lock()
+
+    def send(self, batch, room):
+        if room is None or not self.interval:
+            self.socketio.emit('progress_batch', batch, to=room, namespace='/')
+            return
+        for sid, _ in self.socketio.server.manager.get_participants('/', room):
+            self._queue(sid, room, batch)
+
+    def _queue(self, sid, room, batch):
+        with self._lock:
+            pending = self._pending.setdefault(sid, OrderedDict())
+            pending[room] = merge_progress_batches(pending[room], batch) if room in pending else batch
+            wait = self._next_at.get(sid, 0) - time.monotonic()
+            if wait > 0:
+                if sid not in self._scheduled:
+                    self._scheduled.add(sid)
+                    self.socketio.start_background_task(self._drain_later, sid, wait)
+                return
+            batch = self._take(sid)
+        self.socketio.emit('progress_batch', batch, to=sid, namespace='/')
+
+    def _drain_later(self, sid, wait):
+        while True:
+            self.socketio.sleep(wait)
+            with self._lock:
+                if not self._pending.get(sid):
+                    self._scheduled.discard(sid)
+                    return
+                batch = self._take(sid)
+            self.socketio.emit('progress_batch', batch, to=sid, namespace='/')
+            wait = self.interval
+
+    def _take(self, sid):
+        # Oldest job first; a job queued again goes to the back, so watched jobs take turns
+        pending = self._pending[sid]
+        _, batch = pending.popitem(last=False)
+        if not pending:
+            del self._pending[sid]
+        self._next_at[sid] = time.monotonic() + self.interval
+        return batch
+
+    def forget(self, sid):
+        """Drop a disconnected client's queue and budget"""
+        with self._lock:
+            self._pending.pop(sid, None)
+            self._next_at.pop(sid, None)
+
+# ==================== API Log Buffer ====================
+API_LOG_SIZE = int(os.getenv("API_LOG_SIZE", "1000"))
+API_LOG_SAMPLE_RATE = float(os.getenv("API_LOG_SAMPLE_RATE", "0.1"))  # errors are always kept
+API_LOG_BODY_LIMIT = int(os.getenv("API_LOG_BODY_LIMIT", "500"))
+API_LOG_ROOM = 'api_log_tail'
+
+class ApiLog:
+    """
+    Bounded, sampled log of WordPress API calls. Clients pull it from /api/logs
+    and may subscribe to a live tail; nothing is broadcast to every client.
+    Entries sharing a key (e.g. request and response for one place) are sampled together.
+    """
+    def __init__(self, socketio=None, size=API_LOG_SIZE, sample_rate=API_LOG_SAMPLE_RATE, body_limit=API_LOG_BODY_LIMIT):
+        self.socketio = socketio
+        self.sample_rate = sample_rate
+        self.body_limit = body_limit
+        self._entries = deque(maxlen=size)
+        self._seq = 0
+        self._lock = threading.Lock()
+
+    def _sampled(self, entry, key, always):
+        if always or entry.get('type') == 'error' or (isinstance(entry.get('status'), int) and entry['status'] >= 400):
+            return True
+        if self.sample_rate >= 1:
+            return True
+        if key is None:
+            key = f"{entry.get('method')} {entry.get('url')} {entry.get('message')}"
+        return zlib.crc32(str(key).encode('utf-8')) % 10000 < self.sample_rate * 10000
+
+    def record(self, entry, key=None, always=False):
+        """Sample, truncate and store an entry; always=True bypasses sampling for low-volume calls"""
+        if not self._sampled(entry, key, always):
+            return None
+        body = entry.get('body')
+        if body is not None:
+            text = body if isinstance(body, str) else json.dumps(body, default=str)
+            if len(text) > self.body_limit:
+                entry['body'] = text[:self.body_limit]
+                entry['truncated'] = True
+        with self._lock:
+            self._seq += 1
+            entry['seq'] = self._seq
+            entry['ts'] = datetime.now().isoformat()
+            entry['job_id'] = current_job_id()
+            self._entries.append(entry)
+        if self.socketio:
+            self.socketio.emit('api_log', entry, to=API_LOG_ROOM, namespace='/')
+        return entry
+
+    def since(self, after=0, limit=200):
+        """Entries with seq > after (oldest first), plus how many were lost to the ring"""
+        with self._lock:
+            entries = [e for e in self._entries if e['seq'] > after]
+            oldest = self._entries[0]['seq'] if self._entries else self._seq + 1
+            last_seq = self._seq
+        dropped = max(0, oldest - after - 1) if after else 0
+        return {'entries': entries[-limit:], 'last_seq': last_seq, 'dropped': dropped}
+
+# ==================== Jobs ====================
+_job_context = threading.local()
+
+def job_room(job_id):
+    return f"job:{job_id}"
+
+def current_job_id():
+    return getattr(_job_context, 'job_id', None)
+
+def current_job_room():
+    """Room for events raised inside a job; None (outside any job) broadcasts as before"""
+    job_id = current_job_id()
+    return job_room(job_id) if job_id else None
+
+@contextmanager
+def job_scope(job_id):
+    """Route socket events emitted by this thread to the job's room"""
+    previous = current_job_id()
+    _job_context.job_id = job_id
+    try:
+        yield
+    finally:
+        _job_context.job_id = previous
+
+class JobControl:
+    """Cancel and pause switches for one job; the job checks them between items"""
+    def __init__(self):
+        self.cancelled = threading.Event()
+        self._resumed = threading.Event()
+        self._resumed.set()
+
+    @property
+    def paused(self):
+        return not self._resumed.is_set()
+
+    def cancel(self):
+        self.cancelled.set()
+        self._resumed.set()  # a paused job has to wake up to stop
+
+    def pause(self):
+        self._resumed.clear()
+
+    def resume(self):
+        self._resumed.set()
+
+    def wait_while_paused(self, timeout=None):
+        return self._resumed.wait(timeout)
+
+class JobRegistry:
+    """
+    Running and recently finished scrape/sync jobs. The client that starts a job
+    is joined to its room; other clients can watch it with 'job_subscribe'.
+    Running jobs have a JobControl for cancel/pause.
+    """
+    def __init__(self, socketio, keep=50):
+        self.socketio = socketio
+        self.keep = keep
+        self._jobs = OrderedDict()
+        self._controls = {}
+        self._lock = threading.Lock()
+
+    def start(self, kind, label, owner_sid=None):
+        job_id = f"{kind}-{uuid.uuid4().hex[:12]}"
+        with self._lock:
+            self._jobs[job_id] = {
+                'job_id': job_id,
+                'kind': kind,
+                'label': label,
+                'status': 'running',
+                'started_at': datetime.now().isoformat(),
+                'finished_at': None
+            }
+            self._controls[job_id] = JobControl()
+            finished = [j for j, job in self._jobs.items() if job['finished_at']]
+            for old in finished[:max(0, len(self._jobs) - self.keep)]:
+                del self._jobs[old]
+        if owner_sid:
+            self.subscribe(owner_sid, job_id)
+        return job_id
+
+    def subscribe(self, sid, job_id):
+        try:
+            self.socketio.server.enter_room(sid, job_room(job_id), namespace='/')
+            return True
+        except (KeyError, ValueError):
+            logger.warning(f"Socket {sid} is not connected; cannot join job {job_id}")
+            return False
+
+    def control(self, job_id):
+        with self._lock:
+            return self._controls.get(job_id)
+
+    def set_status(self, job_id, status, finished=False):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if not job:
+                return
+            job['status'] = status
+            if finished:
+                job['finished_at'] = datetime.now().isoformat()
+                self._controls.pop(job_id, None)
+            job = dict(job)
+        self.socketio.emit('job_status', job, to=job_room(job_id), namespace='/')
+
+    def update(self, job_id, **fields):
+        """Attach progress or results to a job, shown by /api/jobs"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job:
+                job.update(fields)
+
+    def finish(self, job_id, status='done'):
+        self.set_status(job_id, status, finished=True)
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def list(self):
+        with self._lock:
+            return [dict(job) for job in reversed(self._jobs.values())]
+
+# ==================== Scrape Results ====================
+SCRAPE_RESULTS_MAX = int(os.getenv("SCRAPE_RESULTS_MAX", "5000"))  # results kept in memory; unsaved ones are never evicted
+
+class ScrapeResultStore:
+    """
+    The scraper's results in insertion order, indexed by Place ID. Upserting an
+    existing Place ID replaces it in place. Beyond max_items the results saved to
+    the database longest ago are evicted - SQLite still has them - while unsaved
+    results are always kept.
+    """
+    def __init__(self, max_items=SCRAPE_RESULTS_MAX):
+        self.max_items = max_items
+        self._places = OrderedDict()
+        self._saved = OrderedDict()  # place_id -> None, in the order they were saved
+        self._lock = threading.Lock()
+
+    def upsert(self, place, saved=False):
+        place_id = place['Place ID']
+        with self._lock:
+            self._places[place_id] = place
+            if saved:
+                self._saved.pop(place_id, None)
+                self._saved[place_id] = None
+                self._evict()
+            else:
+                self._saved.pop(place_id, None)
+
+    def mark_saved(self, place_id):
+        with self._lock:
+            if place_id in self._places:
+                self._saved.pop(place_id, None)
+                self._saved[place_id] = None
+                self._evict()
+
+    def _evict(self):
+        while len(self._places) > self.max_items and self._saved:
+            place_id, _ = self._saved.popitem(last=False)
+            self._places.pop(place_id, None)
+
+    def get(self, place_id):
+        with self._lock:
+            return self._places.get(place_id)
+
+    def __contains__(self, place_id):
+        with self._lock:
+            return place_id in self._places
+
+    def __len__(self):
+        with self._lock:
+            return len(self._places)
+
+    def values(self, status=None, unsaved=False):
+        """Snapshot of the results, optionally only those with this Status or not yet saved"""
+        with self._lock:
+            return [place for place_id, place in self._places.items()
+                    if (not status or place.get('Status') == status) and not (unsaved and place_id in self._saved)]
+
+    def clear(self):
+        with self._lock:
+            self._places.clear()
+            self._saved.clear()
+
+class ScrapeRunRegistry:
+    """
+    One scraper per scrape job, each with its own result store and progress room,
+    so concurrent scrapes never share state. Past `keep` runs, the oldest finished
+    runs with nothing left unsaved are dropped; running runs, and runs holding
+    unsaved results, stay so retries and exports still see them.
+    """
+    def __init__(self, factory, keep=10):
+        self.factory = factory
+        self.keep = keep
+        self._runs = OrderedDict()
+        self._finished = set()
+        self._lock = threading.Lock()
+
+    def create(self, job_id):
+        run = self.factory(job_id)
+        with self._lock:
+            self._runs[job_id] = run
+            self._evict()
+        return run
+
+    def finish(self, job_id):
+        with self._lock:
+            if job_id in self._runs:
+                self._finished.add(job_id)
+            self._evict()
+
+    def _evict(self):
+        excess = len(self._runs) - self.keep
+        for job_id in [j for j in self._runs if j in self._finished]:
+            if excess <= 0:
+                break
+            if not self._runs[job_id].results.values(unsaved=True):
+                del self._runs[job_id]
+                self._finished.discard(job_id)
+                excess -= 1
+
+    def get(self, job_id):
+        with self._lock:
+            return self._runs.get(job_id)
+
+    def unsaved(self, status=None):
+        """Results of every held run that are not in the database yet"""
+        with self._lock:
+            runs = list(self._runs.values())
+        return [place for run in runs for place in run.results.values(status=status, unsaved=True)]
+
 # ==================== Scraper Class ====================
 class GoogleMapsAutismDataScraperV2:
-    def __init__(self, api_key, socketio=None):
+    def __init__(self, api_key, socketio=None, room=None):
         self.api_key = api_key
         self.socketio = socketio
+        self.progress = ProgressCoalescer(socketio, room=room, relay=progress_relay) if socketio else None
         self.base_url = "https://places.googleapis.com/v1/places:searchText"
         self.place_details_url = "https://places.googleapis.com/v1/places"
-        self.new_results = []
-        self.all_results = []
+        self.results = ScrapeResultStore()
+
+    @property
+    def new_results(self):
+        return self.results.values(status='New')
+
+    @property
+    def all_results(self):
+        return self.results.values()
 
     def extract_social_links(self, soup):
         social_links = {
@@ -228,29 +713,39 @@ class GoogleMapsAutismDataScraperV2:
         logger.info(f"Extracted {len(photo_urls)} photo URLs from {len(photos)} photos")
         return photo_urls[:10]  # Limit to 10 photos
 
-    def get_existing_place_ids(self, location):
-        with get_db() as conn:
-            c = conn.cursor()
-            c.execute("SELECT place_id FROM places WHERE location LIKE ?", (f"%{location}%",))
-            return {row[0] for row in c.fetchall()}
-
     def get_existing_places(self, location):
         with get_db() as conn:
             c = conn.cursor()
             c.execute("SELECT data FROM places WHERE location LIKE ?", (f"%{location}%",))
-            return [json.loads(row[0]) for row in c.fetchall()]
+            return [decode_place(row[0]) for row in c.fetchall()]
 
     def save_place(self, place, location):
+        country, state, city = split_location_path(place.get('Location', ''))
+        cols = listing_columns(place)
         with get_db() as conn:
             c = conn.cursor()
-            c.execute(
-                "INSERT OR REPLACE INTO places (place_id, location, scraped_at, data) VALUES (?, ?, ?, ?)",
-                (place['Place ID'], location, datetime.now().isoformat(), json.dumps(place))
-            )
+            # Upsert rather than INSERT OR REPLACE: REPLACE deletes without firing
+            # the location_counts delete trigger. Re-saved places need a re-sync,
+            # but keep their wp_post_id mapping.
+            c.execute('''
+                INSERT INTO places (place_id, location, scraped_at, data, country, state, city,
+                                    title, category, status, has_website, has_phone)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (place_id) DO UPDATE SET
+                    location = excluded.location, scraped_at = excluded.scraped_at, data = excluded.data,
+                    country = excluded.country, state = excluded.state, city = excluded.city,
+                    title = excluded.title, category = excluded.category, status = excluded.status,
+                    has_website = excluded.has_website, has_phone = excluded.has_phone,
+                    wp_synced = 0
+            ''', (place['Place ID'], location, datetime.now().isoformat(), encode_place(place), country, state, city,
+                  cols['title'], cols['category'], cols['status'], cols['has_website'], cols['has_phone']))
+            if FTS_AVAILABLE:
+                c.execute("SELECT rowid FROM places WHERE place_id = ?", (place['Place ID'],))
+                index_place_for_search(c, c.fetchone()[0], place)
             conn.commit()
+        place_id_index.add(place['Place ID'])
 
     def search_autism_services(self, location="California", max_results=100):
-        existing_place_ids = self.get_existing_place_ids(location)
         search_queries = [
             # Autism core
             f"autism therapy centers in {location}",
@@ -291,13 +786,13 @@ class GoogleMapsAutismDataScraperV2:
             try:
                 logger.info(f"Searching query: {query}")
                 places = self._search_text(query, max_results_per_query=20)
-                new_places = [p for p in places if p.get('id') not in existing_place_ids]
+                new_places = [p for p in places if p.get('id') not in place_id_index]
                 all_places.extend(new_places)
                 time.sleep(1)
             except Exception as e:
                 logger.error(f"Error searching for {query}: {str(e)}")
                 if self.socketio:
-                    self.socketio.emit('error', {'message': f"Search failed for {query}: {str(e)}"}, namespace='/')
+                    self.socketio.emit('error', {'message': f"Search failed for {query}: {str(e)}"}, to=current_job_room(), namespace='/')
         unique_places = {p['id']: p for p in all_places if 'id' in p}
         return list(unique_places.values())[:max_results]
 
@@ -334,7 +829,7 @@ class GoogleMapsAutismDataScraperV2:
         except Exception as e:
             logger.error(f"Error fetching details for place_id {place_id}: {e}")
             if self.socketio:
-                self.socketio.emit('error', {'message': f"Failed to fetch details for place_id {place_id}: {str(e)}"}, namespace='/')
+                self.socketio.emit('error', {'message': f"Failed to fetch details for place_id {place_id}: {str(e)}"}, to=current_job_room(), namespace='/')
             return {}
 
     @retry(
@@ -361,7 +856,7 @@ class GoogleMapsAutismDataScraperV2:
                 if self.socketio:
                     self.socketio.emit('error', {
                         'message': f"DNS resolution failed for {website_url}. Skipping enrichment."
-                    }, namespace='/')
+                    }, to=current_job_room(), namespace='/')
                 return {**social_links, "Logo Image": logo_url, "Banner Image": banner_url}
 
 
@@ -475,12 +970,12 @@ class GoogleMapsAutismDataScraperV2:
             except json.JSONDecodeError as e:
                 logger.error(f"OpenAI returned invalid JSON for {website_url}: {content}, error: {e}")
                 if self.socketio:
-                    self.socketio.emit('error', {'message': f"Invalid JSON from OpenAI for {website_url}"}, namespace='/')
+                    self.socketio.emit('error', {'message': f"Invalid JSON from OpenAI for {website_url}"}, to=current_job_room(), namespace='/')
                 return {**social_links, "Logo Image": logo_url, "Banner Image": banner_url}
         except Exception as e:
             logger.error(f"OpenAI enrichment failed for {website_url}: {str(e)}")
             if self.socketio:
-                self.socketio.emit('error', {'message': f"Enrichment failed for {website_url}: {str(e)}"}, namespace='/')
+                self.socketio.emit('error', {'message': f"Enrichment failed for {website_url}: {str(e)}"}, to=current_job_room(), namespace='/')
             return {**social_links, "Logo Image": logo_url, "Banner Image": banner_url}
 
     def extract_price_info(self, price_level):
@@ -519,14 +1014,9 @@ class GoogleMapsAutismDataScraperV2:
     def process_places(self, places, location):
         total_places = len(places)
         logger.info(f"Processing {total_places} new places for {location}")
-        self.new_results = []
         if total_places == 0:
-            if self.socketio:
-                self.socketio.emit('progress', {
-                    'completed': 0,
-                    'total': 0,
-                    'message': f"No new places found for {location}"
-                }, namespace='/')
+            if self.progress:
+                self.progress.update(completed=0, total=0, message=f"No new places found for {location}")
         for idx, place in enumerate(places, 1):
             logger.info(f"Processing place {idx}/{total_places}: {place.get('displayName', {}).get('text', 'Unknown')}")
             details = self.get_place_details(place['id'])
@@ -577,25 +1067,21 @@ class GoogleMapsAutismDataScraperV2:
                 'Location': self.get_location_from_address_llm(merged.get('formattedAddress', '')),
                 'Status': 'New'
             }
-            self.new_results.append(result)
-            self.all_results.append(result)
+            self.results.upsert(result)
             self.save_place(result, location)
-            if self.socketio:
-                logger.info(f"Emitting progress event for place {idx}/{total_places}")
-                self.socketio.emit('progress', {
-                    'completed': idx,
-                    'total': total_places,
-                    'place': result
-                }, namespace='/')
-                self.socketio.sleep(0)
+            self.results.mark_saved(result['Place ID'])
+            if self.progress:
+                self.progress.update(completed=idx, total=total_places, message=f"Processed {name}", place=result)
             time.sleep(0.5)
+        if self.progress:
+            self.progress.flush()
         # Load existing places after processing new ones
         existing_places = self.get_existing_places(location)
         for place in existing_places:
-            if place['Place ID'] not in {p['Place ID'] for p in self.new_results}:
+            if place['Place ID'] not in self.results:
                 place['Status'] = 'Old'
-                self.all_results.append(place)
-        logger.info(f"Completed processing {total_places} new places, total {len(self.all_results)} places including historical")
+                self.results.upsert(place, saved=True)
+        logger.info(f"Completed processing {total_places} new places, total {len(existing_places)} places including historical")
 
     def retry_place(self, place_id, website, address):
         try:
@@ -648,50 +1134,38 @@ class GoogleMapsAutismDataScraperV2:
                 'Status': 'New'
             }
 
-            # Update in-memory results
-            for idx, result in enumerate(self.new_results):
-                if result['Place ID'] == place_id:
-                    self.new_results[idx] = updated_result
-                    break
-            for idx, result in enumerate(self.all_results):
-                if result['Place ID'] == place_id:
-                    self.all_results[idx] = updated_result
-                    break
-            # Update database
+            # Update in-memory results, then the database
+            if place_id in self.results:
+                self.results.upsert(updated_result)
             self.save_place(updated_result, updated_result['Location'].split(' > ')[-1])
+            self.results.mark_saved(place_id)
 
             if self.socketio:
                 logger.info(f"Emitting retry_progress event for place_id {place_id}")
                 self.socketio.emit('retry_progress', {
                     'place_id': place_id,
                     'place': updated_result
-                }, namespace='/')
+                }, to=current_job_room(), namespace='/')
             return updated_result
         except Exception as e:
             logger.error(f"Retry failed for place_id {place_id}: {str(e)}")
             if self.socketio:
-                self.socketio.emit('error', {'message': f"Retry failed for place_id {place_id}: {str(e)}"}, namespace='/')
+                self.socketio.emit('error', {'message': f"Retry failed for place_id {place_id}: {str(e)}"}, to=current_job_room(), namespace='/')
             return None
 
     def run_scraper(self, max_results=100, location="California"):
         logger.info(f"Scraping {location} with {max_results} results")
-        self.new_results = []
-        self.all_results = []
         # Load existing places first
         existing_places = self.get_existing_places(location)
         for place in existing_places:
             place['Status'] = 'Old'
-            self.all_results.append(place)
-        # Emit existing places to UI
-        if self.socketio:
-            for place in self.all_results:
-                self.socketio.emit('progress', {
-                    'completed': 0,
-                    'total': 0,
-                    'place': place,
-                    'message': f"Loaded existing place: {place['Title']}"
-                }, namespace='/')
-                self.socketio.sleep(0)
+            self.results.upsert(place, saved=True)
+        # Report existing places to UI as one coalesced batch
+        if self.progress:
+            for place in existing_places:
+                self.progress.update(place=place)
+            self.progress.update(message=f"Loaded {len(existing_places)} existing places for {location}")
+            self.progress.flush()
         # Scrape new places
         places = self.search_autism_services(location=location, max_results=max_results)
         self.process_places(places, location)
@@ -757,12 +1231,12 @@ class GoogleMapsAutismDataScraperV2:
             except json.JSONDecodeError as e:
                 logger.error(f"OpenAI returned invalid JSON for location: {content}, error: {e}")
                 if self.socketio:
-                    self.socketio.emit('error', {'message': f"Invalid JSON from OpenAI for address {address}"}, namespace='/')
+                    self.socketio.emit('error', {'message': f"Invalid JSON from OpenAI for address {address}"}, to=current_job_room(), namespace='/')
                 return address.split(',')[-1].strip() or ""
         except Exception as e:
             logger.error(f"Error fetching location from address using LLM: {e}")
             if self.socketio:
-                self.socketio.emit('error', {'message': f"Failed to extract location from address: {str(e)}"}, namespace='/')
+                self.socketio.emit('error', {'message': f"Failed to extract location from address: {str(e)}"}, to=current_job_room(), namespace='/')
             return address.split(',')[-1].strip() or ""
 
 # ==================== Flask App ====================
@@ -770,7 +1244,11 @@ app = Flask(__name__)
 CORS(app)
 socketio = SocketIO(app, cors_allowed_origins="*")
 
+progress_relay = ProgressRelay(socketio)
 scraper = GoogleMapsAutismDataScraperV2(API_KEY, socketio)
+api_log = ApiLog(socketio)
+jobs = JobRegistry(socketio)
+scrape_runs = ScrapeRunRegistry(lambda job_id: GoogleMapsAutismDataScraperV2(API_KEY, socketio, room=job_room(job_id)))
 
 @app.route('/')
 def home():
@@ -782,13 +1260,169 @@ def home():
 
 @app.route('/view_data')
 def view_data():
+    # Listings themselves are fetched page by page from /api/listings
     with get_db() as conn:
         c = conn.cursor()
-        c.execute("SELECT data FROM places")
-        places = [json.loads(row[0]) for row in c.fetchall()]
-        c.execute("SELECT COUNT(*) FROM places")
-        total_places = c.fetchone()[0]
-    return render_template("view_data.html", places=places, total_places=total_places)
+        c.execute("SELECT COUNT(*), SUM(has_website), SUM(has_phone) FROM places")
+        total_places, website_count, phone_count = c.fetchone()
+        c.execute("SELECT COUNT(*) FROM location_counts WHERE level = 3")
+        location_count = c.fetchone()[0]
+        c.execute("SELECT DISTINCT category FROM places WHERE category != '' ORDER BY category")
+        categories = [row[0] for row in c.fetchall()]
+    stats = {
+        'website_count': website_count or 0,
+        'phone_count': phone_count or 0,
+        'location_count': location_count
+    }
+    return render_template("view_data.html", total_places=total_places, stats=stats, categories=categories)
+
+# ==================== Listings API ====================
+# sort key -> ordered column expressions; place_id is always the final tie-breaker
+LISTING_SORTS = {
+    'title': ["title COLLATE NOCASE"],
+    'category': ["category"],
+    'status': ["status"],
+    'scraped_at': ["scraped_at"],
+    'location': ["COALESCE(country, '')", "COALESCE(state, '')", "COALESCE(city, '')"],
+}
+
+def encode_listing_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode('utf-8')).decode('ascii')
+
+def decode_listing_cursor(cursor, expected_len):
+    values = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    if not isinstance(values, list) or len(values) != expected_len:
+        raise ValueError("cursor does not match sort")
+    return values
+
+def listing_summary(place_id, place, wp_synced):
+    """Card fields only - the full record comes from /api/listings/<place_id>"""
+    gallery = [img.strip() for img in (place.get('Gallery') or '').split(',') if img.strip()]
+    return {
+        'place_id': place_id,
+        'Title': place.get('Title', ''),
+        'Location': place.get('Location', ''),
+        'Google Address': place.get('Google Address', ''),
+        'Category': place.get('Category', ''),
+        'Status': place.get('Status') or 'Old',
+        'Tagline': place.get('Tagline', ''),
+        'Phone': place.get('Phone', ''),
+        'Email': place.get('Email', ''),
+        'Website': place.get('Website', ''),
+        'Latitude': place.get('Latitude', ''),
+        'Longitude': place.get('Longitude', ''),
+        'Banner Image': place.get('Banner Image', ''),
+        'Logo Image': place.get('Logo Image', ''),
+        'gallery_first': gallery[0] if gallery else '',
+        'gallery_count': len(gallery),
+        'wp_synced': wp_synced
+    }
+
+@app.route('/api/listings', methods=['GET'])
+def api_listings():
+    """
+    Keyset-paginated listings. Filters: country, state, city, status, category,
+    synced (true/false), q (full-text). Sort: sort=title|category|status|scraped_at|location,
+    order=asc|desc. Pass next_cursor back as cursor for the following page.
+    """
+    try:
+        sort = request.args.get('sort', 'title')
+        order = request.args.get('order', 'asc').lower()
+        if sort not in LISTING_SORTS or order not in ('asc', 'desc'):
+            return jsonify({"error": f"sort must be one of {', '.join(LISTING_SORTS)} and order asc or desc"}), 400
+        try:
+            limit = int(request.args.get('limit', 60))
+        except ValueError:
+            return jsonify({"error": "limit must be an integer"}), 400
+        if limit < 1 or limit > 500:
+            return jsonify({"error": "limit must be between 1 and 500"}), 400
+
+        conditions = []
+        params = []
+        for column in ('country', 'state', 'city', 'status', 'category'):
+            value = request.args.get(column)
+            if value:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+        synced = request.args.get('synced')
+        if synced in ('true', 'false'):
+            conditions.append("COALESCE(wp_synced, 0) = 1" if synced == 'true' else "COALESCE(wp_synced, 0) != 1")
+        q = request.args.get('q', '').strip()
+        if q:
+            fts_query = build_fts_query(q)
+            if FTS_AVAILABLE and fts_query:
+                conditions.append("rowid IN (SELECT rowid FROM places_fts WHERE places_fts MATCH ?)")
+                params.append(fts_query)
+            else:
+                conditions.append("(title LIKE ? OR category LIKE ?)")
+                params.extend([f"%{q}%", f"%{q}%"])
+
+        sort_exprs = LISTING_SORTS[sort] + ["place_id"]
+        page_conditions = list(conditions)
+        page_params = list(params)
+        cursor = request.args.get('cursor')
+        if cursor:
+            try:
+                after = decode_listing_cursor(cursor, len(sort_exprs))
+            except (ValueError, TypeError, binascii.Error):
+                return jsonify({"error": "Invalid cursor"}), 400
+            op = '>' if order == 'asc' else '<'
+            page_conditions.append(f"({', '.join(sort_exprs)}) {op} ({', '.join('?' * len(after))})")
+            page_params.extend(after)
+
+        select_exprs = ', '.join(f"{expr} AS k{i}" for i, expr in enumerate(sort_exprs))
+        where = f" WHERE {' AND '.join(page_conditions)}" if page_conditions else ""
+        order_by = ', '.join(f"k{i} {order.upper()}" for i in range(len(sort_exprs)))
+        with get_db() as conn:
+            c = conn.cursor()
+            c.execute(f"SELECT place_id, data, wp_synced, {select_exprs} FROM places{where} ORDER BY {order_by} LIMIT ?",
+                      page_params + [limit + 1])
+            rows = c.fetchall()
+            total = None
+            if not cursor:
+                count_where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+                c.execute(f"SELECT COUNT(*) FROM places{count_where}", params)
+                total = c.fetchone()[0]
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        return jsonify({
+            'items': [listing_summary(row[0], decode_place(row[1]), row[2]) for row in rows],
+            'next_cursor': encode_listing_cursor(list(rows[-1][3:])) if has_more else None,
+            'has_more': has_more,
+            'total': total
+        })
+    except Exception as e:
+        logger.error(f"Error in /api/listings: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/listings/<place_id>', methods=['GET'])
+def api_listing_detail(place_id):
+    try:
+        with get_db() as conn:
+            c = conn.cursor()
+            c.execute("SELECT data, wp_synced, wp_post_id, wp_sync_date FROM places WHERE place_id = ?", (place_id,))
+            row = c.fetchone()
+        if not row:
+            return jsonify({"error": "Place not found"}), 404
+        place = decode_place(row[0])
+        place.update({'wp_synced': row[1], 'wp_post_id': row[2], 'wp_sync_date': row[3]})
+        return jsonify(place)
+    except Exception as e:
+        logger.error(f"Error in /api/listings/{place_id}: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+def run_scrape_job(job_id, max_results, location):
+    with job_scope(job_id):
+        try:
+            scrape_runs.create(job_id).run_scraper(max_results=max_results, location=location)
+            jobs.finish(job_id)
+        except Exception as e:
+            logger.error(f"Scrape job {job_id} failed: {str(e)}")
+            socketio.emit('error', {'message': f"Scraping failed for {location}: {str(e)}"}, to=job_room(job_id), namespace='/')
+            jobs.finish(job_id, 'failed')
+        finally:
+            scrape_runs.finish(job_id)
 
 @app.route('/api/search')
 def api_search():
@@ -802,11 +1436,13 @@ def api_search():
             c = conn.cursor()
             c.execute("SELECT COUNT(*) FROM places WHERE location LIKE ?", (f"%{location}%",))
             known_places = c.fetchone()[0]
+        job_id = jobs.start('scrape', location, owner_sid=request.args.get("socket_id"))
         socketio.emit('info', {
-            'message': f"{known_places} places already known for {location}. Fetching new places..."
-        }, namespace='/')
-        socketio.start_background_task(scraper.run_scraper, max_results=max_results, location=location)
-        return jsonify({"status": "Scraping started", "known_places": known_places})
+            'message': f"{known_places} places already known for {location}. Fetching new places...",
+            'job_id': job_id
+        }, to=job_room(job_id), namespace='/')
+        socketio.start_background_task(run_scrape_job, job_id, max_results=max_results, location=location)
+        return jsonify({"status": "Scraping started", "known_places": known_places, "job_id": job_id})
     except Exception as e:
         logger.error(f"Error in /api/search: {str(e)}")
         socketio.emit('error', {'message': f"Search failed: {str(e)}"}, namespace='/')
@@ -822,7 +1458,10 @@ def api_retry_place():
         if not place_id or not address:
             return jsonify({"error": "place_id and address are required"}), 400
         logger.info(f"Received retry request for place_id: {place_id}")
-        updated_result = scraper.retry_place(place_id, website, address)
+        # Retries update the results of the scrape that found the place, if it is still held
+        job_scraper = scrape_runs.get(data.get('job_id')) or scraper
+        with job_scope(data.get('job_id')):
+            updated_result = job_scraper.retry_place(place_id, website, address)
         if updated_result:
             return jsonify({"status": "Retry successful", "place": updated_result})
         else:
@@ -832,67 +1471,267 @@ def api_retry_place():
         socketio.emit('error', {'message': f"Retry failed: {str(e)}"}, namespace='/')
         return jsonify({"error": str(e)}), 500
 
+EXPORT_COLUMNS = [
+    'Status', 'Title', 'Description', 'Tagline', 'Google Address', 'Latitude', 'Longitude',
+    'Phone', 'Email', 'Website', 'Twitter', 'Facebook', 'Linkedin', 'Google_plus',
+    'Youtube', 'Instagram', 'Youtube Video URL',
+    'Logo Image', 'Banner Image',
+    'Price Status ($-moderate)', 'Price From', 'Price To',
+    'Claim Status', 'Faq Question (sep. by pipe sign | )', 'Faq Answer (sep. by pipe sign | )',
+    'Gallery', 'Pricing Plan ID', 'Business Hours (Day,OpenTime,CloseTime)',
+    'Category', 'Features', 'Tags (Keywords)', 'Location'
+]
+
+def iter_export_places(location=None, status=None, batch_size=500):
+    """
+    Yield places matching the export filters batch by batch, followed by any
+    in-memory scraper results not yet in the database. Each batch is its own
+    keyset query (place_id > last), so no read lock is held while a slow client
+    consumes the stream - writers would otherwise time out.
+    """
+    pending = {}
+    for place in scrape_runs.unsaved(status=status):
+        if not location or location.lower() in place.get('Location', '').lower():
+            pending[place['Place ID']] = place
+
+    query = "SELECT place_id, data FROM places WHERE place_id > ?"
+    params = []
+    if location:
+        query += " AND location LIKE ?"
+        params.append(f"%{location}%")
+    query += " ORDER BY place_id LIMIT ?"
+    last_place_id = ''
+    while True:
+        with get_db() as conn:
+            rows = conn.execute(query, [last_place_id] + params + [batch_size]).fetchall()
+        if not rows:
+            break
+        last_place_id = rows[-1][0]
+        for place_id, data in rows:
+            pending.pop(place_id, None)
+            place = decode_place(data)
+            # Status lives inside the encoded blob, so it is filtered after decoding
+            if status in ['New', 'Old'] and place.get('Status') != status:
+                continue
+            place['Status'] = place.get('Status', 'Old')
+            yield place
+    yield from pending.values()
+
+def iter_csv(places, columns=EXPORT_COLUMNS, chunk_size=64 * 1024):
+    """Encode places as CSV in the given column order, yielding ~chunk_size pieces"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for place in places:
+        writer.writerow([place.get(col, '') for col in columns])
+        if buffer.tell() >= chunk_size:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
 @app.route('/api/download')
 def api_download():
     try:
         location = request.args.get("location", None)
         status = request.args.get("status", None)
-        expected_columns = [
-            'Status', 'Title', 'Description', 'Tagline', 'Google Address', 'Latitude', 'Longitude',
-            'Phone', 'Email', 'Website', 'Twitter', 'Facebook', 'Linkedin', 'Google_plus',
-            'Youtube', 'Instagram', 'Youtube Video URL',
-            'Logo Image', 'Banner Image',
-            'Price Status ($-moderate)', 'Price From', 'Price To',
-            'Claim Status', 'Faq Question (sep. by pipe sign | )', 'Faq Answer (sep. by pipe sign | )',
-            'Gallery', 'Pricing Plan ID', 'Business Hours (Day,OpenTime,CloseTime)',
-            'Category', 'Features', 'Tags (Keywords)', 'Location'
-        ]
+        logger.info(f"Streaming CSV export: location={location or 'all'}, status={status or 'all'}")
+        return Response(
+            stream_with_context(iter_csv(iter_export_places(location, status))),
+            mimetype='text/csv',
+            headers={'Content-Disposition': 'attachment; filename="autism_services_export.csv"'}
+        )
+    except Exception as e:
+        logger.error(f"Error in /api/download: {str(e)}")
+        socketio.emit('error', {'message': f"Download failed: {str(e)}"}, namespace='/')
+        return jsonify({"error": str(e)}), 500
+
+# ==================== Export API ====================
+EXPORT_CACHE_DIR = "export_cache"
+EXPORT_FORMATS = {
+    'csv': ('csv', 'text/csv'),
+    'jsonl': ('jsonl', 'application/x-ndjson'),
+    'parquet': ('parquet', 'application/vnd.apache.parquet'),
+    'listingpro': ('csv', 'text/csv'),
+}
+# ListingPro's CSV importer takes the scraper columns minus our internal Status
+LISTINGPRO_COLUMNS = [col for col in EXPORT_COLUMNS if col != 'Status']
+
+def export_data_version(location=None):
+    """Stamp that changes whenever the rows behind an export change"""
+    query = "SELECT COUNT(*), MAX(row_version) FROM places"
+    params = []
+    if location:
+        query += " WHERE location LIKE ?"
+        params.append(f"%{location}%")
+    with get_db() as conn:
+        c = conn.cursor()
+        c.execute(query, params)
+        count, last_version = c.fetchone()
+    return f"{count}:{last_version or 0}"
+
+def _export_text(value):
+    if isinstance(value, list):
+        return ', '.join(str(v) for v in value)
+    return '' if value is None else str(value)
+
+def write_export_artifact(path, fmt, places):
+    """Write places to path in the given format without holding the full table in memory"""
+    if fmt == 'jsonl':
+        with open(path, 'w', encoding='utf-8') as f:
+            for place in places:
+                f.write(json.dumps(place, ensure_ascii=False) + '\n')
+    elif fmt == 'parquet':
+        columns = ['Place ID'] + EXPORT_COLUMNS
+        schema = pa.schema([(col, pa.float64() if col in ('Latitude', 'Longitude') else pa.string()) for col in columns])
+
+        def to_float(value):
+            try:
+                return float(value)
+            except (TypeError, ValueError):
+                return None
+
+        with pq.ParquetWriter(path, schema, compression='zstd') as writer:
+            batch = []
+            for place in places:
+                batch.append(place)
+                if len(batch) >= 5000:
+                    writer.write_batch(_parquet_batch(batch, columns, schema, to_float))
+                    batch = []
+            if batch:
+                writer.write_batch(_parquet_batch(batch, columns, schema, to_float))
+    else:
+        columns = LISTINGPRO_COLUMNS if fmt == 'listingpro' else EXPORT_COLUMNS
+        if fmt == 'listingpro':
+            places = ({col: _export_text(place.get(col, '')) for col in columns} for place in places)
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            for chunk in iter_csv(places, columns):
+                f.write(chunk)
+
+def _parquet_batch(places, columns, schema, to_float):
+    arrays = []
+    for col in columns:
+        if col in ('Latitude', 'Longitude'):
+            arrays.append(pa.array([to_float(p.get(col)) for p in places], type=pa.float64()))
+        else:
+            arrays.append(pa.array([_export_text(p.get(col, '')) for p in places], type=pa.string()))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+def get_export_artifact(fmt, location=None, status=None):
+    """Return the cached artifact for these filters, regenerating it if the data changed"""
+    ext = EXPORT_FORMATS[fmt][0]
+    filter_key = hashlib.sha1(json.dumps([fmt, location or '', status or '']).encode('utf-8')).hexdigest()[:16]
+    version_key = hashlib.sha1(export_data_version(location).encode('utf-8')).hexdigest()[:16]
+    cache_dir = os.path.abspath(EXPORT_CACHE_DIR)
+    os.makedirs(cache_dir, exist_ok=True)
+    path = os.path.join(cache_dir, f"{fmt}_{filter_key}_{version_key}.{ext}")
+    if os.path.exists(path):
+        return path, True
+
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    write_export_artifact(tmp_path, fmt, iter_export_places(location, status))
+    os.replace(tmp_path, path)
+    # Drop artifacts for the same filters built from older data
+    for stale in glob.glob(os.path.join(cache_dir, f"{fmt}_{filter_key}_*.{ext}")):
+        if stale != path:
+            try:
+                os.remove(stale)
+            except OSError as e:
+                logger.warning(f"Failed to delete stale export {stale}: {e}")
+    return path, False
+
+@app.route('/api/export')
+def api_export():
+    """Cached exports: format=csv|jsonl|parquet|listingpro, optional location and status filters"""
+    try:
+        fmt = request.args.get('format', 'csv').lower()
+        location = request.args.get('location', None)
+        status = request.args.get('status', None)
+        if fmt not in EXPORT_FORMATS:
+            return jsonify({"error": f"format must be one of: {', '.join(EXPORT_FORMATS)}"}), 400
+        if fmt == 'parquet' and pq is None:
+            return jsonify({"error": "Parquet export requires pyarrow (pip install pyarrow)"}), 501
+
+        path, cached = get_export_artifact(fmt, location, status)
+        logger.info(f"Export {fmt} for location={location or 'all'}, status={status or 'all'}: {'cache hit' if cached else 'generated'}")
+        ext, mimetype = EXPORT_FORMATS[fmt]
+        suffix = '_listingpro' if fmt == 'listingpro' else ''
+        response = send_file(path, mimetype=mimetype, as_attachment=True,
+                             download_name=f"autism_services_export{suffix}.{ext}")
+        response.headers['X-Export-Cache'] = 'hit' if cached else 'miss'
+        return response
+    except Exception as e:
+        logger.error(f"Error in /api/export: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+def encode_change_cursor(row_version):
+    return base64.urlsafe_b64encode(f"v1:{row_version}".encode('utf-8')).decode('ascii')
+
+def decode_change_cursor(cursor):
+    """Opaque cursor -> row_version watermark; raises ValueError on anything malformed"""
+    if not cursor:
+        return 0
+    prefix, _, value = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8').partition(':')
+    if prefix != 'v1':
+        raise ValueError("unknown cursor version")
+    return int(value)
+
+@app.route('/api/places/changes', methods=['GET'])
+def api_place_changes():
+    """
+    Delta export: places inserted, updated, re-synced or deleted after the cursor
+    watermark, oldest change first. Pass next_cursor back to continue; omit the
+    cursor for a full initial load.
+    """
+    try:
+        try:
+            limit = int(request.args.get('limit', 500))
+        except ValueError:
+            return jsonify({"error": "limit must be an integer"}), 400
+        if limit < 1 or limit > 5000:
+            return jsonify({"error": "limit must be between 1 and 5000"}), 400
+        try:
+            watermark = decode_change_cursor(request.args.get('cursor'))
+        except (ValueError, UnicodeDecodeError, binascii.Error):
+            return jsonify({"error": "Invalid cursor"}), 400
+
         with get_db() as conn:
             c = conn.cursor()
-            query = "SELECT data FROM places"
-            params = []
-            conditions = []
-            if location:
-                conditions.append("location LIKE ?")
-                params.append(f"%{location}%")
-            if status and status in ['New', 'Old']:
-                conditions.append("json_extract(data, '$.Status') = ?")
-                params.append(status)
-            if conditions:
-                query += " WHERE " + " AND ".join(conditions)
-            c.execute(query, params)
+            c.execute('''
+                SELECT row_version, place_id, data, wp_synced, wp_post_id, wp_sync_date, scraped_at, 0 AS deleted
+                FROM places WHERE row_version > ?
+                UNION ALL
+                SELECT row_version, place_id, NULL, NULL, NULL, NULL, deleted_at, 1 AS deleted
+                FROM place_tombstones WHERE row_version > ?
+                ORDER BY row_version
+                LIMIT ?
+            ''', (watermark, watermark, limit + 1))
             rows = c.fetchall()
-        data = []
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        changes = []
         for row in rows:
-            place = json.loads(row[0])
-            place['Status'] = place.get('Status', 'Old')
-            data.append(place)
-        for place in scraper.new_results:
-            if place['Place ID'] not in {p['Place ID'] for p in data}:
-                if (not location or location.lower() in place['Location'].lower()) and (not status or place['Status'] == status):
-                    data.append(place)
-        df = pd.DataFrame(data)
-        for col in expected_columns:
-            if col not in df.columns:
-                df[col] = ""
-        df = df[expected_columns]
-        temp_file = os.path.join(tempfile.gettempdir(), f"autism_services_export_{uuid.uuid4()}.csv")
-        logger.info(f"Creating temporary CSV file: {temp_file}")
-        with open(temp_file, 'w', encoding='utf-8') as f:
-            df.to_csv(f, index=False)
-        try:
-            response = send_file(temp_file, as_attachment=True, download_name="autism_services_export.csv")
-            return response
-        finally:
-            time.sleep(0.1)
-            try:
-                os.remove(temp_file)
-                logger.info(f"Deleted temporary CSV file: {temp_file}")
-            except Exception as e:
-                logger.error(f"Error deleting temp file {temp_file}: {e}")
+            if row[7]:
+                changes.append({'op': 'delete', 'place_id': row[1], 'deleted_at': row[6]})
+            else:
+                changes.append({
+                    'op': 'upsert',
+                    'place_id': row[1],
+                    'scraped_at': row[6],
+                    'wp_synced': row[3],
+                    'wp_post_id': row[4],
+                    'wp_sync_date': row[5],
+                    'place': decode_place(row[2])
+                })
+
+        return jsonify({
+            'changes': changes,
+            'next_cursor': encode_change_cursor(rows[-1][0] if rows else watermark),
+            'has_more': has_more
+        })
     except Exception as e:
-        logger.error(f"Error in /api/download: {str(e)}")
-        socketio.emit('error', {'message': f"Download failed: {str(e)}"}, namespace='/')
+        logger.error(f"Error in /api/places/changes: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
 @app.route('/api/clear_data', methods=['POST'])
@@ -906,6 +1745,7 @@ def api_clear_data():
             else:
                 c.execute("DELETE FROM places")
             conn.commit()
+        place_id_index.invalidate()
         logger.info(f"Cleared data for location: {location or 'all'}")
         socketio.emit('info', {'message': f"Cleared data for {location or 'all locations'}"}, namespace='/')
         return jsonify({"status": "Data cleared"})
@@ -922,6 +1762,33 @@ def manage():
         total_places = c.fetchone()[0]
     return render_template("manage.html", total_places=total_places)
 
+@app.route('/api/storage/stats', methods=['GET'])
+def api_storage_stats():
+    """Storage codec report: encoded vs legacy JSON rows, compression ratio and decode throughput"""
+    try:
+        try:
+            sample = int(request.args.get('sample', 1000))
+        except ValueError:
+            return jsonify({"error": "sample must be an integer"}), 400
+        # Sampled rows are decoded in the request thread; a negative LIMIT would mean all rows
+        sample = max(1, min(sample, 1000))
+        with get_db() as conn:
+            c = conn.cursor()
+            c.execute("SELECT typeof(data), COUNT(*), SUM(length(data)) FROM places GROUP BY typeof(data)")
+            by_type = {row[0]: {'rows': row[1], 'bytes': row[2]} for row in c.fetchall()}
+            # Shuffle rowids only, so the sort doesn't carry every row's data along
+            c.execute("SELECT data FROM places WHERE rowid IN "
+                      "(SELECT rowid FROM places ORDER BY RANDOM() LIMIT ?)", (sample,))
+            values = [row[0] for row in c.fetchall()]
+        return jsonify({
+            'encoded': by_type.get('blob', {'rows': 0, 'bytes': 0}),
+            'legacy_json': by_type.get('text', {'rows': 0, 'bytes': 0}),
+            'sample': measure_place_codec(values)
+        })
+    except Exception as e:
+        logger.error(f"Error in /api/storage/stats: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
 # ==================== Keywords API ====================
 @app.route('/api/keywords', methods=['GET'])
 def api_get_keywords():
@@ -1007,28 +1874,76 @@ def api_delete_keyword(keyword_id):
         logger.error(f"Error in /api/keywords DELETE: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
+# ==================== Search API ====================
+@app.route('/api/places/search', methods=['GET'])
+def api_search_places():
+    """Full-text search over stored listings, ranked by bm25 (title weighted highest)"""
+    try:
+        if not FTS_AVAILABLE:
+            return jsonify({"error": "Full-text search is not available (SQLite built without FTS5)"}), 503
+
+        q = request.args.get('q', '')
+        prefix = request.args.get('prefix', 'true').lower() == 'true'
+        page = int(request.args.get('page', 1))
+        per_page = int(request.args.get('per_page', 50))
+        if page < 1 or per_page < 1 or per_page > 200:
+            return jsonify({"error": "page must be >= 1 and per_page between 1 and 200"}), 400
+
+        fts_query = build_fts_query(q, prefix)
+        if not fts_query:
+            return jsonify({"error": "q parameter required"}), 400
+
+        with get_db() as conn:
+            c = conn.cursor()
+            c.execute("SELECT COUNT(*) FROM places_fts WHERE places_fts MATCH ?", (fts_query,))
+            total = c.fetchone()[0]
+            c.execute('''
+                SELECT p.place_id, p.data, p.wp_synced,
+                       bm25(places_fts, 10.0, 1.0, 4.0, 2.0, 4.0, 2.0) AS score,
+                       snippet(places_fts, 1, '<mark>', '</mark>', '...', 16)
+                FROM places_fts
+                JOIN places p ON p.rowid = places_fts.rowid
+                WHERE places_fts MATCH ?
+                ORDER BY score
+                LIMIT ? OFFSET ?
+            ''', (fts_query, per_page, (page - 1) * per_page))
+            rows = c.fetchall()
+
+        results = []
+        for row in rows:
+            place_data = decode_place(row[1])
+            results.append({
+                'place_id': row[0],
+                'title': place_data.get('Title', 'Unknown'),
+                'category': place_data.get('Category', ''),
+                'address': place_data.get('Google Address', ''),
+                'location': place_data.get('Location', ''),
+                'wp_synced': row[2],
+                'score': row[3],
+                'snippet': row[4]
+            })
+
+        return jsonify({
+            'query': q,
+            'total': total,
+            'page': page,
+            'per_page': per_page,
+            'results': results
+        })
+    except ValueError:
+        return jsonify({"error": "page and per_page must be integers"}), 400
+    except Exception as e:
+        logger.error(f"Error in /api/places/search: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
 # ==================== Location Hierarchy API ====================
 @app.route('/api/locations/countries', methods=['GET'])
 def api_get_countries():
     try:
         with get_db() as conn:
             c = conn.cursor()
-            c.execute("SELECT data FROM places")
-            places = [json.loads(row[0]) for row in c.fetchall()]
-        
-        countries = {}
-        for place in places:
-            location = place.get('Location', '')
-            if location and ' > ' in location:
-                parts = location.split(' > ')
-                if len(parts) >= 1:
-                    country = parts[0]
-                    if country not in countries:
-                        countries[country] = 0
-                    countries[country] += 1
-        
-        result = [{'name': k, 'count': v} for k, v in countries.items()]
-        result.sort(key=lambda x: x['name'])
+            c.execute("SELECT country, total, unsynced FROM location_counts WHERE level = 1 ORDER BY country")
+            result = [{'name': row[0], 'count': row[1], 'unsynced': row[2]} for row in c.fetchall()]
         return jsonify(result)
     except Exception as e:
         logger.error(f"Error in /api/locations/countries: {str(e)}")
@@ -1043,22 +1958,9 @@ def api_get_states():
         
         with get_db() as conn:
             c = conn.cursor()
-            c.execute("SELECT data FROM places")
-            places = [json.loads(row[0]) for row in c.fetchall()]
-        
-        states = {}
-        for place in places:
-            location = place.get('Location', '')
-            if location and ' > ' in location:
-                parts = location.split(' > ')
-                if len(parts) >= 2 and parts[0] == country:
-                    state = parts[1]
-                    if state not in states:
-                        states[state] = 0
-                    states[state] += 1
-        
-        result = [{'name': k, 'count': v} for k, v in states.items()]
-        result.sort(key=lambda x: x['name'])
+            c.execute("SELECT state, total, unsynced FROM location_counts WHERE level = 2 AND country = ? ORDER BY state",
+                      (country,))
+            result = [{'name': row[0], 'count': row[1], 'unsynced': row[2]} for row in c.fetchall()]
         return jsonify(result)
     except Exception as e:
         logger.error(f"Error in /api/locations/states: {str(e)}")
@@ -1075,22 +1977,9 @@ def api_get_cities_by_state():
         
         with get_db() as conn:
             c = conn.cursor()
-            c.execute("SELECT data FROM places")
-            places = [json.loads(row[0]) for row in c.fetchall()]
-        
-        cities = {}
-        for place in places:
-            location = place.get('Location', '')
-            if location and ' > ' in location:
-                parts = location.split(' > ')
-                if len(parts) >= 3 and parts[0] == country and parts[1] == state:
-                    city = parts[2]
-                    if city not in cities:
-                        cities[city] = 0
-                    cities[city] += 1
-        
-        result = [{'name': k, 'count': v} for k, v in cities.items()]
-        result.sort(key=lambda x: x['name'])
+            c.execute("SELECT city, total, unsynced FROM location_counts WHERE level = 3 AND country = ? AND state = ? ORDER BY city",
+                      (country, state))
+            result = [{'name': row[0], 'count': row[1], 'unsynced': row[2]} for row in c.fetchall()]
         return jsonify(result)
     except Exception as e:
         logger.error(f"Error in /api/locations/cities: {str(e)}")
@@ -1104,44 +1993,41 @@ def api_get_places_by_location():
         city = request.args.get('city')
         unsynced_only = request.args.get('unsynced_only', 'false').lower() == 'true'
         
+        # Filter on the indexed location columns instead of decoding every row
+        query = "SELECT place_id, data, wp_synced FROM places WHERE country IS NOT NULL"
+        params = []
+        if country:
+            query += " AND country = ?"
+            params.append(country)
+        if state:
+            query += " AND state = ?"
+            params.append(state)
+        if city:
+            query += " AND city = ?"
+            params.append(city)
+        if unsynced_only:
+            query += " AND COALESCE(wp_synced, 0) != 1"
+        
         with get_db() as conn:
             c = conn.cursor()
-            c.execute("SELECT place_id, data, wp_synced FROM places")
+            c.execute(query, params)
             rows = c.fetchall()
         
         places = []
         for row in rows:
             place_id = row[0]
-            place_data = json.loads(row[1])
+            place_data = decode_place(row[1])
             wp_synced = row[2]
-            location = place_data.get('Location', '')
-            
-            # Match location filters
-            if location and ' > ' in location:
-                parts = location.split(' > ')
-                match = True
-                
-                if country and (len(parts) < 1 or parts[0] != country):
-                    match = False
-                if state and (len(parts) < 2 or parts[1] != state):
-                    match = False
-                if city and (len(parts) < 3 or parts[2] != city):
-                    match = False
-                
-                if match:
-                    if unsynced_only and wp_synced == 1:
-                        continue
-                    
-                    places.append({
-                        'place_id': place_id,
-                        'title': place_data.get('Title', 'Unknown'),
-                        'category': place_data.get('Category', ''),
-                        'address': place_data.get('Google Address', ''),
-                        'location': location,
-                        'wp_synced': wp_synced,
-                        'phone': place_data.get('Phone', ''),
-                        'website': place_data.get('Website', '')
-                    })
+            places.append({
+                'place_id': place_id,
+                'title': place_data.get('Title', 'Unknown'),
+                'category': place_data.get('Category', ''),
+                'address': place_data.get('Google Address', ''),
+                'location': place_data.get('Location', ''),
+                'wp_synced': wp_synced,
+                'phone': place_data.get('Phone', ''),
+                'website': place_data.get('Website', '')
+            })
         
         return jsonify(places)
     except Exception as e:
@@ -1154,35 +2040,274 @@ def api_get_cities():
     try:
         with get_db() as conn:
             c = conn.cursor()
-            c.execute("SELECT data FROM places")
-            places = [json.loads(row[0]) for row in c.fetchall()]
-        
-        cities_dict = {}
-        for place in places:
-            location = place.get('Location', '')
-            if location and ' > ' in location:
-                parts = location.split(' > ')
-                if len(parts) >= 3:
-                    country, state, city = parts[0], parts[1], parts[2]
-                    key = f"{country}|{state}|{city}"
-                    if key not in cities_dict:
-                        cities_dict[key] = {
-                            'country': country,
-                            'state': state,
-                            'city': city,
-                            'location': location,
-                            'count': 0
-                        }
-                    cities_dict[key]['count'] += 1
-        
-        cities = list(cities_dict.values())
-        cities.sort(key=lambda x: (x['country'], x['state'], x['city']))
+            c.execute("SELECT country, state, city, total, unsynced FROM location_counts WHERE level = 3 ORDER BY country, state, city")
+            cities = [{
+                'country': row[0],
+                'state': row[1],
+                'city': row[2],
+                'location': f"{row[0]} > {row[1]} > {row[2]}",
+                'count': row[3],
+                'unsynced': row[4]
+            } for row in c.fetchall()]
         
         return jsonify(cities)
     except Exception as e:
         logger.error(f"Error in /api/cities: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
+# ==================== Jobs API ====================
+@app.route('/api/jobs', methods=['GET'])
+def api_get_jobs():
+    """Running and recent scrape/sync jobs, newest first"""
+    kind = request.args.get('kind')
+    return jsonify({'jobs': [job for job in jobs.list() if not kind or job['kind'] == kind]})
+
+@socketio.on('job_subscribe', namespace='/')
+def on_job_subscribe(data):
+    job = jobs.get((data or {}).get('job_id'))
+    if not job:
+        return {'error': 'Unknown job'}
+    join_room(job_room(job['job_id']))
+    return job
+
+@socketio.on('job_unsubscribe', namespace='/')
+def on_job_unsubscribe(data):
+    job_id = (data or {}).get('job_id')
+    if job_id:
+        leave_room(job_room(job_id))
+
+@socketio.on('disconnect', namespace='/')
+def on_disconnect(reason=None):
+    progress_relay.forget(request.sid)
+
+# ==================== API Log ====================
+@app.route('/api/logs', methods=['GET'])
+def api_get_logs():
+    """Pull buffered API log entries newer than ?after=<seq>"""
+    try:
+        after = int(request.args.get('after', 0))
+        limit = min(max(int(request.args.get('limit', 200)), 1), 1000)
+        result = api_log.since(after, limit)
+        result['sample_rate'] = api_log.sample_rate
+        return jsonify(result)
+    except ValueError:
+        return jsonify({"error": "after and limit must be integers"}), 400
+    except Exception as e:
+        logger.error(f"Error in /api/logs: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@socketio.on('api_log_subscribe', namespace='/')
+def on_api_log_subscribe():
+    join_room(API_LOG_ROOM)
+
+@socketio.on('api_log_unsubscribe', namespace='/')
+def on_api_log_unsubscribe():
+    leave_room(API_LOG_ROOM)
+
+# ==================== WordPress Media ====================
+WP_UPLOAD_IMAGES = os.getenv("WP_UPLOAD_IMAGES", "false").lower() == "true"  # default for syncs
+MEDIA_WORKERS = int(os.getenv("MEDIA_WORKERS", "8"))  # concurrent image transfers
+MEDIA_PER_HOST = int(os.getenv("MEDIA_PER_HOST", "3"))  # per image host / WordPress site
+MEDIA_MAX_BYTES = int(os.getenv("MEDIA_MAX_BYTES", str(20 * 1024 * 1024)))
+MEDIA_SPOOL_BYTES = 1024 * 1024  # larger downloads are spooled to a temp file
+MEDIA_EXTENSIONS = {'image/jpeg': '.jpg', 'image/png': '.png', 'image/gif': '.gif', 'image/webp': '.webp'}
+
+def wordpress_site(url):
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+def media_source_key(image_url):
+    """Image URL without its API key, so a rotated Places key doesn't invalidate the cache"""
+    parts = urlsplit(image_url)
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k.lower() != 'key']
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(query), ''))
+
+class MediaPipeline:
+    """
+    Content-addressed image uploads. Downloads are streamed and hashed, and the
+    media_cache table maps (site, sha256) to the WordPress media URL, so an image
+    is uploaded once per site however many listings or syncs use it. Transfers
+    run on a shared pool with a per-host limit; concurrent requests for the same
+    image share one transfer.
+    """
+    def __init__(self, workers=MEDIA_WORKERS, per_host=MEDIA_PER_HOST):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='media')
+        self.per_host = per_host
+        self.stats = {'uploaded': 0, 'cache_hits': 0, 'failed': 0}
+        self._host_limits = {}
+        self._in_flight = {}
+        # A fixed set of striped locks, so memory doesn't grow with every distinct image
+        self._content_locks = [threading.Lock() for _ in range(max(64, workers * 8))]
+        self._lock = threading.Lock()
+
+    def _host_limit(self, url):
+        host = urlsplit(url).netloc
+        with self._lock:
+            if host not in self._host_limits:
+                self._host_limits[host] = threading.BoundedSemaphore(self.per_host)
+            return self._host_limits[host]
+
+    def _count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+    def upload_all(self, image_urls, wp_url, api_key):
+        """WordPress media URLs for image_urls, in order; images that fail keep their original URL"""
+        site = wordpress_site(wp_url)
+        futures = [self._submit(image_url, site, wp_url, api_key) for image_url in image_urls]
+        return [future.result() for future in futures]
+
+    def _submit(self, image_url, site, wp_url, api_key):
+        source_key = media_source_key(image_url)
+        with get_db() as conn:
+            c = conn.cursor()
+            c.execute('''
+                SELECT m.media_url FROM media_sources s
+                JOIN media_cache m ON m.site = s.site AND m.content_hash = s.content_hash
+                WHERE s.site = ? AND s.source_key = ?
+            ''', (site, source_key))
+            row = c.fetchone()
+        if row:
+            self._count('cache_hits')
+            future = Future()
+            future.set_result(row[0])
+            return future
+        
+        key = (site, source_key)
+        with self._lock:
+            future = self._in_flight.get(key)
+            submitted = future is None
+            if submitted:
+                future = self.executor.submit(self._transfer, image_url, source_key, site, wp_url, api_key)
+                self._in_flight[key] = future
+        if submitted:
+            # Outside the lock: a transfer that has already finished runs the callback inline
+            future.add_done_callback(lambda f: self._forget(key))
+        return future
+
+    def _forget(self, key):
+        with self._lock:
+            self._in_flight.pop(key, None)
+
+    def _content_lock(self, site, content_hash):
+        return self._content_locks[hash((site, content_hash)) % len(self._content_locks)]
+
+    def _transfer(self, image_url, source_key, site, wp_url, api_key):
+        try:
+            with self._host_limit(image_url):
+                spool, content_hash, content_type, size = self._download(image_url)
+            # Same bytes under different URLs are uploaded once, even when they arrive together
+            with spool, self._content_lock(site, content_hash):
+                with get_db() as conn:
+                    c = conn.cursor()
+                    c.execute("SELECT media_url FROM media_cache WHERE site = ? AND content_hash = ?",
+                              (site, content_hash))
+                    row = c.fetchone()
+                if row:
+                    media_url = row[0]
+                    self._count('cache_hits')
+                else:
+                    with self._host_limit(wp_url):
+                        media_url, media_id = self._upload(spool, size, content_hash, content_type, image_url,
+                                                           wp_url, api_key)
+                    self._count('uploaded')
+                    with get_db() as conn:
+                        c = conn.cursor()
+                        c.execute('''
+                            INSERT OR REPLACE INTO media_cache (site, content_hash, media_url, media_id, bytes, uploaded_at)
+                            VALUES (?, ?, ?, ?, ?, ?)
+                        ''', (site, content_hash, media_url, media_id, size, datetime.now().isoformat()))
+                        conn.commit()
+            
+            with get_db() as conn:
+                c = conn.cursor()
+                c.execute("INSERT OR REPLACE INTO media_sources (site, source_key, content_hash) VALUES (?, ?, ?)",
+                          (site, source_key, content_hash))
+                conn.commit()
+            return media_url
+        except Exception as e:
+            logger.warning(f"Error uploading image to WordPress: {e}, using original URL")
+            self._count('failed')
+            # Fallback to original URL
+            return image_url
+
+    def _download(self, image_url):
+        """Stream an image into a spooled temp file, hashing as it arrives"""
+        spool = tempfile.SpooledTemporaryFile(max_size=MEDIA_SPOOL_BYTES)
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with requests.get(image_url, timeout=10, stream=True) as response:
+                response.raise_for_status()
+                content_type = response.headers.get('Content-Type', 'image/jpeg').split(';')[0].strip()
+                for chunk in response.iter_content(64 * 1024):
+                    size += len(chunk)
+                    if size > MEDIA_MAX_BYTES:
+                        raise ValueError(f"Image larger than {MEDIA_MAX_BYTES} bytes: {image_url[:100]}")
+                    digest.update(chunk)
+                    spool.write(chunk)
+        except Exception:
+            spool.close()
+            raise
+        spool.seek(0)
+        return spool, digest.hexdigest(), content_type, size
+
+    def _upload(self, spool, size, content_hash, content_type, image_url, wp_url, api_key):
+        # Content-addressed filename; the extension comes from the URL or the content type
+        extension = os.path.splitext(urlsplit(image_url).path)[1].lower()
+        if extension not in MEDIA_EXTENSIONS.values():
+            extension = MEDIA_EXTENSIONS.get(content_type, '.jpg')
+        filename = f"{content_hash[:16]}{extension}"
+        
+        headers = {
+            'X-API-Key': api_key,
+            'Content-Type': content_type,
+            'Content-Disposition': f'attachment; filename="{filename}"',
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+        }
+        upload_url = f"{wp_url.rstrip('/')}/wp-json/wp/v2/media"
+        # Small images are already in memory; spooled files are streamed from disk
+        body = spool.read() if size <= MEDIA_SPOOL_BYTES else spool
+        upload_response = requests.post(upload_url, data=body, headers=headers, timeout=30)
+        api_log.record({
+            'type': 'response',
+            'message': f"Media upload {filename} ({size} bytes)",
+            'method': 'POST',
+            'url': upload_url,
+            'status': upload_response.status_code
+        })
+        
+        if upload_response.status_code not in [200, 201]:
+            raise ValueError(f"{upload_response.status_code} - {upload_response.text[:200]}")
+        media_data = upload_response.json()
+        media_url = media_data.get('source_url') or media_data.get('url')
+        if not media_url:
+            raise ValueError("Media response has no source_url")
+        logger.info(f"Uploaded image to WordPress: {media_url}")
+        return media_url, media_data.get('id')
+
+    def localize_payloads(self, payloads, wp_url, api_key):
+        """Copies of WordPress payloads with every image replaced by its media library URL"""
+        image_urls = []
+        for wp_data in payloads:
+            image_urls.extend(url for url in [wp_data.get('logo_url'), wp_data.get('featured_image')] if url)
+            image_urls.extend(wp_data.get('gallery_images') or [])
+        image_urls = list(dict.fromkeys(image_urls))
+        media_urls = dict(zip(image_urls, self.upload_all(image_urls, wp_url, api_key)))
+        
+        localized = []
+        for wp_data in payloads:
+            wp_data = dict(wp_data)
+            for field in ('logo_url', 'featured_image'):
+                if wp_data.get(field):
+                    wp_data[field] = media_urls[wp_data[field]]
+            if wp_data.get('gallery_images'):
+                wp_data['gallery_images'] = [media_urls[url] for url in wp_data['gallery_images']]
+            localized.append(wp_data)
+        return localized
+
+media_pipeline = MediaPipeline()
+
 # ==================== WordPress Sync Helpers ====================
 def convert_business_hours_to_json(business_hours_str):
     """Convert pipe-separated business hours to JSON format"""
@@ -1207,46 +2332,10 @@ def convert_business_hours_to_json(business_hours_str):
 
 def upload_image_to_wordpress(image_url, wp_url, api_key, socketio=None):
     """
-    Upload an image from URL to WordPress media library
-    Returns the WordPress media URL or None if failed
+    Upload an image from URL to WordPress media library (through the media cache)
+    Returns the WordPress media URL, or the original URL if the upload failed
     """
-    try:
-        # Download the image
-        img_response = requests.get(image_url, timeout=10, stream=True)
-        img_response.raise_for_status()
-        
-        # Get image filename from URL or generate one
-        filename = image_url.split('/')[-1].split('?')[0] or 'image.jpg'
-        if not filename.endswith(('.jpg', '.jpeg', '.png', '.gif', '.webp')):
-            filename = 'image.jpg'
-        
-        # Prepare multipart form data
-        files = {
-            'file': (filename, img_response.content, img_response.headers.get('Content-Type', 'image/jpeg'))
-        }
-        
-        headers = {
-            'X-API-Key': api_key,
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-        }
-        
-        # Upload to WordPress media library
-        upload_url = f"{wp_url.rstrip('/')}/wp-json/wp/v2/media"
-        upload_response = requests.post(upload_url, files=files, headers=headers, timeout=30)
-        
-        if upload_response.status_code in [200, 201]:
-            media_data = upload_response.json()
-            wp_image_url = media_data.get('source_url') or media_data.get('url')
-            logger.info(f"Uploaded image to WordPress: {wp_image_url}")
-            return wp_image_url
-        else:
-            logger.warning(f"Failed to upload image to WordPress: {upload_response.status_code} - {upload_response.text[:200]}")
-            # Fallback to original URL
-            return image_url
-    except Exception as e:
-        logger.warning(f"Error uploading image to WordPress: {e}, using original URL")
-        # Fallback to original URL
-        return image_url
+    return media_pipeline.upload_all([image_url], wp_url, api_key)[0]
 
 def convert_place_to_wordpress_format(place, wp_url=None, api_key=None, upload_images=False, socketio=None):
     """Convert scraper format to WordPress ListingPro format
@@ -1311,18 +2400,13 @@ def convert_place_to_wordpress_format(place, wp_url=None, api_key=None, upload_i
     logo_url = place.get('Logo Image', '') or ''
     featured_image = place.get('Banner Image', '') or ''
     
-    # Upload images to WordPress media library if requested
+    # Upload images to WordPress media library if requested - all at once, through the media cache
     if upload_images and wp_url and api_key:
-        if logo_url:
-            logo_url = upload_image_to_wordpress(logo_url, wp_url, api_key, socketio)
-        if featured_image:
-            featured_image = upload_image_to_wordpress(featured_image, wp_url, api_key, socketio)
-        if gallery_images:
-            uploaded_gallery = []
-            for img_url in gallery_images:
-                uploaded_url = upload_image_to_wordpress(img_url, wp_url, api_key, socketio)
-                uploaded_gallery.append(uploaded_url)
-            gallery_images = uploaded_gallery
+        image_urls = [url for url in [logo_url, featured_image] + gallery_images if url]
+        media_urls = dict(zip(image_urls, media_pipeline.upload_all(image_urls, wp_url, api_key)))
+        logo_url = media_urls.get(logo_url, logo_url)
+        featured_image = media_urls.get(featured_image, featured_image)
+        gallery_images = [media_urls[url] for url in gallery_images]
     
     # Log image data for debugging
     logger.info(f"Images for '{place.get('Title', 'Unknown')}': logo={bool(logo_url)}, featured={bool(featured_image)}, gallery={len(gallery_images)}")
@@ -1385,86 +2469,221 @@ def convert_place_to_wordpress_format(place, wp_url=None, api_key=None, upload_i
     
     return wp_data
 
-def check_existing_in_wordpress(place, wp_url, api_key, socketio=None):
-    """Check if a listing already exists in WordPress"""
-    try:
-        headers = {
+# ==================== WordPress Request Bodies ====================
+WP_GZIP_MIN_BYTES = int(os.getenv("WP_GZIP_MIN_BYTES", "2048"))  # smaller bodies are sent as-is
+
+class RequestEncodingSupport:
+    """
+    Per-site record of whether WordPress accepts gzip request bodies. A server
+    advertises it with Accept-Encoding on its responses (RFC 7694); a 415 to a
+    compressed body turns it off for that site.
+    """
+    def __init__(self):
+        self._sites = {}
+        self._lock = threading.Lock()
+
+    def observe(self, url, response):
+        accept = response.headers.get('Accept-Encoding')
+        if accept is not None:
+            with self._lock:
+                self._sites[wordpress_site(url)] = 'gzip' in accept.lower()
+
+    def reject(self, url):
+        with self._lock:
+            self._sites[wordpress_site(url)] = False
+
+    def accepts_gzip(self, url):
+        with self._lock:
+            return self._sites.get(wordpress_site(url), False)
+
+wp_encodings = RequestEncodingSupport()
+
+def post_wordpress_json(url, payload, headers, timeout):
+    """POST a JSON body, gzip-compressed when it is large and the site accepts it"""
+    body = json.dumps(payload).encode('utf-8')
+    if len(body) >= WP_GZIP_MIN_BYTES and wp_encodings.accepts_gzip(url):
+        response = requests.post(url, data=gzip.compress(body, 6),
+                                 headers={**headers, 'Content-Encoding': 'gzip'}, timeout=timeout)
+        if response.status_code != 415:
+            wp_encodings.observe(url, response)
+            return response
+        logger.warning(f"{url} rejected a gzip request body - sending uncompressed")
+        wp_encodings.reject(url)
+    response = requests.post(url, data=body, headers=headers, timeout=timeout)
+    wp_encodings.observe(url, response)
+    return response
+
+def pack_payload(wp_data):
+    return zlib.compress(json.dumps(wp_data, separators=(',', ':')).encode('utf-8'))
+
+def unpack_payload(value):
+    return json.loads(zlib.decompress(value)) if value else None
+
+def payload_changes(wp_data, previous):
+    """
+    Fields of wp_data that differ from the previously synced payload. Fields that
+    were dropped since are sent empty so WordPress clears them.
+    """
+    changes = {k: v for k, v in wp_data.items() if previous.get(k) != v}
+    for key, value in previous.items():
+        if key not in wp_data:
+            changes[key] = type(value)() if isinstance(value, (str, list, dict)) else None
+    return changes
+
+def wordpress_payload_hash(wp_data, upload_images=False):
+    """
+    Canonical hash of a WordPress payload - key order and whitespace don't change it.
+    Syncs that upload images hash differently, so turning uploads on re-sends listings.
+    """
+    canonical = json.dumps([wp_data, 'media'] if upload_images else wp_data,
+                           sort_keys=True, separators=(',', ':'), ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+def place_payload_hash(place, upload_images=False):
+    return wordpress_payload_hash(convert_place_to_wordpress_format(place, upload_images=False), upload_images)
+
+def split_unchanged_rows(rows, upload_images=False):
+    """
+    Split (place_id, data, wp_post_id, wp_sync_hash, ...) rows into those that need a
+    sync and the place_ids whose payload still matches what was last pushed
+    """
+    changed, unchanged = [], []
+    for row in rows:
+        wp_post_id, stored_hash = row[2], row[3]
+        if wp_post_id and stored_hash and place_payload_hash(decode_place(row[1]), upload_images) == stored_hash:
+            unchanged.append(row[0])
+        else:
+            changed.append(row)
+    return changed, unchanged
+
+def normalize_match_text(value):
+    """Stripped and lowercased - titles and addresses must otherwise match exactly"""
+    return str(value or '').strip().lower()
+
+def normalize_phone(value):
+    """All digits, so only formatting differs: '(512) 555-0100' matches '512-555-0100', not '+1 512 555 0100'"""
+    return re.sub(r'\D', '', str(value or ''))
+
+class WordPressListingIndex:
+    """
+    Sync-scoped index of existing WordPress listings. The listings collection is
+    fetched once, page by page, and held in hash maps keyed by normalized title,
+    phone and address. Listings created during the sync are added as they go.
+    Each key remembers the first listing that has it, and its position, so find
+    returns the earliest listing matching on any field - as the linear scan did.
+    """
+    def __init__(self, wp_url, api_key, per_page=100, max_pages=1000):
+        self.listings_url = f"{wp_url.rstrip('/')}/wp-json/listingpro/v1/listings"
+        self.headers = {
             'X-API-Key': api_key,
             'Content-Type': 'application/json',
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
         }
-        
-        # Use GET /wp-json/listingpro/v1/listings to get all listings
-        listings_url = f"{wp_url.rstrip('/')}/wp-json/listingpro/v1/listings"
-        
-        # Log API call
-        if socketio:
-            socketio.emit('api_log', {
-                'type': 'request',
-                'message': f"Checking for existing listing: {place.get('Title')}",
-                'method': 'GET',
-                'url': listings_url,
-                'headers': {k: v if k != 'X-API-Key' else '***' for k, v in headers.items()}
-            }, namespace='/')
-        
-        response = requests.get(listings_url, headers=headers, timeout=10)
-        
-        # Log API response
-        if socketio:
-            try:
-                response_data = response.json()
-                total = response_data.get('total', 0) if isinstance(response_data, dict) else len(response_data) if isinstance(response_data, list) else 0
-            except:
-                response_data = response.text[:200]
-                total = 0
-            
-            socketio.emit('api_log', {
-                'type': 'response',
-                'message': f"Found {total} listings in WordPress",
-                'method': 'GET',
-                'url': listings_url,
-                'status': response.status_code,
-                'body': {'total_listings': total} if isinstance(response_data, dict) else {'preview': str(response_data)[:200]}
-            }, namespace='/')
-        
-        if response.status_code == 200:
-            data = response.json()
-            # Handle different response formats
-            if isinstance(data, dict):
-                # Format: {"success":true, "listings":[...]} or {"data":[...]}
-                listings = data.get('listings', data.get('data', []))
-            elif isinstance(data, list):
-                listings = data
-            else:
-                listings = []
-            
-            # Search for matching listing by title, phone, or address
-            place_title = place.get('Title', '').strip().lower()
-            place_phone = place.get('Phone', '').strip()
-            place_address = place.get('Google Address', '').strip().lower()
-            
-            for listing in listings:
-                # Check by title (most reliable)
-                listing_title = listing.get('title', '').strip().lower()
-                if listing_title and place_title and listing_title == place_title:
-                    return listing.get('post_id')
-                
-                # Check by phone
-                listing_phone = listing.get('phone', '').strip()
-                if listing_phone and place_phone and listing_phone == place_phone:
-                    return listing.get('post_id')
-                
-                # Check by address
-                listing_address = listing.get('gAddress', listing.get('address', '')).strip().lower()
-                if listing_address and place_address and listing_address == place_address:
-                    return listing.get('post_id')
-        
-        return None
-    except Exception as e:
-        logger.error(f"Error checking existing listing: {e}")
-        return None
+        self.per_page = per_page
+        self.max_pages = max_pages
+        self.by_title = {}
+        self.by_phone = {}
+        self.by_address = {}
+        self._position = 0
+        self.loaded = False
+        self.available = True
+        self._lock = threading.Lock()
+
+    def _add(self, post_id, title, phone, address):
+        self._position += 1
+        for index, key in ((self.by_title, normalize_match_text(title)),
+                           (self.by_phone, normalize_phone(phone)),
+                           (self.by_address, normalize_match_text(address))):
+            if key:
+                index.setdefault(key, (self._position, post_id))
 
-def sync_place_to_wordpress(place, wp_url, api_key, sync_mode='skip', socketio=None):
+    def _fetch_page(self, page, **params):
+        response = requests.get(self.listings_url, headers=self.headers,
+                                params=dict(params, page=page, per_page=self.per_page), timeout=30)
+        api_log.record({
+            'type': 'response',
+            'message': f"Listing index page {page}",
+            'method': 'GET',
+            'url': self.listings_url,
+            'status': response.status_code
+        }, always=True)
+        response.raise_for_status()
+        wp_encodings.observe(self.listings_url, response)
+        data = response.json()
+        total_pages = response.headers.get('X-WP-TotalPages')
+        # Handle different response formats
+        if isinstance(data, dict):
+            # Format: {"success":true, "listings":[...]} or {"data":[...]}
+            listings = data.get('listings', data.get('data', []))
+            total_pages = data.get('total_pages', data.get('pages', total_pages))
+        elif isinstance(data, list):
+            listings = data
+        else:
+            listings = []
+        return listings, int(total_pages) if total_pages else None
+
+    def iter_pages(self, **params):
+        """Yield each page of listings not seen on an earlier page; extra params filter the collection"""
+        seen = set()
+        for page in range(1, self.max_pages + 1):
+            listings, total_pages = self._fetch_page(page, **params)
+            new = [l for l in listings if l.get('post_id', l.get('id')) not in seen]
+            seen.update(l.get('post_id', l.get('id')) for l in new)
+            if new:
+                yield new
+            # Stop on the advertised last page, a server that ignores paging, or - when no
+            # page count is given - a short page (servers may cap per_page below ours)
+            if not new or (page >= total_pages if total_pages else len(listings) < self.per_page):
+                break
+
+    def load(self):
+        count = 0
+        try:
+            for listings in self.iter_pages():
+                for listing in listings:
+                    self._add(listing.get('post_id', listing.get('id')), listing.get('title', ''),
+                              listing.get('phone', ''), listing.get('gAddress', listing.get('address', '')))
+                count += len(listings)
+            logger.info(f"Indexed {count} WordPress listings")
+        except Exception as e:
+            logger.error(f"Could not load WordPress listings for duplicate check: {e}")
+            self.available = False
+        self.loaded = True
+
+    def find(self, place):
+        """post_id of an existing listing matching the place by title, phone or address"""
+        with self._lock:
+            if not self.loaded:
+                self.load()
+            matches = [index[key] for index, key in ((self.by_title, normalize_match_text(place.get('Title'))),
+                                                     (self.by_phone, normalize_phone(place.get('Phone'))),
+                                                     (self.by_address, normalize_match_text(place.get('Google Address'))))
+                       if key and key in index]
+        # The earliest listing matching on any field wins
+        return min(matches)[1] if matches else None
+
+    def add(self, place, post_id):
+        """Record a listing created during this sync"""
+        if not post_id:
+            return
+        with self._lock:
+            self._add(post_id, place.get('Title'), place.get('Phone'), place.get('Google Address'))
+
+WP_PLACE_KEY = 'google_place_id'  # external key WordPress upserts listings on
+
+def keyed_payload(wp_data, place):
+    """Create body carrying the Google Place ID, so a repeated create updates the same listing"""
+    place_id = place.get('Place ID')
+    return dict(wp_data, **{WP_PLACE_KEY: place_id}) if place_id else wp_data
+
+def check_existing_in_wordpress(place, wp_url, api_key, socketio=None, listing_index=None):
+    """Check if a listing already exists in WordPress"""
+    if listing_index is None:
+        listing_index = WordPressListingIndex(wp_url, api_key)
+    return listing_index.find(place)
+
+def sync_place_to_wordpress(place, wp_url, api_key, sync_mode='skip', socketio=None, listing_index=None,
+                            last_post_id=None, last_payload=None, upload_images=False):
     """
     Sync a single place to WordPress
     
@@ -1472,12 +2691,18 @@ def sync_place_to_wordpress(place, wp_url, api_key, sync_mode='skip', socketio=N
     - 'skip': Skip if exists (safest)
     - 'update': Update if exists, create if not
     - 'force': Always create new (may duplicate)
+    
+    last_post_id/last_payload are the listing and payload of the previous sync.
+    A place with a last_post_id goes straight to that listing - only places never
+    synced are matched by title/phone/address - and an update of it only sends the
+    fields that changed. Creates carry the Place ID (WP_PLACE_KEY), so a retried
+    create updates the listing the first attempt made instead of duplicating it.
+    upload_images moves the listing's images into the WordPress media library.
     """
     try:
-        # Convert place data - optionally upload images to WordPress media library
-        # Note: For now, we send image URLs directly. If WordPress doesn't accept external URLs,
-        # set upload_images=True to upload images to WordPress media library first
+        # Convert place data; the hash is of the source payload so media URLs don't change it
         wp_data = convert_place_to_wordpress_format(place, wp_url=wp_url, api_key=api_key, upload_images=False, socketio=socketio)
+        payload_hash = wordpress_payload_hash(wp_data, upload_images)
         
         headers = {
             'X-API-Key': api_key,
@@ -1487,39 +2712,49 @@ def sync_place_to_wordpress(place, wp_url, api_key, sync_mode='skip', socketio=N
         
         api_endpoint = f"{wp_url.rstrip('/')}/wp-json/listingpro/v1/listing"
         
-        # Check if listing exists (unless force mode)
+        # Check if listing exists (unless force mode) - the recorded listing first
         existing_post_id = None
         if sync_mode != 'force':
-            existing_post_id = check_existing_in_wordpress(place, wp_url, api_key, socketio)
+            existing_post_id = last_post_id or check_existing_in_wordpress(place, wp_url, api_key, socketio,
+                                                                           listing_index)
+        
+        # Images are uploaded only for listings that will actually be sent
+        if upload_images and not (existing_post_id and sync_mode == 'skip'):
+            wp_data = media_pipeline.localize_payloads([wp_data], wp_url, api_key)[0]
         
         if existing_post_id:
             if sync_mode == 'skip':
                 logger.info(f"Skipping existing listing: {place.get('Title')} (WordPress ID: {existing_post_id})")
-                if socketio:
-                    socketio.emit('api_log', {
-                        'type': 'info',
-                        'message': f"Skipping existing listing: {place.get('Title')}",
-                        'method': 'GET',
-                        'url': f"{wp_url.rstrip('/')}/wp-json/listingpro/v1/listings",
-                        'status': 'skipped'
-                    }, namespace='/')
-                return {'status': 'skipped', 'wp_post_id': existing_post_id, 'action': 'skipped'}
+                api_log.record({
+                    'type': 'info',
+                    'message': f"Skipping existing listing: {place.get('Title')}",
+                    'method': 'GET',
+                    'url': f"{wp_url.rstrip('/')}/wp-json/listingpro/v1/listings",
+                    'status': 'skipped'
+                }, key=place.get('Place ID'))
+                # Our own listing still holds what we last sent; a matched one is unknown
+                return {'status': 'skipped', 'wp_post_id': existing_post_id, 'action': 'skipped',
+                        'payload': last_payload if existing_post_id == last_post_id else None}
             elif sync_mode == 'update':
                 # Update existing listing using PUT /wp-json/listingpro/v1/listing/{id}
                 update_url = f"{api_endpoint}/{existing_post_id}"
+                update_data = wp_data
+                if last_payload and str(last_post_id) == str(existing_post_id):
+                    update_data = payload_changes(wp_data, last_payload)
+                    if not update_data:
+                        return {'status': 'success', 'wp_post_id': existing_post_id, 'action': 'unchanged',
+                                'payload_hash': payload_hash, 'payload': wp_data}
                 
                 # Log API call
-                if socketio:
-                    socketio.emit('api_log', {
-                        'type': 'request',
-                        'message': f"Updating listing: {place.get('Title')}",
-                        'method': 'PUT',
-                        'url': update_url,
-                        'headers': {k: v if k != 'X-API-Key' else '***' for k, v in headers.items()},
-                        'body': {k: v for k, v in wp_data.items() if k not in ['description']}  # Exclude large description
-                    }, namespace='/')
+                api_log.record({
+                    'type': 'request',
+                    'message': f"Updating listing: {place.get('Title')} ({len(update_data)} of {len(wp_data)} fields)",
+                    'method': 'PUT',
+                    'url': update_url,
+                    'body': {k: v for k, v in update_data.items() if k not in ['description']}  # Exclude large description
+                }, key=place.get('Place ID'))
                 
-                response = requests.put(update_url, json=wp_data, headers=headers, timeout=30)
+                response = requests.put(update_url, json=update_data, headers=headers, timeout=30)
                 
                 # Log API response
                 try:
@@ -1527,33 +2762,39 @@ def sync_place_to_wordpress(place, wp_url, api_key, sync_mode='skip', socketio=N
                 except:
                     response_data = response.text[:500]
                 
-                if socketio:
-                    socketio.emit('api_log', {
-                        'type': 'response',
-                        'message': f"Update response for: {place.get('Title')}",
-                        'method': 'PUT',
-                        'url': update_url,
-                        'status': response.status_code,
-                        'body': response_data
-                    }, namespace='/')
+                api_log.record({
+                    'type': 'response',
+                    'message': f"Update response for: {place.get('Title')}",
+                    'method': 'PUT',
+                    'url': update_url,
+                    'status': response.status_code,
+                    'body': response_data
+                }, key=place.get('Place ID'))
                 
-                response.raise_for_status()
+                if response.status_code == 404 and existing_post_id == last_post_id:
+                    # The recorded listing was deleted in WordPress - create it again below
+                    logger.warning(f"Listing {existing_post_id} for '{place.get('Title')}' is gone from WordPress, "
+                                   f"creating it again")
+                    existing_post_id = None
+                else:
+                    response.raise_for_status()
                 
-                # Check response for image confirmation
-                try:
-                    response_data = response.json()
-                    logger.info(f"Updated listing: {place.get('Title')} (WordPress ID: {existing_post_id})")
-                    logger.debug(f"Update response data: {json.dumps(response_data, indent=2)[:500]}")
+                    # Check response for image confirmation
+                    try:
+                        response_data = response.json()
+                        logger.info(f"Updated listing: {place.get('Title')} (WordPress ID: {existing_post_id})")
+                        logger.debug(f"Update response data: {json.dumps(response_data, indent=2)[:500]}")
                     
-                    # Log if images were included in response
-                    if 'logo_url' in response_data or 'featured_image' in response_data or 'gallery_images' in response_data:
-                        logger.info(f"Images confirmed in WordPress response for '{place.get('Title')}'")
-                    else:
-                        logger.warning(f"Images not found in WordPress response for '{place.get('Title')}' - check if WordPress accepted them")
-                except:
-                    pass
+                        # Log if images were included in response
+                        if 'logo_url' in response_data or 'featured_image' in response_data or 'gallery_images' in response_data:
+                            logger.info(f"Images confirmed in WordPress response for '{place.get('Title')}'")
+                        else:
+                            logger.warning(f"Images not found in WordPress response for '{place.get('Title')}' - check if WordPress accepted them")
+                    except:
+                        pass
                 
-                return {'status': 'success', 'wp_post_id': existing_post_id, 'action': 'updated'}
+                    return {'status': 'success', 'wp_post_id': existing_post_id, 'action': 'updated',
+                            'payload_hash': payload_hash, 'payload': wp_data}
         
         # Create new listing using POST /wp-json/listingpro/v1/listing
         
@@ -1567,19 +2808,17 @@ def sync_place_to_wordpress(place, wp_url, api_key, sync_mode='skip', socketio=N
         }
         body_summary['_image_summary'] = image_summary
         
-        if socketio:
-            socketio.emit('api_log', {
-                'type': 'request',
-                'message': f"Creating listing: {place.get('Title')}",
-                'method': 'POST',
-                'url': api_endpoint,
-                'headers': {k: v if k != 'X-API-Key' else '***' for k, v in headers.items()},
-                'body': body_summary
-            }, namespace='/')
+        api_log.record({
+            'type': 'request',
+            'message': f"Creating listing: {place.get('Title')}",
+            'method': 'POST',
+            'url': api_endpoint,
+            'body': body_summary
+        }, key=place.get('Place ID'))
         
         logger.info(f"Creating listing '{place.get('Title')}' with images: logo={image_summary['has_logo']}, featured={image_summary['has_featured']}, gallery={image_summary['gallery_count']}")
         
-        response = requests.post(api_endpoint, json=wp_data, headers=headers, timeout=30)
+        response = post_wordpress_json(api_endpoint, keyed_payload(wp_data, place), headers, timeout=30)
         
         # Log API response
         try:
@@ -1587,15 +2826,14 @@ def sync_place_to_wordpress(place, wp_url, api_key, sync_mode='skip', socketio=N
         except:
             response_data = response.text[:500]
         
-        if socketio:
-            socketio.emit('api_log', {
-                'type': 'response',
-                'message': f"Create response for: {place.get('Title')}",
-                'method': 'POST',
-                'url': api_endpoint,
-                'status': response.status_code,
-                'body': response_data
-            }, namespace='/')
+        api_log.record({
+            'type': 'response',
+            'message': f"Create response for: {place.get('Title')}",
+            'method': 'POST',
+            'url': api_endpoint,
+            'status': response.status_code,
+            'body': response_data
+        }, key=place.get('Place ID'))
         
         response.raise_for_status()
         
@@ -1606,7 +2844,11 @@ def sync_place_to_wordpress(place, wp_url, api_key, sync_mode='skip', socketio=N
             # Try alternative response format
             wp_post_id = result.get('id')
         
-        logger.info(f"Created listing: {place.get('Title')} (WordPress ID: {wp_post_id})")
+        # WordPress answers action 'updated' when the Place ID already had a listing
+        action = 'updated' if result.get('action') == 'updated' else 'created'
+        logger.info(f"{action.capitalize()} listing: {place.get('Title')} (WordPress ID: {wp_post_id})")
+        if listing_index is not None:
+            listing_index.add(place, wp_post_id)
         
         # Check response for image confirmation
         logger.debug(f"Create response data: {json.dumps(result, indent=2)[:500]}")
@@ -1615,37 +2857,79 @@ def sync_place_to_wordpress(place, wp_url, api_key, sync_mode='skip', socketio=N
         else:
             logger.warning(f"Images not found in WordPress response for '{place.get('Title')}' - check if WordPress accepted them")
         
-        return {'status': 'success', 'wp_post_id': wp_post_id, 'action': 'created'}
+        return {'status': 'success', 'wp_post_id': wp_post_id, 'action': action,
+                'payload_hash': payload_hash, 'payload': wp_data}
         
     except requests.exceptions.RequestException as e:
         error_msg = str(e)
         logger.error(f"WordPress API error: {e}")
         
         # Log error
-        if socketio:
-            socketio.emit('api_log', {
-                'type': 'error',
-                'message': f"API Error for: {place.get('Title')}",
-                'method': 'POST' if not existing_post_id else 'PUT',
-                'url': api_endpoint,
-                'error': error_msg
-            }, namespace='/')
+        api_log.record({
+            'type': 'error',
+            'message': f"API Error for: {place.get('Title')}",
+            'method': 'POST' if not existing_post_id else 'PUT',
+            'url': api_endpoint,
+            'error': error_msg
+        }, key=place.get('Place ID'))
         
-        return {'status': 'error', 'error': error_msg}
+        result = {'status': 'error', 'error': error_msg}
+        if e.response is not None:
+            # Lets the sync pool back off on 429/5xx and honour Retry-After
+            result['http_status'] = e.response.status_code
+            result['retry_after'] = parse_retry_after(e.response.headers.get('Retry-After'))
+        return result
     except Exception as e:
         error_msg = str(e)
         logger.error(f"Sync error: {e}")
         
-        if socketio:
-            socketio.emit('api_log', {
-                'type': 'error',
-                'message': f"Sync Error for: {place.get('Title')}",
-                'error': error_msg
-            }, namespace='/')
+        api_log.record({
+            'type': 'error',
+            'message': f"Sync Error for: {place.get('Title')}",
+            'error': error_msg
+        }, key=place.get('Place ID'))
         
         return {'status': 'error', 'error': error_msg}
 
-def sync_bulk_to_wordpress(places, wp_url, api_key, sync_mode='skip', socketio=None):
+def parse_bulk_items(result, count):
+    """
+    Per-listing outcomes from a bulk response, in request order. Accepts a list
+    of results (optionally with an 'index') under results/listings/items/data/created,
+    or a post_ids list; listings without a result are reported as failed.
+    """
+    items = None
+    if isinstance(result, list):
+        items = result
+    elif isinstance(result, dict):
+        for key in ('results', 'listings', 'items', 'data', 'created'):
+            if isinstance(result.get(key), list):
+                items = result[key]
+                break
+        if items is None and isinstance(result.get('post_ids'), list):
+            items = result['post_ids']
+    parsed = [{'status': 'error', 'wp_post_id': None, 'error': 'No result for listing in bulk response'}
+              for _ in range(count)]
+    for position, item in enumerate(items or []):
+        if not isinstance(item, dict):
+            item = {'post_id': item}
+        index = item.get('index', position)
+        if not isinstance(index, int) or not 0 <= index < count:
+            continue
+        post_id = item.get('post_id', item.get('id'))
+        failed = item.get('success') is False or item.get('status') in ('error', 'failed') or item.get('error')
+        if post_id and not failed:
+            parsed[index] = {'status': 'success', 'wp_post_id': post_id}
+        else:
+            parsed[index] = {'status': 'error', 'wp_post_id': None,
+                             'error': item.get('error') or item.get('message') or 'Bulk item failed'}
+    if isinstance(result, dict) and isinstance(result.get('errors'), list):
+        for item in result['errors']:
+            if isinstance(item, dict) and isinstance(item.get('index'), int) and 0 <= item['index'] < count:
+                parsed[item['index']] = {'status': 'error', 'wp_post_id': None,
+                                         'error': item.get('error') or item.get('message') or 'Bulk item failed'}
+    return parsed
+
+def sync_bulk_to_wordpress(places, wp_url, api_key, sync_mode='skip', socketio=None, upload_images=False):
     """
     Sync multiple places to WordPress using bulk endpoint
     
@@ -1658,17 +2942,19 @@ def sync_bulk_to_wordpress(places, wp_url, api_key, sync_mode='skip', socketio=N
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
         }
         
-        # Convert all places to WordPress format
-        # Note: For now, we send image URLs directly. If WordPress doesn't accept external URLs,
-        # set upload_images=True to upload images to WordPress media library first
+        # Convert all places to WordPress format; hashes are of the source payloads
         wp_listings = []
         for place in places:
             wp_data = convert_place_to_wordpress_format(place, wp_url=wp_url, api_key=api_key, upload_images=False, socketio=socketio)
             wp_listings.append(wp_data)
+        hashes = [wordpress_payload_hash(wp_data, upload_images) for wp_data in wp_listings]
+        if upload_images:
+            # Every image in the chunk is uploaded concurrently
+            wp_listings = media_pipeline.localize_payloads(wp_listings, wp_url, api_key)
         
         # Use bulk endpoint
         bulk_endpoint = f"{wp_url.rstrip('/')}/wp-json/listingpro/v1/listings/bulk"
-        payload = {'listings': wp_listings}
+        payload = {'listings': [keyed_payload(wp_data, place) for wp_data, place in zip(wp_listings, places)]}
         
         # Log API call with image info
         sample_listing = wp_listings[0] if wp_listings else {}
@@ -1685,19 +2971,17 @@ def sync_bulk_to_wordpress(places, wp_url, api_key, sync_mode='skip', socketio=N
         # Count listings with images
         listings_with_images = sum(1 for l in wp_listings if l.get('logo_url') or l.get('featured_image') or l.get('gallery_images'))
         
-        if socketio:
-            socketio.emit('api_log', {
-                'type': 'request',
-                'message': f'Bulk sync: Creating {len(wp_listings)} listings ({listings_with_images} with images)',
-                'method': 'POST',
-                'url': bulk_endpoint,
-                'headers': {k: v if k != 'X-API-Key' else '***' for k, v in headers.items()},
-                'body': {'listings_count': len(wp_listings), 'listings_with_images': listings_with_images, 'sample': sample_summary}
-            }, namespace='/')
+        api_log.record({
+            'type': 'request',
+            'message': f'Bulk sync: Creating {len(wp_listings)} listings ({listings_with_images} with images)',
+            'method': 'POST',
+            'url': bulk_endpoint,
+            'body': {'listings_count': len(wp_listings), 'listings_with_images': listings_with_images, 'sample': sample_summary}
+        }, always=True)
         
         logger.info(f"Bulk sync: {len(wp_listings)} listings, {listings_with_images} with images")
         
-        response = requests.post(bulk_endpoint, json=payload, headers=headers, timeout=60)
+        response = post_wordpress_json(bulk_endpoint, payload, headers, timeout=60)
         
         # Log API response
         try:
@@ -1705,57 +2989,1332 @@ def sync_bulk_to_wordpress(places, wp_url, api_key, sync_mode='skip', socketio=N
         except:
             response_data = response.text[:500]
         
-        if socketio:
-            socketio.emit('api_log', {
-                'type': 'response',
-                'message': f'Bulk sync response: {len(wp_listings)} listings',
-                'method': 'POST',
-                'url': bulk_endpoint,
-                'status': response.status_code,
-                'body': response_data
-            }, namespace='/')
+        api_log.record({
+            'type': 'response',
+            'message': f'Bulk sync response: {len(wp_listings)} listings',
+            'method': 'POST',
+            'url': bulk_endpoint,
+            'status': response.status_code,
+            'body': response_data
+        }, always=True)
         
         response.raise_for_status()
         
         result = response.json()
         logger.info(f"Bulk sync completed: {len(places)} listings")
         
-        return {'status': 'success', 'result': result}
+        return {'status': 'success', 'result': result, 'items': parse_bulk_items(result, len(places)),
+                'payloads': wp_listings, 'hashes': hashes}
         
     except requests.exceptions.RequestException as e:
         logger.error(f"WordPress bulk API error: {e}")
-        if socketio:
-            socketio.emit('api_log', {
-                'type': 'error',
-                'message': 'Bulk sync API error',
-                'method': 'POST',
-                'url': bulk_endpoint if 'bulk_endpoint' in locals() else 'N/A',
-                'error': str(e)
-            }, namespace='/')
+        api_log.record({
+            'type': 'error',
+            'message': 'Bulk sync API error',
+            'method': 'POST',
+            'url': bulk_endpoint if 'bulk_endpoint' in locals() else 'N/A',
+            'error': str(e)
+        })
         if hasattr(e, 'response') and e.response is not None:
             logger.error(f"Response: {e.response.text[:500]}")
         return {'status': 'error', 'error': str(e)}
     except Exception as e:
         logger.error(f"Bulk sync error: {e}")
-        if socketio:
-            socketio.emit('api_log', {
-                'type': 'error',
-                'message': 'Bulk sync error',
-                'error': str(e)
-            }, namespace='/')
+        api_log.record({
+            'type': 'error',
+            'message': 'Bulk sync error',
+            'error': str(e)
+        })
         return {'status': 'error', 'error': str(e)}
 
-# Global flag to stop sync
-sync_stop_flag = False
+# ==================== WordPress Sync Pool ====================
+WP_SYNC_MAX_WORKERS = int(os.getenv("WP_SYNC_MAX_WORKERS", "8"))
+WP_SYNC_INITIAL_WORKERS = int(os.getenv("WP_SYNC_INITIAL_WORKERS", "2"))
+WP_SYNC_TARGET_LATENCY = float(os.getenv("WP_SYNC_TARGET_LATENCY", "2.0"))  # seconds per listing call
+WP_SYNC_MAX_ATTEMPTS = int(os.getenv("WP_SYNC_MAX_ATTEMPTS", "3"))  # for 429/5xx responses
+WP_BULK_CHUNK_SIZE = int(os.getenv("WP_BULK_CHUNK_SIZE", "50"))  # listings per bulk request
+WP_BULK_PARALLEL = int(os.getenv("WP_BULK_PARALLEL", "3"))  # bulk requests in flight
+
+def parse_retry_after(value, cap=300):
+    """Retry-After header (seconds or HTTP date) as seconds, or None"""
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = (parsedate_to_datetime(value) - datetime.now(parsedate_to_datetime(value).tzinfo)).total_seconds()
+        except (TypeError, ValueError):
+            return None
+    return min(max(seconds, 0), cap)
+
+class AdaptiveConcurrency:
+    """
+    AIMD limit on in-flight WordPress calls. Each round of fast successes adds one
+    worker; a 429/5xx, a Retry-After or a slow response halves the limit (at most
+    once per latency window, so one burst of rejections counts once).
+    """
+    def __init__(self, initial=WP_SYNC_INITIAL_WORKERS, minimum=1, maximum=WP_SYNC_MAX_WORKERS,
+                 target_latency=WP_SYNC_TARGET_LATENCY):
+        self.minimum = minimum
+        self.maximum = max(minimum, maximum)
+        self.target_latency = target_latency
+        self.limit = float(min(max(initial, minimum), self.maximum))
+        self.paused_until = 0.0
+        self._successes = 0
+        self._last_decrease = 0.0
+
+    @property
+    def current(self):
+        return int(self.limit)
+
+    def pause_remaining(self):
+        return max(0.0, self.paused_until - time.monotonic())
+
+    def record(self, latency, http_status=None, retry_after=None):
+        now = time.monotonic()
+        overloaded = http_status == 429 or (http_status is not None and http_status >= 500)
+        if retry_after:
+            self.paused_until = max(self.paused_until, now + retry_after)
+        if overloaded or retry_after or latency > self.target_latency:
+            if now - self._last_decrease >= self.target_latency:
+                self.limit = max(self.minimum, self.limit / 2)
+                self._last_decrease = now
+            self._successes = 0
+        else:
+            self._successes += 1
+            if self._successes >= self.current:
+                self.limit = min(self.maximum, self.limit + 1)
+                self._successes = 0
+
+def record_place_synced(c, place_id, wp_post_id, payload_hash=None, wp_data=None, sync_date=None):
+    """Record a successful sync on an open cursor, clearing any retry waiting in the outbox and any drift flag"""
+    c.execute("UPDATE places SET wp_synced = 1, wp_post_id = ?, wp_sync_date = ?, wp_sync_hash = ?, "
+              "wp_sync_payload = ? WHERE place_id = ?",
+              (wp_post_id, sync_date or datetime.now().isoformat(), payload_hash,
+               pack_payload(wp_data) if wp_data else None, place_id))
+    c.execute("DELETE FROM sync_outbox WHERE place_id = ?", (place_id,))
+    c.execute("DELETE FROM wp_drift WHERE place_id = ?", (place_id,))
+
+def mark_place_synced(place_id, wp_post_id, payload_hash=None, wp_data=None):
+    with get_db() as conn:
+        record_place_synced(conn.cursor(), place_id, wp_post_id, payload_hash, wp_data)
+        conn.commit()
+
+def run_bulk_chunks(rows, wp_url, api_key, sync_mode, results, chunk_size=WP_BULK_CHUNK_SIZE, parallel=WP_BULK_PARALLEL,
+                    upload_images=False, control=None, on_progress=None):
+    """
+    Post rows to the bulk endpoint in chunks, a few at a time, and store each
+    created listing's wp_post_id. Returns the rows that still need an individual sync.
+    """
+    chunks = [rows[i:i + chunk_size] for i in range(0, len(rows), chunk_size)]
+    job_id = current_job_id()
+    control = control or JobControl()
+    
+    def post_chunk(chunk):
+        control.wait_while_paused()
+        if control.cancelled.is_set():
+            return {'status': 'stopped'}
+        with job_scope(job_id):
+            return sync_bulk_to_wordpress([decode_place(row[1]) for row in chunk], wp_url, api_key, sync_mode, socketio,
+                                          upload_images)
+    
+    retry_rows = []
+    with ThreadPoolExecutor(max_workers=max(1, parallel)) as executor:
+        futures = {executor.submit(post_chunk, chunk): chunk for chunk in chunks}
+        for future in as_completed(futures):
+            chunk = futures[future]
+            try:
+                bulk_result = future.result()
+            except Exception as e:
+                bulk_result = {'status': 'error', 'error': str(e)}
+            
+            if bulk_result['status'] == 'stopped':
+                results['stopped'] = True
+                continue
+            if bulk_result['status'] != 'success':
+                logger.warning(f"Bulk chunk of {len(chunk)} failed, retrying individually: {bulk_result.get('error')}")
+                retry_rows.extend(chunk)
+                continue
+            
+            with get_db() as conn:
+                c = conn.cursor()
+                sync_date = datetime.now().isoformat()
+                for row, item, wp_data, payload_hash in zip(chunk, bulk_result['items'], bulk_result['payloads'],
+                                                            bulk_result['hashes']):
+                    if item['status'] == 'success':
+                        record_place_synced(c, row[0], item['wp_post_id'], payload_hash, wp_data, sync_date)
+                        results['synced'] += 1
+                    else:
+                        retry_rows.append(row)
+                conn.commit()
+            
+            if socketio:
+                socketio.emit('sync_progress', {
+                    'completed': results['synced'] + results['skipped'] + results['unchanged'] + results['failed'],
+                    'total': results['total'],
+                    'place': f"Bulk chunk of {len(chunk)}",
+                    'job_id': job_id
+                }, to=current_job_room(), namespace='/')
+            if on_progress:
+                on_progress(results)
+    
+    if results['stopped']:
+        results['errors'].append({
+            'place': 'SYNC_STOPPED',
+            'error': 'Sync was stopped by user'
+        })
+    return retry_rows
+
+def run_sync_job(rows, wp_url, api_key, sync_mode='skip', use_bulk_endpoint=False, max_workers=None, chunk_size=None,
+                 upload_images=False, control=None, on_progress=None):
+    """
+    Sync (place_id, data, wp_post_id, wp_sync_hash, wp_sync_payload) rows to WordPress;
+    call inside job_scope so progress goes to the job's room. control cancels or
+    pauses the sync; on_progress(results) is called as counters change.
+    """
+    results = {
+        'total': len(rows),
+        'synced': 0,
+        'skipped': 0,
+        'unchanged': 0,
+        'failed': 0,
+        'retry_queued': 0,
+        'dead_lettered': 0,
+        'errors': [],
+        'method': 'individual',
+        'stopped': False
+    }
+    control = control or JobControl()
+    
+    # Places whose payload matches the one last pushed are not sent again
+    if sync_mode != 'force':
+        rows, unchanged = split_unchanged_rows(rows, upload_images)
+        if unchanged:
+            with get_db() as conn:
+                c = conn.cursor()
+                c.executemany("UPDATE places SET wp_synced = 1 WHERE place_id = ? AND wp_synced != 1",
+                              [(place_id,) for place_id in unchanged])
+                c.executemany("DELETE FROM sync_outbox WHERE place_id = ?", [(place_id,) for place_id in unchanged])
+                conn.commit()
+            results['unchanged'] = len(unchanged)
+            logger.info(f"{len(unchanged)} places unchanged since their last sync")
+        if not rows:
+            return results
+    
+    # If use_bulk_endpoint is True and sync_mode is not 'update', try bulk endpoint
+    # Note: Bulk endpoint typically only supports creating new listings, so places
+    # that already have a listing (unless forced) go through the individual path
+    if use_bulk_endpoint and sync_mode != 'update':
+        recorded = [row for row in rows if sync_mode != 'force' and row[2]]
+        new_rows = [row for row in rows if sync_mode == 'force' or not row[2]]
+        rows = run_bulk_chunks(new_rows, wp_url, api_key, sync_mode, results, chunk_size or WP_BULK_CHUNK_SIZE,
+                               upload_images=upload_images, control=control, on_progress=on_progress)
+        results['method'] = 'bulk_endpoint'
+        if results['stopped'] or not (rows or recorded):
+            logger.info(f"Bulk sync completed: {results['synced']} synced, {results['failed']} failed")
+            return results
+        # Items the bulk endpoint rejected are retried one by one below
+        logger.warning(f"Syncing {len(rows) + len(recorded)} listings individually after bulk sync")
+        results['method'] = 'bulk_endpoint+individual'
+        rows = rows + recorded
+    
+    # Individual sync - a worker pool whose size follows AdaptiveConcurrency
+    # WordPress listings are fetched once for the whole sync, and only if a place
+    # without a recorded wp_post_id needs the duplicate check
+    listing_index = WordPressListingIndex(wp_url, api_key) if sync_mode != 'force' else None
+    
+    concurrency = AdaptiveConcurrency(maximum=max_workers or WP_SYNC_MAX_WORKERS)
+    job_id = current_job_id()
+    
+    # Listings and payloads from the previous sync: recorded listings skip the duplicate
+    # check and updates only send changed fields
+    last_synced = {row[0]: (row[2], row[4] if len(row) > 4 else None) for row in rows if row[2]}
+    
+    def sync_one(place_id, place):
+        last_post_id, last_payload = last_synced.get(place_id, (None, None))
+        with job_scope(job_id):
+            started = time.monotonic()
+            result = sync_place_to_wordpress(place, wp_url, api_key, sync_mode, socketio, listing_index,
+                                             last_post_id, unpack_payload(last_payload), upload_images)
+            return result, time.monotonic() - started
+    
+    pending = [(row[0], decode_place(row[1]), 1) for row in reversed(rows)]  # popped from the end
+    in_flight = {}
+    with ThreadPoolExecutor(max_workers=concurrency.maximum) as executor:
+        while pending or in_flight:
+            # Check if stop was requested - in-flight calls are allowed to finish
+            if control.cancelled.is_set() and not results['stopped']:
+                logger.info("Sync stopped by user request")
+                results['stopped'] = True
+                results['errors'].append({
+                    'place': 'SYNC_STOPPED',
+                    'error': 'Sync was stopped by user'
+                })
+                pending = []
+            
+            # While paused, in-flight calls finish but nothing new starts
+            while pending and len(in_flight) < concurrency.current and not concurrency.pause_remaining() \
+                    and not control.paused:
+                place_id, place, attempt = pending.pop()
+                in_flight[executor.submit(sync_one, place_id, place)] = (place_id, place, attempt)
+            
+            if not in_flight:
+                if control.paused:
+                    control.wait_while_paused(1.0)
+                else:
+                    # Paused by Retry-After
+                    time.sleep(min(concurrency.pause_remaining(), 1.0))
+                continue
+            
+            done, _ = wait(in_flight, timeout=1.0, return_when=FIRST_COMPLETED)
+            for future in done:
+                place_id, place, attempt = in_flight.pop(future)
+                try:
+                    result, latency = future.result()
+                except Exception as e:
+                    result, latency = {'status': 'error', 'error': str(e)}, 0.0
+                concurrency.record(latency, result.get('http_status'), result.get('retry_after'))
+                
+                http_status = result.get('http_status')
+                if result['status'] == 'error' and http_status and (http_status == 429 or http_status >= 500) \
+                        and attempt < WP_SYNC_MAX_ATTEMPTS:
+                    # Rejected because WordPress is overloaded - try again after backing off
+                    pending.insert(0, (place_id, place, attempt + 1))
+                    continue
+                
+                if result['status'] == 'success':
+                    # Update database
+                    mark_place_synced(place_id, result['wp_post_id'], result.get('payload_hash'), result.get('payload'))
+                    
+                    if result.get('action') == 'created':
+                        results['synced'] += 1
+                    elif result.get('action') == 'updated':
+                        results['synced'] += 1
+                    elif result.get('action') == 'unchanged':
+                        results['unchanged'] += 1
+                elif result['status'] == 'skipped':
+                    results['skipped'] += 1
+                else:
+                    results['failed'] += 1
+                    results['errors'].append({
+                        'place': place.get('Title'),
+                        'error': result.get('error')
+                    })
+                    # Kept in the outbox and retried in the background
+                    outbox_status = sync_outbox.record_failure(place_id, wp_url, sync_mode, upload_images,
+                                                               result.get('error'), http_status,
+                                                               result.get('retry_after'), job_id)
+                    results['dead_lettered' if outbox_status == 'dead' else 'retry_queued'] += 1
+                
+                # Emit progress via WebSocket
+                if socketio:
+                    socketio.emit('sync_progress', {
+                        'completed': results['synced'] + results['skipped'] + results['unchanged'] + results['failed'],
+                        'total': results['total'],
+                        'place': place.get('Title'),
+                        'concurrency': concurrency.current,
+                        'job_id': job_id
+                    }, to=current_job_room(), namespace='/')
+                if on_progress:
+                    on_progress(results)
+    
+    results['final_concurrency'] = concurrency.current
+    logger.info(f"Bulk sync completed: {results['synced']} synced, {results['skipped']} skipped, "
+                f"{results['unchanged']} unchanged, {results['failed']} failed")
+    return results
+
+# ==================== WordPress Sync Jobs ====================
+SYNC_JOB_COUNTERS = ('total', 'synced', 'skipped', 'unchanged', 'failed')
+SYNC_JOB_ACTIVE = ('running', 'paused', 'cancelling')
+SYNC_JOB_MAX_ERRORS = 500  # errors kept in a finished job's results
+
+class SyncJobStore:
+    """
+    The sync_jobs table: parameters, live counters and final results of each
+    background sync, so a job can be followed and looked up after it finishes.
+    Counter writes are throttled to one per interval per job; reads of a running
+    job take its counters from the live results instead.
+    """
+    def __init__(self, interval=1.0):
+        self.interval = interval
+        self._last_write = {}
+        self._live = {}
+        self._lock = threading.Lock()
+
+    def create(self, job_id, label, params, total):
+        now = datetime.now().isoformat()
+        with get_db() as conn:
+            c = conn.cursor()
+            c.execute('''
+                INSERT INTO sync_jobs (job_id, label, status, params, total, created_at, updated_at)
+                VALUES (?, ?, 'running', ?, ?, ?, ?)
+            ''', (job_id, label, json.dumps(params), total, now, now))
+            conn.commit()
+
+    def progress(self, job_id, results):
+        now = time.monotonic()
+        with self._lock:
+            self._live[job_id] = results
+            if now - self._last_write.get(job_id, 0) < self.interval:
+                return
+            self._last_write[job_id] = now
+        self._write(job_id, results)
+
+    def set_status(self, job_id, status):
+        with get_db() as conn:
+            c = conn.cursor()
+            c.execute("UPDATE sync_jobs SET status = ?, updated_at = ? WHERE job_id = ?",
+                      (status, datetime.now().isoformat(), job_id))
+            conn.commit()
+
+    def finish(self, job_id, status, results):
+        with self._lock:
+            self._last_write.pop(job_id, None)
+            self._live.pop(job_id, None)
+        results = dict(results, errors=results.get('errors', [])[:SYNC_JOB_MAX_ERRORS])
+        self._write(job_id, results, status)
+
+    def _write(self, job_id, results, status=None):
+        now = datetime.now().isoformat()
+        assignments = [f"{k} = ?" for k in SYNC_JOB_COUNTERS] + ["updated_at = ?"]
+        values = [results.get(k, 0) for k in SYNC_JOB_COUNTERS] + [now]
+        if status:
+            assignments += ["status = ?", "results = ?", "finished_at = ?"]
+            values += [status, json.dumps(results), now]
+        with get_db() as conn:
+            c = conn.cursor()
+            c.execute(f"UPDATE sync_jobs SET {', '.join(assignments)} WHERE job_id = ?", values + [job_id])
+            conn.commit()
+
+    @staticmethod
+    def _row_to_job(row):
+        job = dict(zip(('job_id', 'label', 'status', 'params') + SYNC_JOB_COUNTERS +
+                       ('results', 'created_at', 'updated_at', 'finished_at'), row))
+        job['params'] = json.loads(job['params']) if job['params'] else {}
+        job['results'] = json.loads(job['results']) if job['results'] else None
+        return job
+
+    def get(self, job_id):
+        with get_db() as conn:
+            c = conn.cursor()
+            c.execute(f"SELECT job_id, label, status, params, {', '.join(SYNC_JOB_COUNTERS)}, results, "
+                      f"created_at, updated_at, finished_at FROM sync_jobs WHERE job_id = ?", (job_id,))
+            row = c.fetchone()
+        if not row:
+            return None
+        job = self._row_to_job(row)
+        with self._lock:
+            live = self._live.get(job_id)
+            if live:
+                job.update({k: live.get(k, 0) for k in SYNC_JOB_COUNTERS})
+        return job
+
+    def list(self, limit=50, status=None):
+        # Results are left out of listings - fetch a single job for its errors
+        where, params = ("WHERE status = ?", [status]) if status else ("", [])
+        with get_db() as conn:
+            c = conn.cursor()
+            c.execute(f"SELECT job_id, label, status, params, {', '.join(SYNC_JOB_COUNTERS)}, NULL, "
+                      f"created_at, updated_at, finished_at FROM sync_jobs {where} "
+                      f"ORDER BY created_at DESC LIMIT ?", params + [limit])
+            return [self._row_to_job(row) for row in c.fetchall()]
+
+    def mark_interrupted(self):
+        """Jobs left active by a previous process can't resume - their threads are gone"""
+        with get_db() as conn:
+            c = conn.cursor()
+            c.execute(f"UPDATE sync_jobs SET status = 'interrupted', finished_at = ? "
+                      f"WHERE status IN ({','.join('?' * len(SYNC_JOB_ACTIVE))})",
+                      [datetime.now().isoformat()] + list(SYNC_JOB_ACTIVE))
+            conn.commit()
+            return c.rowcount
+
+sync_jobs = SyncJobStore()
+
+def run_wordpress_sync_job(job_id, rows, wp_url, api_key, sync_mode, use_bulk_endpoint, max_workers, chunk_size,
+                           upload_images):
+    """Background task for one sync job"""
+    with job_scope(job_id), sync_outbox.hold([row[0] for row in rows]):
+        try:
+            results = run_sync_job(rows, wp_url, api_key, sync_mode, use_bulk_endpoint, max_workers, chunk_size,
+                                   upload_images, control=jobs.control(job_id),
+                                   on_progress=lambda results: sync_jobs.progress(job_id, results))
+        except Exception as e:
+            logger.error(f"Sync job {job_id} failed: {str(e)}")
+            sync_jobs.finish(job_id, 'failed', {'total': len(rows), 'errors': [{'place': 'SYNC_FAILED', 'error': str(e)}]})
+            jobs.finish(job_id, 'failed')
+            return
+    status = 'cancelled' if results.get('stopped') else 'done'
+    sync_jobs.finish(job_id, status, results)
+    jobs.finish(job_id, status)
+
+def control_sync_job(job_id, action):
+    """Cancel, pause or resume a running sync job; returns the job, or None if it isn't running"""
+    control = jobs.control(job_id)
+    job = sync_jobs.get(job_id)
+    if control is None or job is None or job['status'] not in SYNC_JOB_ACTIVE:
+        return None
+    if action == 'cancel':
+        control.cancel()
+        status = 'cancelling'
+    elif action == 'pause':
+        control.pause()
+        status = 'paused'
+    else:
+        control.resume()
+        status = 'running'
+    if job['status'] != 'cancelling':
+        sync_jobs.set_status(job_id, status)
+        jobs.set_status(job_id, status)
+    logger.info(f"Sync job {job_id}: {action} requested")
+    return sync_jobs.get(job_id)
+
+# ==================== WordPress Sync Outbox ====================
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "8"))  # then the item is dead-lettered
+OUTBOX_BASE_DELAY = float(os.getenv("OUTBOX_BASE_DELAY", "30"))  # seconds before the first retry
+OUTBOX_MAX_DELAY = float(os.getenv("OUTBOX_MAX_DELAY", "3600"))
+OUTBOX_POLL_INTERVAL = float(os.getenv("OUTBOX_POLL_INTERVAL", "10"))
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "20"))  # retries per drain round
+
+def outbox_backoff(attempts, retry_after=None):
+    """Exponential backoff with jitter: half the capped delay, plus up to the other half at random"""
+    delay = min(OUTBOX_MAX_DELAY, OUTBOX_BASE_DELAY * 2 ** max(attempts - 1, 0))
+    delay = delay / 2 + random.uniform(0, delay / 2)
+    return max(delay, retry_after or 0)
+
+def is_retryable(http_status):
+    # Network errors, timeouts, rate limits and server errors; other 4xx won't fix themselves
+    return http_status is None or http_status in (408, 429) or http_status >= 500
+
+class SyncOutbox:
+    """
+    Durable record of syncs that failed: attempt count, last error and when to
+    try next. A background drainer retries due items and dead-letters them after
+    OUTBOX_MAX_ATTEMPTS. API keys are only held in memory - items for a site wait
+    until a sync request for that site has supplied its key.
+    """
+    def __init__(self):
+        self._credentials = {}
+        self._held = Counter()  # place_ids that a sync job is working on
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+
+    def remember(self, wp_url, api_key):
+        with self._lock:
+            self._credentials[wp_url] = api_key
+
+    def credentials(self):
+        with self._lock:
+            return dict(self._credentials)
+
+    @contextmanager
+    def hold(self, place_ids):
+        """Keep the drainer off places a sync job is already syncing"""
+        with self._lock:
+            self._held.update(place_ids)
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._held.subtract(place_ids)
+                self._held += Counter()  # drop zero counts
+
+    def record_failure(self, place_id, wp_url, sync_mode, upload_images, error, http_status=None, retry_after=None,
+                       job_id=None):
+        """Add or update the item for a failed sync; returns its new status"""
+        now = datetime.now()
+        with get_db() as conn:
+            c = conn.cursor()
+            c.execute("SELECT attempts FROM sync_outbox WHERE place_id = ?", (place_id,))
+            row = c.fetchone()
+            attempts = (row[0] if row else 0) + 1
+            dead = attempts >= OUTBOX_MAX_ATTEMPTS or not is_retryable(http_status)
+            status = 'dead' if dead else 'pending'
+            next_attempt = None if dead else \
+                datetime.fromtimestamp(now.timestamp() + outbox_backoff(attempts, retry_after)).isoformat()
+            c.execute('''
+                INSERT INTO sync_outbox (place_id, wp_url, sync_mode, upload_images, status, attempts, last_error,
+                                         last_http_status, next_attempt_at, job_id, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (place_id) DO UPDATE SET
+                    wp_url = excluded.wp_url, sync_mode = excluded.sync_mode, upload_images = excluded.upload_images,
+                    status = excluded.status, attempts = excluded.attempts, last_error = excluded.last_error,
+                    last_http_status = excluded.last_http_status, next_attempt_at = excluded.next_attempt_at,
+                    job_id = excluded.job_id, updated_at = excluded.updated_at
+            ''', (place_id, wp_url, sync_mode, int(bool(upload_images)), status, attempts, str(error)[:1000],
+                  http_status, next_attempt, job_id, now.isoformat(), now.isoformat()))
+            conn.commit()
+        if dead:
+            logger.warning(f"Sync of {place_id} dead-lettered after {attempts} attempts: {error}")
+        return status
+
+    def enqueue(self, place_ids, wp_url, sync_mode, upload_images=False, reason=None):
+        """Queue places for the drainer to sync now, as fresh items with zero attempts"""
+        now = datetime.now().isoformat()
+        with get_db() as conn:
+            c = conn.cursor()
+            c.executemany('''
+                INSERT INTO sync_outbox (place_id, wp_url, sync_mode, upload_images, status, attempts, last_error,
+                                         next_attempt_at, created_at, updated_at)
+                VALUES (?, ?, ?, ?, 'pending', 0, ?, ?, ?, ?)
+                ON CONFLICT (place_id) DO UPDATE SET
+                    wp_url = excluded.wp_url, sync_mode = excluded.sync_mode, upload_images = excluded.upload_images,
+                    status = 'pending', attempts = 0, last_error = excluded.last_error, last_http_status = NULL,
+                    next_attempt_at = excluded.next_attempt_at, job_id = NULL, updated_at = excluded.updated_at
+            ''', [(place_id, wp_url, sync_mode, int(bool(upload_images)), reason, now, now, now)
+                  for place_id in place_ids])
+            conn.commit()
+        self._wake.set()
+        return len(place_ids)
+
+    def resolve(self, place_id):
+        with get_db() as conn:
+            c = conn.cursor()
+            c.execute("DELETE FROM sync_outbox WHERE place_id = ?", (place_id,))
+            conn.commit()
+
+    def requeue(self, place_ids=None):
+        """Make items due now - dead ones start again from zero attempts"""
+        where, params = ("WHERE place_id IN ({})".format(','.join('?' * len(place_ids))), list(place_ids)) \
+            if place_ids else ("", [])
+        with get_db() as conn:
+            c = conn.cursor()
+            c.execute(f"UPDATE sync_outbox SET attempts = CASE WHEN status = 'dead' THEN 0 ELSE attempts END, "
+                      f"status = 'pending', next_attempt_at = ?, updated_at = ? {where}",
+                      [datetime.now().isoformat()] * 2 + params)
+            conn.commit()
+            count = c.rowcount
+        self._wake.set()
+        return count
+
+    def items(self, status=None, limit=100):
+        where, params = ("WHERE status = ?", [status]) if status else ("", [])
+        with get_db() as conn:
+            c = conn.cursor()
+            c.execute(f'''
+                SELECT o.place_id, p.title, o.wp_url, o.sync_mode, o.status, o.attempts, o.last_error,
+                       o.last_http_status, o.next_attempt_at, o.job_id, o.created_at, o.updated_at
+                FROM sync_outbox o LEFT JOIN places p ON p.place_id = o.place_id
+                {where} ORDER BY o.updated_at DESC LIMIT ?
+            ''', params + [limit])
+            columns = [d[0] for d in c.description]
+            items = [dict(zip(columns, row)) for row in c.fetchall()]
+            c.execute("SELECT status, COUNT(*) FROM sync_outbox GROUP BY status")
+            counts = dict(c.fetchall())
+        return {'items': items, 'counts': {'pending': counts.get('pending', 0), 'dead': counts.get('dead', 0)}}
+
+    def _due(self):
+        with self._lock:
+            held = set(self._held)
+            sites = set(self._credentials)
+        if not sites:
+            return []
+        with get_db() as conn:
+            c = conn.cursor()
+            c.execute(f'''
+                SELECT o.place_id, o.wp_url, o.sync_mode, o.upload_images, p.data, p.wp_post_id, p.wp_sync_payload
+                FROM sync_outbox o JOIN places p ON p.place_id = o.place_id
+                WHERE o.status = 'pending' AND o.next_attempt_at <= ?
+                  AND o.wp_url IN ({','.join('?' * len(sites))})
+                ORDER BY o.next_attempt_at LIMIT ?
+            ''', [datetime.now().isoformat()] + list(sites) + [OUTBOX_BATCH_SIZE])
+            rows = c.fetchall()
+            # Places deleted since they failed have nothing left to sync
+            c.execute("DELETE FROM sync_outbox WHERE place_id NOT IN (SELECT place_id FROM places)")
+            conn.commit()
+        return [row for row in rows if row[0] not in held]
+
+    def drain_once(self):
+        """Retry every due item once; returns how many were attempted"""
+        rows = self._due()
+        listing_indexes = {}
+        for place_id, wp_url, sync_mode, upload_images, data, wp_post_id, last_payload in rows:
+            with self._lock:
+                api_key = self._credentials.get(wp_url)
+            if sync_mode != 'force' and (wp_url, sync_mode) not in listing_indexes:
+                # A create that timed out may still have gone through - match before creating again
+                listing_indexes[(wp_url, sync_mode)] = WordPressListingIndex(wp_url, api_key)
+            result = sync_place_to_wordpress(decode_place(data), wp_url, api_key, sync_mode, socketio,
+                                             listing_indexes.get((wp_url, sync_mode)), wp_post_id,
+                                             unpack_payload(last_payload), bool(upload_images))
+            if result['status'] in ('success', 'skipped'):
+                mark_place_synced(place_id, result['wp_post_id'], result.get('payload_hash'), result.get('payload'))
+                logger.info(f"Outbox retry of {place_id} succeeded")
+            else:
+                self.record_failure(place_id, wp_url, sync_mode, upload_images, result.get('error'),
+                                    result.get('http_status'), result.get('retry_after'))
+        return len(rows)
+
+    def run_forever(self):
+        """Background drainer; requeue() wakes it early"""
+        while True:
+            self._wake.wait(OUTBOX_POLL_INTERVAL)
+            self._wake.clear()
+            try:
+                while self.drain_once() >= OUTBOX_BATCH_SIZE:
+                    pass
+            except Exception as e:
+                logger.error(f"Outbox drain failed: {str(e)}")
+
+sync_outbox = SyncOutbox()
+
+# ==================== WordPress Reconciliation ====================
+RECONCILE_FULL_INTERVAL = float(os.getenv("RECONCILE_FULL_INTERVAL", "7"))  # days between full scans
+RECONCILE_OVERLAP = float(os.getenv("RECONCILE_OVERLAP", "300"))  # seconds re-read before the checkpoint
+RECONCILE_REQUEUE = os.getenv("RECONCILE_REQUEUE", "false").lower() == "true"  # re-sync drifted places
+RECONCILE_INTERVAL = float(os.getenv("RECONCILE_INTERVAL", "0"))  # hours between automatic runs, 0 = off
+DRIFT_KINDS = ('deleted', 'missing', 'divergent')
+DRIFT_IGNORED_FIELDS = ('logo_url', 'featured_image', 'gallery_images')  # WordPress rewrites media URLs
+
+def comparable_value(value):
+    """WordPress echoes numbers as strings and empty fields as null - compare loosely"""
+    if value is None:
+        return ''
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return str(value).strip()
+
+def listing_divergence(listing, last_payload):
+    """Fields last sent to WordPress that the listing now holds differently; fields it doesn't return are skipped"""
+    return sorted(k for k, v in last_payload.items()
+                  if k in listing and k not in DRIFT_IGNORED_FIELDS
+                  and comparable_value(listing[k]) != comparable_value(v))
+
+def listing_post_id(listing):
+    post_id = listing.get('post_id', listing.get('id'))
+    try:
+        return int(post_id)
+    except (TypeError, ValueError):
+        return post_id
+
+def shift_timestamp(value, seconds):
+    try:
+        return (datetime.fromisoformat(value) - timedelta(seconds=seconds)).isoformat()
+    except (TypeError, ValueError):
+        return value
+
+class WordPressReconciler:
+    """
+    Checks that synced places still match WordPress. Each run pages through the
+    listings modified since the site's checkpoint (modified_after) and compares
+    them with the payload last pushed for the same wp_post_id, so only recent
+    edits are fetched. Deletions don't show up in that feed - a full scan of
+    listing IDs finds them, run on the first pass, every RECONCILE_FULL_INTERVAL
+    days, or as soon as WordPress reports fewer listings than are tracked here.
+    Flags land in wp_drift; with requeue the places go through the sync outbox.
+    wp_post_ids are assumed to belong to the site being reconciled.
+    """
+    def __init__(self):
+        self._running = set()
+        self._lock = threading.Lock()
+
+    def state(self, wp_url):
+        site = wordpress_site(wp_url)
+        with get_db() as conn:
+            c = conn.cursor()
+            c.execute("SELECT checkpoint, last_full_at, last_run_at, last_summary FROM wp_reconcile_state WHERE site = ?",
+                      (site,))
+            row = c.fetchone()
+            c.execute("SELECT kind, COUNT(*) FROM wp_drift WHERE site = ? GROUP BY kind", (site,))
+            counts = dict(c.fetchall())
+        return {
+            'site': site,
+            'running': self.is_running(wp_url),
+            'checkpoint': row[0] if row else None,
+            'last_full_at': row[1] if row else None,
+            'last_run_at': row[2] if row else None,
+            'last_summary': json.loads(row[3]) if row and row[3] else None,
+            'drift': {kind: counts.get(kind, 0) for kind in DRIFT_KINDS}
+        }
+
+    def drift(self, wp_url, kind=None, limit=100):
+        where, params = ("AND d.kind = ?", [kind]) if kind else ("", [])
+        with get_db() as conn:
+            c = conn.cursor()
+            c.execute(f'''
+                SELECT d.place_id, p.title, d.kind, d.wp_post_id, d.fields, d.detected_at, d.requeued_at
+                FROM wp_drift d LEFT JOIN places p ON p.place_id = d.place_id
+                WHERE d.site = ? {where} ORDER BY d.detected_at DESC LIMIT ?
+            ''', [wordpress_site(wp_url)] + params + [limit])
+            columns = [d[0] for d in c.description]
+            items = [dict(zip(columns, row)) for row in c.fetchall()]
+        for item in items:
+            item['fields'] = json.loads(item['fields']) if item['fields'] else []
+        return items
+
+    def is_running(self, wp_url):
+        with self._lock:
+            return wordpress_site(wp_url) in self._running
+
+    def _needs_full_scan(self, state, remote_total, tracked):
+        if not state['checkpoint']:
+            return 'first run'
+        if not state['last_full_at'] or \
+                datetime.now() - datetime.fromisoformat(state['last_full_at']) > timedelta(days=RECONCILE_FULL_INTERVAL):
+            return 'interval'
+        # Listings the last full scan found that aren't ours count towards what WordPress should
+        # hold; ones already flagged as deleted don't
+        expected = tracked - state['drift']['deleted'] + ((state['last_summary'] or {}).get('untracked') or 0)
+        if remote_total is not None and remote_total < expected:
+            return f"WordPress has {remote_total} listings, expected at least {expected}"
+        return None
+
+    def _remote_total(self, wp_url, api_key):
+        # With one listing per page the page count is the listing count
+        try:
+            _, total_pages = WordPressListingIndex(wp_url, api_key, per_page=1)._fetch_page(1)
+            return total_pages
+        except Exception as e:
+            logger.warning(f"Could not count WordPress listings: {e}")
+            return None
+
+    def _compare(self, c, listings, tracked):
+        """Divergent and matching place_ids among listings that map to a local place"""
+        by_post_id = {listing_post_id(l): l for l in listings}
+        place_ids = {tracked[post_id]: post_id for post_id in by_post_id if post_id in tracked}
+        divergent, matching = {}, []
+        for start in range(0, len(place_ids), 500):
+            batch = list(place_ids)[start:start + 500]
+            c.execute(f"SELECT place_id, wp_sync_payload FROM places WHERE place_id IN ({','.join('?' * len(batch))})",
+                      batch)
+            for place_id, packed in c.fetchall():
+                last_payload = unpack_payload(packed)
+                fields = listing_divergence(by_post_id[place_ids[place_id]], last_payload) if last_payload else []
+                if fields:
+                    divergent[place_id] = (place_ids[place_id], fields)
+                else:
+                    matching.append(place_id)
+        return divergent, matching
+
+    def run(self, wp_url, api_key, full=False, requeue=RECONCILE_REQUEUE, upload_images=WP_UPLOAD_IMAGES):
+        """One reconciliation pass; returns its summary"""
+        site = wordpress_site(wp_url)
+        with self._lock:
+            if site in self._running:
+                raise RuntimeError(f"Reconciliation of {site} is already running")
+            self._running.add(site)
+        try:
+            return self._run(site, wp_url, api_key, full, requeue, upload_images)
+        finally:
+            with self._lock:
+                self._running.discard(site)
+
+    def _confirm_deleted(self, wp_url, api_key, candidates):
+        """The candidate wp_post_ids WordPress answers 404 for; anything else is not proof of deletion"""
+        headers = {
+            'X-API-Key': api_key,
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+        }
+        listing_url = f"{wp_url.rstrip('/')}/wp-json/listingpro/v1/listing"
+
+        def gone(post_id):
+            try:
+                return requests.get(f"{listing_url}/{post_id}", headers=headers, timeout=30).status_code == 404
+            except requests.exceptions.RequestException as e:
+                logger.warning(f"Could not check WordPress listing {post_id}: {e}")
+                return False
+
+        with ThreadPoolExecutor(max_workers=WP_SYNC_MAX_WORKERS) as executor:
+            return {post_id for post_id, is_gone in zip(candidates, executor.map(gone, candidates)) if is_gone}
+
+    def _run(self, site, wp_url, api_key, full, requeue, upload_images):
+        started = datetime.now()
+        state = self.state(wp_url)
+        with get_db() as conn:
+            c = conn.cursor()
+            c.execute("SELECT wp_post_id, place_id FROM places WHERE wp_post_id IS NOT NULL")
+            tracked = dict(c.fetchall())
+        remote_total = self._remote_total(wp_url, api_key)
+        reason = 'requested' if full else self._needs_full_scan(state, remote_total, len(tracked))
+        params = {} if reason else {'modified_after': shift_timestamp(state['checkpoint'], RECONCILE_OVERLAP),
+                                    'orderby': 'modified', 'order': 'asc'}
+        index = WordPressListingIndex(wp_url, api_key)
+        checkpoint, checkpoint_from_remote = state['checkpoint'], False
+        seen, divergent, matching, fetched = set(), {}, [], 0
+
+        with get_db() as conn:
+            c = conn.cursor()
+            for listings in index.iter_pages(**params):
+                fetched += len(listings)
+                seen.update(listing_post_id(l) for l in listings)
+                page_divergent, page_matching = self._compare(c, listings, tracked)
+                divergent.update(page_divergent)
+                matching.extend(page_matching)
+                modified = [str(l['modified']) for l in listings if l.get('modified')]
+                if modified:
+                    checkpoint_from_remote = True
+                    if not checkpoint or max(modified) > checkpoint:
+                        checkpoint = max(modified)
+                socketio.emit('reconcile_progress', {'site': site, 'fetched': fetched, 'divergent': len(divergent)},
+                              to=current_job_room(), namespace='/')
+            # Servers that don't report 'modified' get this run's start as the checkpoint
+            if not checkpoint or (fetched and not checkpoint_from_remote):
+                checkpoint = started.astimezone(timezone.utc).isoformat()
+
+            # A full scan that fetched fewer listings than WordPress counts proves nothing about
+            # the rest; it flags no deletions and doesn't count as a full scan
+            complete = bool(reason) and (remote_total is None or fetched >= remote_total)
+            if reason and not complete:
+                logger.warning(f"Full scan of {site} fetched {fetched} of {remote_total} listings; "
+                               f"not checking for deletions")
+            candidates = [post_id for post_id in tracked if post_id not in seen] if complete else []
+            confirmed = self._confirm_deleted(wp_url, api_key, candidates) if candidates else set()
+            deleted = {tracked[post_id]: post_id for post_id in confirmed}
+            c.execute("SELECT place_id FROM places WHERE wp_synced = 1 AND wp_post_id IS NULL")
+            missing = [row[0] for row in c.fetchall()]
+
+            now = datetime.now().isoformat()
+            # Listings seen again and matching are no longer divergent; a full scan or the
+            # missing query recomputes the other kinds from scratch
+            c.executemany("DELETE FROM wp_drift WHERE place_id = ? AND kind = 'divergent'", [(p,) for p in matching])
+            c.execute("DELETE FROM wp_drift WHERE site = ? AND kind = 'missing'", (site,))
+            if complete:
+                c.execute("DELETE FROM wp_drift WHERE site = ? AND kind = 'deleted'", (site,))
+            flags = [(place_id, 'deleted', post_id, None) for place_id, post_id in deleted.items()] + \
+                    [(place_id, 'missing', None, None) for place_id in missing] + \
+                    [(place_id, 'divergent', post_id, json.dumps(fields)) for place_id, (post_id, fields) in divergent.items()]
+            c.executemany('''
+                INSERT INTO wp_drift (place_id, site, kind, wp_post_id, fields, detected_at) VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (place_id) DO UPDATE SET site = excluded.site, kind = excluded.kind,
+                    wp_post_id = excluded.wp_post_id, fields = excluded.fields, detected_at = excluded.detected_at,
+                    requeued_at = NULL
+            ''', [(place_id, site, kind, post_id, fields, now) for place_id, kind, post_id, fields in flags])
+            conn.commit()
+
+        requeued = self._requeue(site, wp_url, upload_images) if requeue else 0
+        summary = {
+            'site': site,
+            'scan': ('full' if complete else 'incomplete') if reason else 'incremental',
+            'full_scan_reason': reason,
+            'modified_after': params.get('modified_after'),
+            'remote_total': remote_total,
+            'tracked': len(tracked),
+            'fetched': fetched,
+            'untracked': len(seen - set(tracked)) if complete else (state['last_summary'] or {}).get('untracked'),
+            'deleted': len(deleted),
+            'unconfirmed_deletions': len(candidates) - len(deleted),
+            'missing': len(missing),
+            'divergent': len(divergent),
+            'requeued': requeued,
+            'started_at': started.isoformat(),
+            'seconds': round((datetime.now() - started).total_seconds(), 2)
+        }
+        with get_db() as conn:
+            c = conn.cursor()
+            c.execute('''
+                INSERT INTO wp_reconcile_state (site, checkpoint, last_full_at, last_run_at, last_summary)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (site) DO UPDATE SET checkpoint = excluded.checkpoint,
+                    last_full_at = COALESCE(excluded.last_full_at, last_full_at),
+                    last_run_at = excluded.last_run_at, last_summary = excluded.last_summary
+            ''', (site, checkpoint, started.isoformat() if complete else None, datetime.now().isoformat(),
+                  json.dumps(summary)))
+            conn.commit()
+        logger.info(f"Reconciled {site} ({summary['scan']}): {len(deleted)} deleted, {len(missing)} missing, "
+                    f"{len(divergent)} divergent of {fetched} listings fetched")
+        return summary
+
+    def _requeue(self, site, wp_url, upload_images):
+        """
+        Mark every flagged place not yet requeued as unsynced and queue it: deleted and
+        missing listings are created again, divergent ones get a full update over the remote edits
+        """
+        with get_db() as conn:
+            c = conn.cursor()
+            c.execute("SELECT place_id, kind FROM wp_drift WHERE site = ? AND requeued_at IS NULL", (site,))
+            flagged = c.fetchall()
+            recreate = [place_id for place_id, kind in flagged if kind != 'divergent']
+            overwrite = [place_id for place_id, kind in flagged if kind == 'divergent']
+            c.executemany("UPDATE places SET wp_synced = 0, wp_post_id = NULL, wp_sync_hash = NULL, "
+                          "wp_sync_payload = NULL WHERE place_id = ?", [(p,) for p in recreate])
+            c.executemany("UPDATE places SET wp_synced = 0, wp_sync_hash = NULL, wp_sync_payload = NULL "
+                          "WHERE place_id = ?", [(p,) for p in overwrite])
+            c.executemany("UPDATE wp_drift SET requeued_at = ? WHERE place_id = ?",
+                          [(datetime.now().isoformat(), p) for p in recreate + overwrite])
+            conn.commit()
+        return sync_outbox.enqueue(recreate, wp_url, 'skip', upload_images, 'Reconciliation: listing gone from WordPress') + \
+            sync_outbox.enqueue(overwrite, wp_url, 'update', upload_images, 'Reconciliation: listing edited in WordPress')
+
+    def run_forever(self):
+        """Scheduled reconciliation of every site a sync has supplied a key for"""
+        while True:
+            time.sleep(RECONCILE_INTERVAL * 3600)
+            for wp_url, api_key in sync_outbox.credentials().items():
+                try:
+                    self.run(wp_url, api_key)
+                except Exception as e:
+                    logger.error(f"Scheduled reconciliation of {wp_url} failed: {str(e)}")
+
+wp_reconciler = WordPressReconciler()
+
+def run_reconcile_job(job_id, wp_url, api_key, full, requeue, upload_images):
+    """Background task for one reconciliation run"""
+    with job_scope(job_id):
+        try:
+            wp_reconciler.run(wp_url, api_key, full, requeue, upload_images)
+        except Exception as e:
+            logger.error(f"Reconciliation job {job_id} failed: {str(e)}")
+            jobs.finish(job_id, 'failed')
+            return
+    jobs.finish(job_id)
+
+
+# ==================== WordPress Batch Delete ====================
+DELETE_FILTERS = ('location', 'category', 'synced_from', 'synced_to', 'place_ids', 'post_ids')
+DELETE_MAX_ERRORS = 200  # errors kept in a finished delete job's results
+
+def select_delete_targets(location=None, category=None, synced_from=None, synced_to=None, place_ids=None,
+                          post_ids=None):
+    """
+    (place_id, title, wp_post_id) of synced places matching every given filter.
+    synced_from/synced_to are ISO dates or timestamps, both inclusive. post_ids
+    given on their own may name listings unknown locally - those have no place_id.
+    """
+    conditions, params = ["wp_post_id IS NOT NULL"], []
+    if location:
+        conditions.append("location LIKE ?")
+        params.append(f"%{location}%")
+    if category:
+        conditions.append("category = ?")
+        params.append(category)
+    if synced_from:
+        conditions.append("wp_sync_date >= ?")
+        params.append(synced_from)
+    if synced_to:
+        conditions.append("wp_sync_date <= ?")
+        params.append(synced_to + 'T23:59:59.999999' if len(synced_to) == 10 else synced_to)
+    if place_ids:
+        conditions.append(f"place_id IN ({','.join('?' * len(place_ids))})")
+        params.extend(place_ids)
+    if post_ids:
+        post_ids = [int(post_id) for post_id in post_ids]
+        conditions.append(f"wp_post_id IN ({','.join('?' * len(post_ids))})")
+        params.extend(post_ids)
+    if len(conditions) == 1:
+        raise ValueError(f"At least one filter is required: {', '.join(DELETE_FILTERS)}")
+    with get_db() as conn:
+        c = conn.cursor()
+        c.execute(f"SELECT place_id, title, wp_post_id FROM places WHERE {' AND '.join(conditions)} "
+                  f"ORDER BY wp_post_id", params)
+        targets = c.fetchall()
+    if post_ids and len(conditions) == 2:
+        known = {target[2] for target in targets}
+        targets.extend((None, None, post_id) for post_id in dict.fromkeys(post_ids) if post_id not in known)
+    return targets
+
+def delete_wordpress_listing(post_id, wp_url, api_key):
+    """DELETE one listing; a 404 means it was already gone"""
+    api_endpoint = f"{wp_url.rstrip('/')}/wp-json/listingpro/v1/listing/{post_id}"
+    headers = {
+        'X-API-Key': api_key,
+        'Content-Type': 'application/json',
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+    }
+    try:
+        response = requests.delete(api_endpoint, headers=headers, timeout=30)
+    except requests.exceptions.RequestException as e:
+        api_log.record({'type': 'error', 'message': f"Delete failed for listing {post_id}", 'method': 'DELETE',
+                        'url': api_endpoint, 'error': str(e)})
+        return {'status': 'error', 'error': str(e), 'http_status': None}
+    api_log.record({
+        'type': 'response',
+        'message': f"Delete listing {post_id}",
+        'method': 'DELETE',
+        'url': api_endpoint,
+        'status': response.status_code
+    }, always=response.status_code not in (200, 204))
+    if response.status_code in (200, 204):
+        return {'status': 'deleted', 'http_status': response.status_code}
+    if response.status_code == 404:
+        return {'status': 'not_found', 'http_status': 404}
+    return {'status': 'error', 'error': f"{response.status_code} - {response.text[:200]}",
+            'http_status': response.status_code,
+            'retry_after': parse_retry_after(response.headers.get('Retry-After'))}
+
+def mark_places_unsynced(place_ids):
+    """Forget the WordPress listing of places whose listing was deleted, so they can be synced again"""
+    with get_db() as conn:
+        c = conn.cursor()
+        c.executemany("UPDATE places SET wp_synced = 0, wp_post_id = NULL, wp_sync_date = NULL, wp_sync_hash = NULL, "
+                      "wp_sync_payload = NULL WHERE place_id = ?", [(p,) for p in place_ids])
+        c.executemany("DELETE FROM sync_outbox WHERE place_id = ?", [(p,) for p in place_ids])
+        c.executemany("DELETE FROM wp_drift WHERE place_id = ?", [(p,) for p in place_ids])
+        conn.commit()
+
+def run_batch_delete(targets, wp_url, api_key, max_workers=None, max_rate=None, control=None, on_progress=None):
+    """
+    Delete the listings of (place_id, title, wp_post_id) targets concurrently. The
+    worker count follows AdaptiveConcurrency and max_rate caps deletes per second;
+    429/5xx responses are retried. Each confirmed deletion (or 404) resets the place
+    locally.
+    """
+    results = {
+        'total': len(targets),
+        'deleted': 0,
+        'not_found': 0,
+        'failed': 0,
+        'errors': [],
+        'stopped': False
+    }
+    control = control or JobControl()
+    concurrency = AdaptiveConcurrency(maximum=max_workers or WP_SYNC_MAX_WORKERS)
+    interval = 1.0 / max_rate if max_rate else 0.0
+    next_start = 0.0
+    job_id = current_job_id()
+
+    def delete_one(post_id):
+        started = time.monotonic()
+        return delete_wordpress_listing(post_id, wp_url, api_key), time.monotonic() - started
+
+    pending = [(target, 1) for target in reversed(targets)]  # popped from the end
+    in_flight = {}
+    with ThreadPoolExecutor(max_workers=concurrency.maximum) as executor:
+        while pending or in_flight:
+            if control.cancelled.is_set() and not results['stopped']:
+                logger.info("Batch delete stopped by user request")
+                results['stopped'] = True
+                pending = []
+
+            while pending and len(in_flight) < concurrency.current and not concurrency.pause_remaining() \
+                    and not control.paused and time.monotonic() >= next_start:
+                target, attempt = pending.pop()
+                in_flight[executor.submit(delete_one, target[2])] = (target, attempt)
+                next_start = time.monotonic() + interval
+
+            if not in_flight:
+                if control.paused:
+                    control.wait_while_paused(1.0)
+                elif pending:
+                    time.sleep(min(max(concurrency.pause_remaining(), next_start - time.monotonic(), 0.01), 1.0))
+                continue
+
+            # Wake up for the next rate slot when a worker is free, otherwise for a completion
+            timeout = 1.0
+            if pending and len(in_flight) < concurrency.current:
+                timeout = min(max(next_start - time.monotonic(), 0.01), 1.0)
+            done, _ = wait(in_flight, timeout=timeout, return_when=FIRST_COMPLETED)
+            confirmed = []
+            for future in done:
+                (place_id, title, post_id), attempt = in_flight.pop(future)
+                try:
+                    result, latency = future.result()
+                except Exception as e:
+                    result, latency = {'status': 'error', 'error': str(e)}, 0.0
+                concurrency.record(latency, result.get('http_status'), result.get('retry_after'))
+
+                http_status = result.get('http_status')
+                if result['status'] == 'error' and http_status and (http_status == 429 or http_status >= 500) \
+                        and attempt < WP_SYNC_MAX_ATTEMPTS:
+                    pending.insert(0, ((place_id, title, post_id), attempt + 1))
+                    continue
+
+                if result['status'] in ('deleted', 'not_found'):
+                    results[result['status']] += 1
+                    if place_id:
+                        confirmed.append(place_id)
+                else:
+                    results['failed'] += 1
+                    if len(results['errors']) < DELETE_MAX_ERRORS:
+                        results['errors'].append({'place': title, 'wp_post_id': post_id, 'error': result.get('error')})
+            if confirmed:
+                mark_places_unsynced(confirmed)
+            if done:
+                socketio.emit('delete_progress', {
+                    'completed': results['deleted'] + results['not_found'] + results['failed'],
+                    'total': results['total'],
+                    'concurrency': concurrency.current,
+                    'job_id': job_id
+                }, to=current_job_room(), namespace='/')
+                if on_progress:
+                    on_progress(results)
+
+    results['final_concurrency'] = concurrency.current
+    logger.info(f"Batch delete completed: {results['deleted']} deleted, {results['not_found']} already gone, "
+                f"{results['failed']} failed")
+    return results
+
+def run_batch_delete_job(job_id, targets, wp_url, api_key, max_workers, max_rate):
+    """Background task for one batch delete; progress and results are kept on the job"""
+    counters = ('total', 'deleted', 'not_found', 'failed')
+    with job_scope(job_id):
+        try:
+            results = run_batch_delete(targets, wp_url, api_key, max_workers, max_rate, control=jobs.control(job_id),
+                                       on_progress=lambda r: jobs.update(job_id, progress={k: r[k] for k in counters}))
+        except Exception as e:
+            logger.error(f"Delete job {job_id} failed: {str(e)}")
+            jobs.update(job_id, results={'total': len(targets), 'errors': [{'error': str(e)}]})
+            jobs.finish(job_id, 'failed')
+            return
+    jobs.update(job_id, progress={k: results[k] for k in counters}, results=results)
+    jobs.finish(job_id, 'cancelled' if results['stopped'] else 'done')
 
 # ==================== WordPress Sync API ====================
+@app.route('/api/wordpress/sync-jobs', methods=['GET'])
+def api_wordpress_sync_jobs():
+    try:
+        limit = min(max(int(request.args.get('limit', 50)), 1), 500)
+        return jsonify({'jobs': sync_jobs.list(limit, request.args.get('status'))})
+    except Exception as e:
+        logger.error(f"Error in /api/wordpress/sync-jobs: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/wordpress/sync-jobs/<job_id>', methods=['GET'])
+def api_wordpress_sync_job(job_id):
+    try:
+        job = sync_jobs.get(job_id)
+        if not job:
+            return jsonify({"error": "Sync job not found"}), 404
+        return jsonify(job)
+    except Exception as e:
+        logger.error(f"Error in /api/wordpress/sync-jobs/{job_id}: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/wordpress/sync-jobs/<job_id>/<action>', methods=['POST'])
+def api_wordpress_sync_job_control(job_id, action):
+    try:
+        if action not in ('cancel', 'pause', 'resume'):
+            return jsonify({"error": "action must be cancel, pause or resume"}), 400
+        job = control_sync_job(job_id, action)
+        if job is None:
+            return jsonify({"error": "Sync job is not running"}), 409
+        return jsonify(job)
+    except Exception as e:
+        logger.error(f"Error in /api/wordpress/sync-jobs/{job_id}/{action}: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/wordpress/outbox', methods=['GET'])
+def api_wordpress_outbox():
+    try:
+        status = request.args.get('status')  # pending | dead
+        limit = min(max(int(request.args.get('limit', 100)), 1), 1000)
+        return jsonify(sync_outbox.items(status, limit))
+    except Exception as e:
+        logger.error(f"Error in /api/wordpress/outbox: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/wordpress/outbox/retry', methods=['POST'])
+def api_wordpress_outbox_retry():
+    """Retry outbox items now (all, or the given place_ids); supplies the API key the drainer needs"""
+    try:
+        data = request.get_json(silent=True) or {}
+        if data.get('wp_url') and data.get('api_key'):
+            sync_outbox.remember(data['wp_url'], data['api_key'])
+        requeued = sync_outbox.requeue(data.get('place_ids'))
+        return jsonify({'requeued': requeued})
+    except Exception as e:
+        logger.error(f"Error in /api/wordpress/outbox/retry: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/wordpress/reconcile', methods=['GET'])
+def api_wordpress_reconcile_status():
+    """Checkpoint, last run summary and flagged places for one site"""
+    try:
+        wp_url = request.args.get('wp_url')
+        if not wp_url:
+            return jsonify({"error": "wp_url is required"}), 400
+        kind = request.args.get('kind')  # deleted | missing | divergent
+        limit = min(max(int(request.args.get('limit', 100)), 1), 1000)
+        return jsonify(dict(wp_reconciler.state(wp_url), items=wp_reconciler.drift(wp_url, kind, limit)))
+    except Exception as e:
+        logger.error(f"Error in /api/wordpress/reconcile: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/wordpress/reconcile', methods=['POST'])
+def api_wordpress_reconcile():
+    """Start a reconciliation run in the background; full forces a scan of every listing"""
+    try:
+        data = request.get_json(silent=True) or {}
+        wp_url = data.get('wp_url')
+        api_key = data.get('api_key')
+        if not wp_url or not api_key:
+            return jsonify({"error": "wp_url and api_key are required"}), 400
+        if wp_reconciler.is_running(wp_url):
+            return jsonify({"error": "Reconciliation is already running for this site"}), 409
+        requeue = bool(data.get('requeue', RECONCILE_REQUEUE))
+        upload_images = bool(data.get('upload_images', WP_UPLOAD_IMAGES))
+        sync_outbox.remember(wp_url, api_key)
+        job_id = jobs.start('reconcile', wordpress_site(wp_url), owner_sid=data.get('socket_id'))
+        socketio.start_background_task(run_reconcile_job, job_id, wp_url, api_key, bool(data.get('full')), requeue,
+                                       upload_images)
+        return jsonify({'job_id': job_id, 'status': 'running'}), 202
+    except Exception as e:
+        logger.error(f"Error in /api/wordpress/reconcile: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/wordpress/delete', methods=['POST'])
+def api_wordpress_delete():
+    """
+    Delete the WordPress listings of places matching the filters (location, category,
+    synced_from, synced_to, place_ids, post_ids). dry_run defaults to true and only
+    lists the targets; with dry_run false the deletes run as a background job.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        wp_url = data.get('wp_url')
+        api_key = data.get('api_key')
+        dry_run = data.get('dry_run', True) not in (False, 'false', 0)
+        filters = {name: data.get(name) for name in DELETE_FILTERS if data.get(name)}
+        if not filters:
+            return jsonify({"error": f"At least one filter is required: {', '.join(DELETE_FILTERS)}"}), 400
+        if not dry_run and (not wp_url or not api_key):
+            return jsonify({"error": "wp_url and api_key are required"}), 400
+        try:
+            max_workers = int(data['max_workers']) if data.get('max_workers') else None
+            max_rate = float(data['max_rate']) if data.get('max_rate') else None  # deletes per second
+        except (TypeError, ValueError):
+            return jsonify({"error": "max_workers must be an integer and max_rate a number"}), 400
+        try:
+            targets = select_delete_targets(**filters)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        if dry_run:
+            return jsonify({
+                'dry_run': True,
+                'total': len(targets),
+                'targets': [{'place_id': p, 'title': t, 'wp_post_id': w} for p, t, w in targets[:500]]
+            })
+        if not targets:
+            return jsonify({'dry_run': False, 'total': 0, 'deleted': 0, 'not_found': 0, 'failed': 0, 'errors': []})
+
+        label = ', '.join(f"{k}={v if not isinstance(v, list) else len(v)}" for k, v in filters.items())
+        job_id = jobs.start('delete', label, owner_sid=data.get('socket_id'))
+        jobs.update(job_id, progress={'total': len(targets), 'deleted': 0, 'not_found': 0, 'failed': 0})
+        socketio.start_background_task(run_batch_delete_job, job_id, targets, wp_url, api_key, max_workers, max_rate)
+        return jsonify({'job_id': job_id, 'status': 'running', 'total': len(targets)}), 202
+    except Exception as e:
+        logger.error(f"Error in /api/wordpress/delete: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/wordpress/delete-jobs/<job_id>', methods=['GET'])
+def api_wordpress_delete_job(job_id):
+    job = jobs.get(job_id)
+    if not job or job['kind'] != 'delete':
+        return jsonify({"error": "Delete job not found"}), 404
+    return jsonify(job)
+
+@app.route('/api/wordpress/delete-jobs/<job_id>/cancel', methods=['POST'])
+def api_wordpress_delete_job_cancel(job_id):
+    control = jobs.control(job_id)
+    job = jobs.get(job_id)
+    if control is None or not job or job['kind'] != 'delete':
+        return jsonify({"error": "Delete job is not running"}), 409
+    control.cancel()
+    jobs.set_status(job_id, 'cancelling')
+    return jsonify(jobs.get(job_id))
+
 @app.route('/api/wordpress/sync-stop', methods=['POST'])
 def api_wordpress_sync_stop():
-    """Stop the current sync operation"""
-    global sync_stop_flag
-    sync_stop_flag = True
-    logger.info("Sync stop requested by user")
-    return jsonify({"status": "stop_requested", "message": "Sync will stop after current item"})
+    """Stop one sync job - other operators' syncs keep running"""
+    data = request.get_json(silent=True) or {}
+    job_id = data.get('job_id')
+    if not job_id:
+        return jsonify({"error": "job_id is required"}), 400
+    job = control_sync_job(job_id, 'cancel')
+    if job is None:
+        return jsonify({"error": "Sync job is not running"}), 409
+    return jsonify({"status": "stop_requested", "job_id": job_id, "message": "Sync will stop after current item"})
 
 @app.route('/api/wordpress/sync-status', methods=['GET'])
 def api_wordpress_sync_status():
@@ -1766,11 +4325,18 @@ def api_wordpress_sync_status():
             total = c.fetchone()[0]
             c.execute("SELECT COUNT(*) FROM places WHERE wp_synced = 1")
             synced = c.fetchone()[0]
+            c.execute("SELECT status, COUNT(*) FROM sync_outbox GROUP BY status")
+            outbox = dict(c.fetchall())
+            c.execute("SELECT COUNT(*) FROM wp_drift WHERE requeued_at IS NULL")
+            drifted = c.fetchone()[0]
         
         return jsonify({
             'total': total,
             'synced': synced,
-            'unsynced': total - synced
+            'unsynced': total - synced,
+            'retry_pending': outbox.get('pending', 0),
+            'dead_lettered': outbox.get('dead', 0),
+            'drifted': drifted
         })
     except Exception as e:
         logger.error(f"Error in /api/wordpress/sync-status: {str(e)}")
@@ -1790,24 +4356,35 @@ def api_wordpress_sync_single():
         
         with get_db() as conn:
             c = conn.cursor()
-            c.execute("SELECT data FROM places WHERE place_id = ?", (place_id,))
-            row = c.fetchone()[0]
+            c.execute("SELECT data, wp_post_id, wp_sync_hash, wp_sync_payload FROM places WHERE place_id = ?", (place_id,))
+            row = c.fetchone()
             if not row:
                 return jsonify({"error": "Place not found"}), 404
             
-            place = json.loads(row[0])
-        
-        # Sync to WordPress
-        result = sync_place_to_wordpress(place, wp_url, api_key, sync_mode, socketio)
+            place = decode_place(row[0])
         
-        if result['status'] == 'success' or result['status'] == 'skipped':
-            # Update sync status in database
+        upload_images = bool(data.get('upload_images', WP_UPLOAD_IMAGES))
+        if sync_mode != 'force' and row[1] and row[2] and place_payload_hash(place, upload_images) == row[2]:
             with get_db() as conn:
                 c = conn.cursor()
-                sync_date = datetime.now().isoformat()
-                c.execute("UPDATE places SET wp_synced = 1, wp_post_id = ?, wp_sync_date = ? WHERE place_id = ?",
-                         (result['wp_post_id'], sync_date, place_id))
+                c.execute("UPDATE places SET wp_synced = 1 WHERE place_id = ? AND wp_synced != 1", (place_id,))
+                c.execute("DELETE FROM sync_outbox WHERE place_id = ?", (place_id,))
                 conn.commit()
+            return jsonify({'status': 'unchanged', 'wp_post_id': row[1], 'action': 'unchanged'})
+        
+        # Sync to WordPress
+        sync_outbox.remember(wp_url, api_key)
+        result = sync_place_to_wordpress(place, wp_url, api_key, sync_mode, socketio,
+                                         last_post_id=row[1], last_payload=unpack_payload(row[3]),
+                                         upload_images=upload_images)
+        wp_data = result.pop('payload', None)
+        
+        if result['status'] == 'success' or result['status'] == 'skipped':
+            # Update sync status in database - a skipped listing's remote content is unknown, so no hash
+            mark_place_synced(place_id, result['wp_post_id'], result.get('payload_hash'), wp_data)
+        else:
+            result['outbox'] = sync_outbox.record_failure(place_id, wp_url, sync_mode, upload_images, result.get('error'),
+                                                          result.get('http_status'), result.get('retry_after'))
         
         return jsonify(result)
     except Exception as e:
@@ -1824,6 +4401,12 @@ def api_wordpress_sync_bulk():
         place_ids = data.get('place_ids')  # Array of specific place IDs
         sync_mode = data.get('sync_mode', 'skip')
         use_bulk_endpoint = data.get('use_bulk_endpoint', False)  # Option to use bulk API
+        try:
+            max_workers = int(data['max_workers']) if data.get('max_workers') else None  # Ceiling for concurrent WordPress calls
+            chunk_size = int(data['chunk_size']) if data.get('chunk_size') else None  # Listings per bulk request
+        except (TypeError, ValueError):
+            return jsonify({"error": "max_workers and chunk_size must be integers"}), 400
+        upload_images = bool(data.get('upload_images', WP_UPLOAD_IMAGES))  # Copy images into the media library
         
         if not wp_url or not api_key:
             return jsonify({"error": "wp_url and api_key are required"}), 400
@@ -1835,13 +4418,13 @@ def api_wordpress_sync_bulk():
             if place_ids:
                 # Sync specific places by ID
                 placeholders = ','.join('?' * len(place_ids))
-                c.execute(f"SELECT place_id, data FROM places WHERE place_id IN ({placeholders})", place_ids)
+                c.execute(f"SELECT place_id, data, wp_post_id, wp_sync_hash, wp_sync_payload FROM places WHERE place_id IN ({placeholders})", place_ids)
             elif location:
                 # Sync by location (unsynced only)
-                c.execute("SELECT place_id, data FROM places WHERE wp_synced = 0 AND location LIKE ?", (f"%{location}%",))
+                c.execute("SELECT place_id, data, wp_post_id, wp_sync_hash, wp_sync_payload FROM places WHERE wp_synced = 0 AND location LIKE ?", (f"%{location}%",))
             else:
                 # Sync all unsynced
-                c.execute("SELECT place_id, data FROM places WHERE wp_synced = 0")
+                c.execute("SELECT place_id, data, wp_post_id, wp_sync_hash, wp_sync_payload FROM places WHERE wp_synced = 0")
             
             rows = c.fetchall()
         
@@ -1850,107 +4433,40 @@ def api_wordpress_sync_bulk():
                 'total': 0,
                 'synced': 0,
                 'skipped': 0,
+                'unchanged': 0,
                 'failed': 0,
                 'errors': []
             })
         
-        # If use_bulk_endpoint is True and sync_mode is not 'update', try bulk endpoint
-        # Note: Bulk endpoint typically only supports creating new listings
-        if use_bulk_endpoint and sync_mode != 'update':
-            places = [json.loads(row[1]) for row in rows]
-            bulk_result = sync_bulk_to_wordpress(places, wp_url, api_key, sync_mode, socketio)
-            
-            if bulk_result['status'] == 'success':
-                # Update all places as synced
-                with get_db() as conn:
-                    c = conn.cursor()
-                    sync_date = datetime.now().isoformat()
-                    for row in rows:
-                        place_id = row[0]
-                        c.execute("UPDATE places SET wp_synced = 1, wp_sync_date = ? WHERE place_id = ?",
-                                 (sync_date, place_id))
-                    conn.commit()
-                
-                return jsonify({
-                    'total': len(rows),
-                    'synced': len(rows),
-                    'skipped': 0,
-                    'failed': 0,
-                    'errors': [],
-                    'method': 'bulk_endpoint'
-                })
-            else:
-                # Fall back to individual sync if bulk fails
-                logger.warning(f"Bulk endpoint failed, falling back to individual sync: {bulk_result.get('error')}")
-        
-        # Individual sync (one by one) - original method
-        global sync_stop_flag
-        sync_stop_flag = False  # Reset stop flag at start
-        
-        results = {
-            'total': len(rows),
-            'synced': 0,
-            'skipped': 0,
-            'failed': 0,
-            'errors': [],
-            'method': 'individual',
-            'stopped': False
-        }
-        
-        for row in rows:
-            # Check if stop was requested
-            if sync_stop_flag:
-                logger.info("Sync stopped by user request")
-                results['stopped'] = True
-                results['errors'].append({
-                    'place': 'SYNC_STOPPED',
-                    'error': 'Sync was stopped by user'
-                })
-                break
-            
-            place_id = row[0]
-            place = json.loads(row[1])
-            
-            # Sync to WordPress
-            result = sync_place_to_wordpress(place, wp_url, api_key, sync_mode, socketio)
-            
-            if result['status'] == 'success':
-                # Update database
-                with get_db() as conn:
-                    c = conn.cursor()
-                    sync_date = datetime.now().isoformat()
-                    c.execute("UPDATE places SET wp_synced = 1, wp_post_id = ?, wp_sync_date = ? WHERE place_id = ?",
-                             (result['wp_post_id'], sync_date, place_id))
-                    conn.commit()
-                
-                if result.get('action') == 'created':
-                    results['synced'] += 1
-                elif result.get('action') == 'updated':
-                    results['synced'] += 1
-            elif result['status'] == 'skipped':
-                results['skipped'] += 1
-            else:
-                results['failed'] += 1
-                results['errors'].append({
-                    'place': place.get('Title'),
-                    'error': result.get('error')
-                })
-            
-            time.sleep(0.5)  # Rate limiting
-            
-            # Emit progress via WebSocket
-            if socketio:
-                socketio.emit('sync_progress', {
-                    'completed': results['synced'] + results['skipped'] + results['failed'],
-                    'total': results['total'],
-                    'place': place.get('Title')
-                }, namespace='/')
-        
-        logger.info(f"Bulk sync completed: {results['synced']} synced, {results['skipped']} skipped, {results['failed']} failed")
-        return jsonify(results)
+        # The sync runs as a background job - poll /api/wordpress/sync-jobs/<job_id> or watch its room
+        sync_outbox.remember(wp_url, api_key)
+        label = location or (f"{len(place_ids)} selected places" if place_ids else "all unsynced")
+        job_id = jobs.start('sync', label, owner_sid=data.get('socket_id'))
+        sync_jobs.create(job_id, label, {
+            'wp_url': wp_url,
+            'sync_mode': sync_mode,
+            'location': location,
+            'place_ids': len(place_ids) if place_ids else None,
+            'use_bulk_endpoint': use_bulk_endpoint,
+            'max_workers': max_workers,
+            'chunk_size': chunk_size,
+            'upload_images': upload_images
+        }, len(rows))
+        socketio.start_background_task(run_wordpress_sync_job, job_id, rows, wp_url, api_key, sync_mode,
+                                       use_bulk_endpoint, max_workers, chunk_size, upload_images)
+        return jsonify({'job_id': job_id, 'status': 'running', 'total': len(rows)}), 202
     except Exception as e:
         logger.error(f"Error in /api/wordpress/sync-bulk: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
 if __name__ == '__main__':
+    # Server startup only - tools that import this module (delete_test_listings.py,
+    # benchmark_sync.py) must not touch a running server's jobs or files
+    cleanup_temp_files()
+    interrupted_syncs = sync_jobs.mark_interrupted()
+    if interrupted_syncs:
+        logger.warning(f"Marked {interrupted_syncs} unfinished sync jobs as interrupted")
+    socketio.start_background_task(sync_outbox.run_forever)
+    if RECONCILE_INTERVAL > 0:
+        socketio.start_background_task(wp_reconciler.run_forever)
     socketio.run(app, debug=True, use_reloader=False)
\ No newline at end of file
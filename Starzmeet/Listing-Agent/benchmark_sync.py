@@ -0,0 +1,243 @@
+"""
+WordPress Sync Benchmark
+Runs the app's sync code against the local ListingPro stand-in and reports
+throughput, latency and request counts per sync mode
+
+    python benchmark_sync.py --places 500 --latency 80 --jitter 40 --rate-limit-rate 0.02
+    python benchmark_sync.py --modes skip,update,bulk --upload-images --json
+
+The app is loaded from app-latest-4.py inside a temporary directory, so its
+database is a throwaway copy filled with synthetic places. Before every mode
+except 'update' the stand-in's catalogue is reset, so creates really create;
+'update' runs against the listings the previous mode created.
+"""
+import argparse
+import importlib.util
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+import requests
+from werkzeug.serving import make_server
+
+from listingpro_stub import create_app, add_config_arguments, config_from_args
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app-latest-4.py")
+MODES = {
+    # name: (sync_mode, use_bulk_endpoint)
+    'skip': ('skip', False),
+    'update': ('update', False),
+    'force': ('force', False),
+    'bulk': ('skip', True),
+}
+
+
+def load_app(workdir):
+    """Import the app with its database in workdir"""
+    # The benchmark never calls Google or OpenAI, but the app refuses to start without keys
+    os.environ.setdefault('GOOGLE_MAPS_API_KEY', 'benchmark')
+    os.environ.setdefault('OPENAI_API_KEY', 'benchmark')
+    os.chdir(workdir)
+    sys.path.insert(0, os.path.dirname(APP_PATH))
+    spec = importlib.util.spec_from_file_location("listing_agent_app", APP_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def start_stub(config, port=0):
+    server = make_server('127.0.0.1', port, create_app(config), threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+def synthetic_place(i, wp_url, images):
+    place = {
+        'Place ID': f"bench-{i:06d}",
+        'Title': f"Benchmark Autism Center {i}",
+        'Description': '<p>' + 'Benchmark description text. ' * 60 + '</p>',
+        'Phone': f"+1 415 {i:07d}",
+        'Google Address': f"{i} Benchmark Ave, San Francisco, CA",
+        'Website': f"https://example.com/{i}",
+        'Category': 'ABA Therapy',
+        'Features': 'In-home therapy, Speech therapy',
+        'Tags (Keywords)': 'autism, ABA, therapy',
+        'Location': 'United States > California > San Francisco',
+        'Status': 'OPERATIONAL',
+    }
+    if images:
+        # A shared logo and a few shared gallery images, as real listings from one chain have
+        place['Logo Image'] = f"{wp_url}/__stub/image/logo-{i % 20}.jpg"
+        place['Gallery'] = ','.join(f"{wp_url}/__stub/image/photo-{(i + k) % 50}.jpg" for k in range(images))
+    return place
+
+
+class RequestTimer:
+    """Client-side latency of every HTTP call the sync makes, grouped by endpoint"""
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self._lock = threading.Lock()
+        self._original = None
+
+    @staticmethod
+    def endpoint(method, url):
+        path = urlsplit(url).path
+        if '/listingpro/v1/listing/' in path:
+            path = path.rsplit('/', 1)[0] + '/{id}'
+        elif path.startswith('/__stub/image/'):
+            path = '/__stub/image/{name}'
+        return f"{method.upper()} {path}"
+
+    def install(self):
+        original = self._original = requests.Session.request
+        timer = self
+
+        def timed_request(session, method, url, *args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return original(session, method, url, *args, **kwargs)
+            finally:
+                with timer._lock:
+                    timer.latencies[timer.endpoint(method, url)].append(time.perf_counter() - started)
+
+        requests.Session.request = timed_request
+
+    def uninstall(self):
+        if self._original:
+            requests.Session.request = self._original
+
+    def take(self):
+        with self._lock:
+            latencies, self.latencies = self.latencies, defaultdict(list)
+        return latencies
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))]
+
+
+def reset_local_sync_state(app, keep_post_ids):
+    with app.get_db() as conn:
+        c = conn.cursor()
+        c.execute("UPDATE places SET wp_synced = 0, wp_sync_hash = NULL, wp_sync_payload = NULL" +
+                  ("" if keep_post_ids else ", wp_post_id = NULL"))
+        c.execute("DELETE FROM sync_outbox")
+        c.execute("DELETE FROM media_cache")
+        c.execute("DELETE FROM media_sources")
+        conn.commit()
+
+
+def run_mode(app, name, wp_url, api_key, catalogue, max_workers, chunk_size, upload_images, timer):
+    sync_mode, use_bulk_endpoint = MODES[name]
+    if name != 'update':
+        requests.post(f"{wp_url}/__stub/reset", json={'catalogue': catalogue})
+    reset_local_sync_state(app, keep_post_ids=(name == 'update'))
+    with app.get_db() as conn:
+        rows = conn.execute("SELECT place_id, data, wp_post_id, wp_sync_hash, wp_sync_payload FROM places").fetchall()
+
+    stats_before = requests.get(f"{wp_url}/__stub/stats").json()['requests']
+    timer.take()
+    started = time.perf_counter()
+    results = app.run_sync_job(rows, wp_url, api_key, sync_mode, use_bulk_endpoint, max_workers, chunk_size,
+                               upload_images)
+    elapsed = time.perf_counter() - started
+    latencies = timer.take()
+    stats_after = requests.get(f"{wp_url}/__stub/stats").json()['requests']
+
+    all_latencies = [v for values in latencies.values() for v in values]
+    server_requests = {k: v - stats_before.get(k, 0) for k, v in stats_after.items() if v - stats_before.get(k, 0)}
+    return {
+        'mode': name,
+        'listings': len(rows),
+        'seconds': round(elapsed, 2),
+        'listings_per_sec': round(len(rows) / elapsed, 1) if elapsed else None,
+        'synced': results['synced'],
+        'skipped': results['skipped'],
+        'failed': results['failed'],
+        'method': results['method'],
+        'final_concurrency': results.get('final_concurrency'),
+        'p50_ms': round(percentile(all_latencies, 50) * 1000, 1) if all_latencies else None,
+        'p99_ms': round(percentile(all_latencies, 99) * 1000, 1) if all_latencies else None,
+        'client_requests': {endpoint: {
+            'count': len(values),
+            'p50_ms': round(percentile(values, 50) * 1000, 1),
+            'p99_ms': round(percentile(values, 99) * 1000, 1)
+        } for endpoint, values in sorted(latencies.items())},
+        'server_requests': server_requests
+    }
+
+
+def print_report(reports):
+    print()
+    print("=" * 96)
+    print(f"{'mode':8} {'listings':>8} {'seconds':>8} {'list/s':>8} {'p50 ms':>8} {'p99 ms':>8} "
+          f"{'synced':>7} {'skipped':>7} {'failed':>7} {'workers':>7}")
+    print("-" * 96)
+    for r in reports:
+        print(f"{r['mode']:8} {r['listings']:>8} {r['seconds']:>8} {r['listings_per_sec']:>8} "
+              f"{r['p50_ms'] if r['p50_ms'] is not None else '-':>8} {r['p99_ms'] if r['p99_ms'] is not None else '-':>8} "
+              f"{r['synced']:>7} {r['skipped']:>7} {r['failed']:>7} {r['final_concurrency'] or '-':>7}")
+    print("=" * 96)
+    for r in reports:
+        print(f"\n[{r['mode']}] requests ({r['method']})")
+        for endpoint, s in r['client_requests'].items():
+            print(f"  {endpoint:50} {s['count']:>6}  p50 {s['p50_ms']:>7} ms  p99 {s['p99_ms']:>7} ms")
+        rejected = {k: v for k, v in r['server_requests'].items() if k.startswith('status_') or k == 'gzip_bodies'}
+        if rejected:
+            print(f"  server: {', '.join(f'{k}={v}' for k, v in sorted(rejected.items()))}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark WordPress sync against the local ListingPro stand-in")
+    parser.add_argument('--places', type=int, default=200, help="Synthetic places to sync")
+    parser.add_argument('--modes', default='skip,update,force,bulk', help=f"Comma-separated: {', '.join(MODES)}")
+    parser.add_argument('--max-workers', type=int, help="Ceiling for concurrent WordPress calls")
+    parser.add_argument('--chunk-size', type=int, help="Listings per bulk request")
+    parser.add_argument('--upload-images', action='store_true', help="Upload images through the media cache")
+    parser.add_argument('--images', type=int, default=5, help="Gallery images per place with --upload-images")
+    parser.add_argument('--json', action='store_true', help="Print the report as JSON")
+    parser.add_argument('--wp-url', help="Use an already running stand-in instead of starting one")
+    add_config_arguments(parser)
+    args = parser.parse_args()
+
+    modes = [m.strip() for m in args.modes.split(',') if m.strip()]
+    unknown = [m for m in modes if m not in MODES]
+    if unknown:
+        parser.error(f"unknown mode(s): {', '.join(unknown)}")
+
+    server = None
+    if args.wp_url:
+        wp_url = args.wp_url.rstrip('/')
+    else:
+        server, wp_url = start_stub(config_from_args(args))
+    api_key = args.api_key or 'benchmark-key'
+
+    workdir = tempfile.mkdtemp(prefix='sync-benchmark-')
+    app = load_app(workdir)
+    for i in range(args.places):
+        app.scraper.save_place(synthetic_place(i, wp_url, args.images if args.upload_images else 0),
+                               'United States > California > San Francisco')
+
+    timer = RequestTimer()
+    timer.install()
+    try:
+        reports = [run_mode(app, name, wp_url, api_key, args.catalogue, args.max_workers, args.chunk_size,
+                            args.upload_images, timer) for name in modes]
+    finally:
+        timer.uninstall()
+        if server:
+            server.shutdown()
+
+    if args.json:
+        print(json.dumps(reports, indent=2))
+    else:
+        print_report(reports)
+        print(f"\nDatabase: {os.path.join(workdir, app.DB_PATH)}")
@@ -1,57 +1,87 @@
-import requests
-import json
-
-wp_url = "https://starzmeet.com"
-api_key = "62e30d2c14b4e891ec0745e5c34788fd992ff8c12f191cd7a2cb98d4483fde59"
-
-# Test listing IDs to delete
-test_listing_ids = [32049, 32050, 32051]
-
-headers = {
-    'X-API-Key': api_key,
-    'Content-Type': 'application/json',
-    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-}
-
-print("=" * 60)
-print("Deleting Test Listings")
-print("=" * 60)
-print()
-
-deleted = []
-failed = []
-
-for listing_id in test_listing_ids:
-    print(f"Deleting listing ID: {listing_id}...")
-    try:
-        # Try DELETE endpoint
-        response = requests.delete(
-            f"{wp_url}/wp-json/listingpro/v1/listing/{listing_id}",
-            headers=headers,
-            timeout=10
-        )
-        
-        if response.status_code in [200, 204]:
-            print(f"  [SUCCESS] Deleted listing {listing_id}")
-            deleted.append(listing_id)
-        elif response.status_code == 404:
-            print(f"  [INFO] Listing {listing_id} not found (may already be deleted)")
-        else:
-            print(f"  [FAIL] Status {response.status_code}")
-            print(f"  Response: {response.text[:200]}")
-            failed.append(listing_id)
-    except Exception as e:
-        print(f"  [ERROR] {e}")
-        failed.append(listing_id)
-    print()
+"""
+Batch Delete WordPress Listings
+Deletes the WordPress listings of places selected from the local database,
+concurrently and with rate control. Each deleted place is marked unsynced
+(wp_synced = 0, wp_post_id cleared) so it can be synced again later.
+
+    python delete_test_listings.py --location "Dubai" --dry-run
+    python delete_test_listings.py --synced-from 2024-05-01 --synced-to 2024-05-02 --max-rate 5
+    python delete_test_listings.py --post-ids 32049 32050 32051 --yes
+
+WordPress URL and API key come from --wp-url/--api-key or WP_URL/WP_API_KEY in
+the environment or .env. The same deletes are available from the running app at
+POST /api/wordpress/delete.
+"""
+import argparse
+import importlib.util
+import os
+import sys
+
+from dotenv import load_dotenv
+
+sys.dont_write_bytecode = True  # Prevent .pyc files
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app-latest-4.py")
+
+
+def load_app():
+    spec = importlib.util.spec_from_file_location("app", APP_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
 
-print("=" * 60)
-print("Summary")
-print("=" * 60)
-print(f"Deleted: {len(deleted)} listings")
-if deleted:
-    print(f"  IDs: {', '.join(map(str, deleted))}")
-if failed:
-    print(f"Failed: {len(failed)} listings")
-    print(f"  IDs: {', '.join(map(str, failed))}")
 
+if __name__ == "__main__":
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Delete WordPress listings selected from the local database")
+    parser.add_argument('--wp-url', default=os.getenv('WP_URL'), help="WordPress site URL (default: WP_URL)")
+    parser.add_argument('--api-key', default=os.getenv('WP_API_KEY'), help="ListingPro API key (default: WP_API_KEY)")
+    parser.add_argument('--location', help="Places whose location contains this text")
+    parser.add_argument('--category', help="Places in this category")
+    parser.add_argument('--synced-from', help="Synced on or after this ISO date/time")
+    parser.add_argument('--synced-to', help="Synced on or before this ISO date/time")
+    parser.add_argument('--place-ids', nargs='+', help="Google Place IDs")
+    parser.add_argument('--post-ids', nargs='+', type=int, help="WordPress listing IDs (may be unknown locally)")
+    parser.add_argument('--max-workers', type=int, help="Ceiling for concurrent deletes")
+    parser.add_argument('--max-rate', type=float, help="Deletes per second")
+    parser.add_argument('--dry-run', action='store_true', help="Only list what would be deleted")
+    parser.add_argument('--yes', action='store_true', help="Don't ask for confirmation")
+    args = parser.parse_args()
+
+    filters = {name: getattr(args, name) for name in
+               ('location', 'category', 'synced_from', 'synced_to', 'place_ids', 'post_ids') if getattr(args, name)}
+    if not filters:
+        parser.error("give at least one of --location, --category, --synced-from, --synced-to, --place-ids, --post-ids")
+    if not args.dry_run and (not args.wp_url or not args.api_key):
+        parser.error("--wp-url and --api-key (or WP_URL and WP_API_KEY) are required")
+
+    app = load_app()
+    targets = app.select_delete_targets(**filters)
+
+    print("=" * 60)
+    print("Deleting WordPress Listings" + (" (dry run)" if args.dry_run else ""))
+    print("=" * 60)
+    for place_id, title, post_id in targets[:20]:
+        print(f"  {post_id:>8}  {title or '(not in local database)'}")
+    if len(targets) > 20:
+        print(f"  ... and {len(targets) - 20} more")
+    print(f"\n{len(targets)} listings selected")
+
+    if args.dry_run or not targets:
+        sys.exit(0)
+    if not args.yes and input(f"Delete {len(targets)} listings from {args.wp_url}? [y/N] ").strip().lower() != 'y':
+        print("Aborted")
+        sys.exit(1)
+
+    results = app.run_batch_delete(targets, args.wp_url, args.api_key, args.max_workers, args.max_rate)
+
+    print()
+    print("=" * 60)
+    print("Summary")
+    print("=" * 60)
+    print(f"Deleted: {results['deleted']} listings")
+    print(f"Already gone: {results['not_found']} listings")
+    if results['failed']:
+        print(f"Failed: {results['failed']} listings")
+        for error in results['errors'][:20]:
+            print(f"  {error['wp_post_id']}: {error['error']}")
+    sys.exit(1 if results['failed'] else 0)
@@ -0,0 +1,292 @@
+"""
+ListingPro Stand-in Server
+Local imitation of the WordPress endpoints the sync code talks to, for load
+testing without touching production WordPress
+
+    python listingpro_stub.py --port 8090 --latency 80 --jitter 40 --error-rate 0.02 --rate-limit-rate 0.05
+
+Endpoints:
+    GET    /wp-json/listingpro/v1/listings?page=&per_page=&modified_after=
+    GET    /wp-json/listingpro/v1/listing/<id>
+    POST   /wp-json/listingpro/v1/listing
+    PUT    /wp-json/listingpro/v1/listing/<id>      (partial updates)
+    DELETE /wp-json/listingpro/v1/listing/<id>
+    POST   /wp-json/listingpro/v1/listings/bulk
+    POST   /wp-json/wp/v2/media                     (raw body or multipart)
+    GET    /__stub/image/<name>                      (test images for media uploads)
+    GET    /__stub/stats, POST /__stub/reset
+
+Creates with a google_place_id already in the store update that listing instead
+(action 'updated'). Request bodies may be gzip-encoded; responses advertise
+Accept-Encoding: gzip.
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import random
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+
+from flask import Flask, request, jsonify, Response
+
+
+class StubConfig:
+    def __init__(self, latency=50.0, jitter=0.0, error_rate=0.0, rate_limit_rate=0.0, retry_after=1,
+                 max_concurrent=0, catalogue=0, api_key=None, max_per_page=100):
+        self.latency = latency  # ms added to every request
+        self.jitter = jitter  # ms, uniform on top of latency
+        self.error_rate = error_rate  # share of requests answered 502
+        self.rate_limit_rate = rate_limit_rate  # share of requests answered 429
+        self.retry_after = retry_after  # seconds, sent with 429s
+        self.max_concurrent = max_concurrent  # 0 = unlimited; beyond it requests get 429
+        self.catalogue = catalogue  # listings present at start
+        self.api_key = api_key  # None accepts any X-API-Key
+        self.max_per_page = max_per_page  # listings pages hold at most this many, whatever per_page asks
+
+
+class ListingStore:
+    """Thread-safe in-memory listings and media library"""
+    def __init__(self, catalogue=0):
+        self._lock = threading.Lock()
+        self.reset(catalogue)
+
+    def reset(self, catalogue=0):
+        with self._lock:
+            self.listings = {}
+            self.by_place_id = {}
+            self.media = {}
+            self.next_id = 1000
+            for i in range(catalogue):
+                self._create({
+                    'title': f"Catalogue Listing {i}",
+                    'phone': f"555{i:07d}",
+                    'gAddress': f"{i} Catalogue Street, Springfield",
+                    'status': 'publish'
+                })
+
+    def _create(self, data):
+        post_id = self.next_id
+        self.next_id += 1
+        self.listings[post_id] = dict(data, id=post_id, modified=datetime.now(timezone.utc).isoformat())
+        return post_id
+
+    def upsert(self, data):
+        """Create, or update the listing already holding this google_place_id; returns (post_id, action)"""
+        with self._lock:
+            post_id = self.by_place_id.get(data.get('google_place_id'))
+            if post_id in self.listings:
+                self.listings[post_id].update(data, modified=datetime.now(timezone.utc).isoformat())
+                return post_id, 'updated'
+            post_id = self._create(data)
+            if data.get('google_place_id'):
+                self.by_place_id[data['google_place_id']] = post_id
+            return post_id, 'created'
+
+    def get(self, post_id):
+        with self._lock:
+            listing = self.listings.get(post_id)
+            return dict(listing) if listing else None
+
+    def update(self, post_id, data):
+        with self._lock:
+            listing = self.listings.get(post_id)
+            if listing is None:
+                return False
+            listing.update(data)
+            listing['modified'] = datetime.now(timezone.utc).isoformat()
+            return True
+
+    def delete(self, post_id):
+        with self._lock:
+            return self.listings.pop(post_id, None) is not None
+
+    def page(self, page, per_page, modified_after=None):
+        with self._lock:
+            listings = list(self.listings.values())
+        if modified_after:
+            listings = sorted((l for l in listings if l['modified'] > modified_after), key=lambda l: l['modified'])
+        start = (page - 1) * per_page
+        return listings[start:start + per_page], len(listings)
+
+    def add_media(self, content_hash, filename, size):
+        with self._lock:
+            media_id = self.next_id
+            self.next_id += 1
+            self.media[media_id] = {'id': media_id, 'filename': filename, 'bytes': size, 'hash': content_hash}
+            return media_id
+
+
+def parse_timestamp(value):
+    """ISO timestamp as UTC ISO text, comparable with listings' 'modified'; naive means UTC"""
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value)
+    return (parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)).astimezone(timezone.utc).isoformat()
+
+
+def create_app(config):
+    app = Flask(__name__)
+    store = ListingStore(config.catalogue)
+    stats = Counter()
+    stats_lock = threading.Lock()
+    in_flight = [0]
+
+    def count(key):
+        with stats_lock:
+            stats[key] += 1
+
+    def json_body():
+        raw = request.get_data()
+        if request.headers.get('Content-Encoding') == 'gzip':
+            raw = gzip.decompress(raw)
+            count('gzip_bodies')
+        return json.loads(raw or b'null')
+
+    @app.before_request
+    def simulate_server():
+        if request.path.startswith('/__stub/'):
+            return None
+        count(f"{request.method} {request.url_rule.rule if request.url_rule else request.path}")
+        if config.api_key and request.headers.get('X-API-Key') != config.api_key:
+            count('status_401')
+            return jsonify({'code': 'rest_forbidden', 'message': 'Invalid API key'}), 401
+        with stats_lock:
+            in_flight[0] += 1
+            overloaded = config.max_concurrent and in_flight[0] > config.max_concurrent
+        request.environ['stub.counted'] = True
+        time.sleep((config.latency + random.uniform(0, config.jitter)) / 1000.0)
+        roll = random.random()
+        if overloaded or roll < config.rate_limit_rate:
+            count('status_429')
+            return jsonify({'code': 'rate_limited', 'message': 'Too many requests'}), 429, \
+                {'Retry-After': str(config.retry_after)}
+        if roll < config.rate_limit_rate + config.error_rate:
+            count('status_502')
+            return Response('<html><body>502 Bad Gateway</body></html>', status=502)
+        return None
+
+    @app.after_request
+    def advertise(response):
+        response.headers['Accept-Encoding'] = 'gzip'
+        return response
+
+    @app.teardown_request
+    def release(exc):
+        if request.environ.pop('stub.counted', False):
+            with stats_lock:
+                in_flight[0] -= 1
+
+    @app.route('/wp-json/listingpro/v1/listings', methods=['GET'])
+    def list_listings():
+        page = max(int(request.args.get('page', 1)), 1)
+        per_page = min(max(int(request.args.get('per_page', 10)), 1), config.max_per_page)
+        listings, total = store.page(page, per_page, parse_timestamp(request.args.get('modified_after')))
+        total_pages = max((total + per_page - 1) // per_page, 1)
+        return jsonify({'success': True, 'listings': listings, 'total': total, 'total_pages': total_pages}), 200, \
+            {'X-WP-Total': str(total), 'X-WP-TotalPages': str(total_pages)}
+
+    @app.route('/wp-json/listingpro/v1/listing', methods=['POST'])
+    def create_listing():
+        data = json_body()
+        if not isinstance(data, dict) or not data.get('title'):
+            return jsonify({'success': False, 'message': 'title is required'}), 400
+        post_id, action = store.upsert(data)
+        return jsonify({'success': True, 'post_id': post_id, 'action': action}), 201 if action == 'created' else 200
+
+    @app.route('/wp-json/listingpro/v1/listing/<int:post_id>', methods=['GET'])
+    def get_listing(post_id):
+        listing = store.get(post_id)
+        if listing is None:
+            return jsonify({'success': False, 'message': 'Listing not found'}), 404
+        return jsonify(listing)
+
+    @app.route('/wp-json/listingpro/v1/listing/<int:post_id>', methods=['PUT'])
+    def update_listing(post_id):
+        if not store.update(post_id, json_body() or {}):
+            return jsonify({'success': False, 'message': 'Listing not found'}), 404
+        return jsonify({'success': True, 'post_id': post_id})
+
+    @app.route('/wp-json/listingpro/v1/listing/<int:post_id>', methods=['DELETE'])
+    def delete_listing(post_id):
+        if not store.delete(post_id):
+            return jsonify({'success': False, 'message': 'Listing not found'}), 404
+        return jsonify({'success': True, 'deleted': post_id})
+
+    @app.route('/wp-json/listingpro/v1/listings/bulk', methods=['POST'])
+    def bulk_create():
+        data = json_body() or {}
+        results = []
+        for index, listing in enumerate(data.get('listings', [])):
+            if not listing.get('title'):
+                results.append({'index': index, 'success': False, 'error': 'title is required'})
+            else:
+                post_id, action = store.upsert(listing)
+                results.append({'index': index, 'success': True, 'post_id': post_id, 'action': action})
+        return jsonify({'success': True, 'results': results}), 201
+
+    @app.route('/wp-json/wp/v2/media', methods=['POST'])
+    def upload_media():
+        if request.files:
+            upload = next(iter(request.files.values()))
+            body, filename = upload.read(), upload.filename
+        else:
+            body = request.get_data()
+            disposition = request.headers.get('Content-Disposition', '')
+            filename = disposition.split('filename=')[-1].strip('"') if 'filename=' in disposition else 'upload.jpg'
+        if not body:
+            return jsonify({'code': 'rest_upload_no_data', 'message': 'No data supplied'}), 400
+        media_id = store.add_media(hashlib.sha256(body).hexdigest(), filename, len(body))
+        return jsonify({'id': media_id, 'source_url': f"{request.host_url}wp-content/uploads/{media_id}-{filename}"}), 201
+
+    @app.route('/__stub/image/<name>', methods=['GET'])
+    def test_image(name):
+        # Deterministic bytes per name, so the same name always hashes the same
+        seed = hashlib.sha256(name.encode('utf-8')).digest()
+        return Response(seed * 2048, mimetype='image/jpeg')
+
+    @app.route('/__stub/stats', methods=['GET'])
+    def get_stats():
+        with stats_lock:
+            requests_by_endpoint = dict(stats)
+        return jsonify({'requests': requests_by_endpoint, 'listings': len(store.listings), 'media': len(store.media)})
+
+    @app.route('/__stub/reset', methods=['POST'])
+    def reset():
+        data = request.get_json(silent=True) or {}
+        store.reset(int(data.get('catalogue', config.catalogue)))
+        with stats_lock:
+            stats.clear()
+        return jsonify({'success': True, 'listings': len(store.listings)})
+
+    return app
+
+
+def add_config_arguments(parser):
+    parser.add_argument('--latency', type=float, default=50.0, help="Milliseconds added to every request")
+    parser.add_argument('--jitter', type=float, default=0.0, help="Extra random milliseconds, uniform")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Share of requests answered 502")
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help="Share of requests answered 429")
+    parser.add_argument('--retry-after', type=int, default=1, help="Retry-After seconds sent with 429s")
+    parser.add_argument('--max-concurrent', type=int, default=0, help="Requests beyond this many in flight get 429")
+    parser.add_argument('--catalogue', type=int, default=0, help="Listings present at start")
+    parser.add_argument('--api-key', help="Require this X-API-Key (default: accept any)")
+    parser.add_argument('--max-per-page', type=int, default=100, help="Cap on listings per page")
+
+
+def config_from_args(args):
+    return StubConfig(args.latency, args.jitter, args.error_rate, args.rate_limit_rate, args.retry_after,
+                      args.max_concurrent, args.catalogue, args.api_key, args.max_per_page)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local ListingPro REST stand-in for load tests")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8090)
+    add_config_arguments(parser)
+    args = parser.parse_args()
+
+    print(f"ListingPro stand-in on http://{args.host}:{args.port} ({args.catalogue} listings)")
+    create_app(config_from_args(args)).run(host=args.host, port=args.port, threaded=True)
@@ -1,97 +1,627 @@
 """
 Database Migration Script
-Adds new columns and tables for WordPress sync and keyword management
+Versioned schema migrations for the places database
+
+Applied versions are recorded in the schema_version table. Migrations run at
+app startup (init_db) or from the command line:
+
+    python migrate_database.py              # apply pending migrations
+    python migrate_database.py --status     # show applied / pending versions
+
+Large data backfills run in bounded chunks, each committed on its own, and
+record their position in backfill_progress so an interrupted run resumes
+where it stopped instead of starting over. A migration the environment can't
+run yet (FTS5 missing from this SQLite build) raises MigrationDeferred and stays
+pending, so it is applied once a later run can.
 """
+import argparse
+import logging
 import sqlite3
 import os
+from datetime import datetime
+
+from bs4 import BeautifulSoup
+
+from place_codec import encode_place, decode_place, measure
+
+logger = logging.getLogger(__name__)
 
 DB_PATH = "autism_services.db"
+BACKFILL_BATCH_SIZE = 500
 
-def migrate_database():
-    print("Starting database migration...")
-    
-    with sqlite3.connect(DB_PATH) as conn:
-        c = conn.cursor()
-        
-        # Check if wp_synced column exists
-        c.execute("PRAGMA table_info(places)")
-        columns = [row[1] for row in c.fetchall()]
-        
-        if 'wp_synced' not in columns:
-            print("Adding WordPress sync columns to places table...")
-            c.execute("ALTER TABLE places ADD COLUMN wp_synced INTEGER DEFAULT 0")
-            c.execute("ALTER TABLE places ADD COLUMN wp_post_id INTEGER")
-            c.execute("ALTER TABLE places ADD COLUMN wp_sync_date TEXT")
-            print("[OK] WordPress sync columns added")
-        else:
-            print("[OK] WordPress sync columns already exist")
-        
-        # Create index for wp_synced
-        try:
-            c.execute('CREATE INDEX IF NOT EXISTS idx_wp_synced ON places (wp_synced)')
-            print("[OK] Index created for wp_synced")
-        except Exception as e:
-            print(f"Index creation skipped: {e}")
-        
-        # Create search_keywords table
+DEFAULT_KEYWORDS = [
+    ('autism therapy centers', 'Autism Core'),
+    ('autism treatment clinics', 'Autism Core'),
+    ('autism support services', 'Autism Core'),
+    ('ABA therapy centers', 'Autism Core'),
+    ('autism behavioral therapy', 'Autism Core'),
+    ('autism diagnostic centers', 'Autism Core'),
+    ('developmental disabilities services', 'Autism Core'),
+    ('special needs therapy', 'Autism Core'),
+    ('ADHD therapy centers', 'ADHD'),
+    ('ADHD coaching clinics', 'ADHD'),
+    ('behavioral therapy ADHD', 'ADHD'),
+    ('parent training autism ADHD', 'ADHD'),
+    ('speech therapy autism ADHD', 'Therapy'),
+    ('occupational therapy sensory integration', 'Therapy'),
+    ('sensory integration therapy', 'Therapy'),
+    ('sensory gyms autism ADHD', 'Therapy'),
+    ('dyslexia learning centers', 'Learning'),
+    ('learning disability centers', 'Learning'),
+    ('social skills groups autism ADHD', 'Community'),
+    ('special needs camps autism ADHD', 'Community'),
+    ('adaptive sports autism ADHD', 'Community'),
+    ('autism ADHD inclusive recreation centers', 'Community'),
+    ('autism ADHD support groups', 'Community')
+]
+
+# ==================== Schema Helpers ====================
+class MigrationDeferred(Exception):
+    """The migration can't run in this environment yet; it is not recorded and is retried next time"""
+
+def table_exists(c, name):
+    c.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,))
+    return c.fetchone() is not None
+
+def column_names(c, table):
+    c.execute(f"PRAGMA table_info({table})")
+    return [row[1] for row in c.fetchall()]
+
+def add_column_if_missing(c, table, column, definition):
+    if column not in column_names(c, table):
+        c.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+def split_location_path(location):
+    """Split "Country > State > City" into (country, state, city); missing levels are None"""
+    if not location or ' > ' not in location:
+        return None, None, None
+    parts = location.split(' > ')
+    return parts[0], parts[1], parts[2] if len(parts) >= 3 else None
+
+def _location_count_sql(ref, sign):
+    """SQL statements applying one place row (NEW or OLD) to location_counts"""
+    unsynced = f"(COALESCE({ref}.wp_synced, 0) = 0)"
+    if sign > 0:
+        statements = []
+        for level, state, city, required in ((1, "''", "''", f"{ref}.country"),
+                                             (2, f"{ref}.state", "''", f"{ref}.state"),
+                                             (3, f"{ref}.state", f"{ref}.city", f"{ref}.city")):
+            statements.append(f'''
+                INSERT INTO location_counts (level, country, state, city, total, unsynced)
+                SELECT {level}, {ref}.country, {state}, {city}, 1, {unsynced}
+                WHERE {ref}.country IS NOT NULL AND {required} IS NOT NULL
+                ON CONFLICT (level, country, state, city)
+                DO UPDATE SET total = total + 1, unsynced = unsynced + excluded.unsynced;''')
+        return ''.join(statements)
+    match = f'''(level = 1 AND country = {ref}.country AND state = '' AND city = '')
+                   OR (level = 2 AND country = {ref}.country AND state = {ref}.state AND city = '')
+                   OR (level = 3 AND country = {ref}.country AND state = {ref}.state AND city = {ref}.city)'''
+    return f'''
+                UPDATE location_counts SET total = total - 1, unsynced = unsynced - {unsynced}
+                WHERE {match};
+                DELETE FROM location_counts WHERE total <= 0 AND ({match});'''
+
+def location_count_triggers():
+    """Triggers keeping location_counts in step with every insert, update and delete on places"""
+    return [
+        f'''CREATE TRIGGER IF NOT EXISTS trg_location_counts_insert AFTER INSERT ON places
+            BEGIN{_location_count_sql('NEW', 1)}
+            END''',
+        f'''CREATE TRIGGER IF NOT EXISTS trg_location_counts_delete AFTER DELETE ON places
+            BEGIN{_location_count_sql('OLD', -1)}
+            END''',
+        f'''CREATE TRIGGER IF NOT EXISTS trg_location_counts_update AFTER UPDATE OF country, state, city, wp_synced ON places
+            BEGIN{_location_count_sql('OLD', -1)}{_location_count_sql('NEW', 1)}
+            END''',
+    ]
+
+def rebuild_location_counts(c):
+    """Recompute location_counts from scratch"""
+    c.execute("DELETE FROM location_counts")
+    unsynced = "SUM(COALESCE(wp_synced, 0) = 0)"
+    c.execute(f'''
+        INSERT INTO location_counts (level, country, state, city, total, unsynced)
+        SELECT 1, country, '', '', COUNT(*), {unsynced} FROM places
+        WHERE country IS NOT NULL GROUP BY country
+    ''')
+    c.execute(f'''
+        INSERT INTO location_counts (level, country, state, city, total, unsynced)
+        SELECT 2, country, state, '', COUNT(*), {unsynced} FROM places
+        WHERE country IS NOT NULL AND state IS NOT NULL GROUP BY country, state
+    ''')
+    c.execute(f'''
+        INSERT INTO location_counts (level, country, state, city, total, unsynced)
+        SELECT 3, country, state, city, COUNT(*), {unsynced} FROM places
+        WHERE country IS NOT NULL AND city IS NOT NULL GROUP BY country, state, city
+    ''')
+
+def index_place_for_search(c, rowid, place):
+    """(Re)index a place in places_fts - description is indexed with HTML stripped"""
+    description = place.get('Description', '') or ''
+    if '<' in description:
+        description = BeautifulSoup(description, 'html.parser').get_text(' ', strip=True)
+
+    def as_text(value):
+        # OpenAI sometimes returns lists for Tags/Features/Category
+        if isinstance(value, list):
+            return ', '.join(str(v) for v in value)
+        return str(value) if value else ''
+
+    c.execute("DELETE FROM places_fts WHERE rowid = ?", (rowid,))
+    c.execute(
+        "INSERT INTO places_fts (rowid, title, description, tags, features, category, address) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        (rowid, as_text(place.get('Title')), description, as_text(place.get('Tags (Keywords)')),
+         as_text(place.get('Features')), as_text(place.get('Category')), as_text(place.get('Google Address')))
+    )
+
+# ==================== Chunked Backfills ====================
+def run_backfill(conn, name, select_sql, apply_rows, batch_size=BACKFILL_BATCH_SIZE):
+    """
+    Run a resumable, chunked backfill over places.
+
+    select_sql must select rowid first and take (last_rowid, batch_size)
+    parameters, e.g. "SELECT rowid, data FROM places WHERE rowid > ? ORDER BY rowid LIMIT ?".
+    apply_rows(cursor, rows) processes one chunk; each chunk is its own transaction.
+    """
+    c = conn.cursor()
+    c.execute("SELECT last_rowid, done FROM backfill_progress WHERE name = ?", (name,))
+    row = c.fetchone()
+    if row and row[1]:
+        return 0
+    last_rowid = row[0] if row else 0
+
+    processed = 0
+    while True:
+        c.execute(select_sql, (last_rowid, batch_size))
+        rows = c.fetchall()
+        if not rows:
+            break
+        apply_rows(c, rows)
+        last_rowid = rows[-1][0]
+        processed += len(rows)
+        c.execute('''
+            INSERT INTO backfill_progress (name, last_rowid, done, updated_at) VALUES (?, ?, 0, ?)
+            ON CONFLICT (name) DO UPDATE SET last_rowid = excluded.last_rowid, updated_at = excluded.updated_at
+        ''', (name, last_rowid, datetime.now().isoformat()))
+        conn.commit()
+        logger.info(f"  backfill {name}: {processed} rows")
+
+    c.execute('''
+        INSERT INTO backfill_progress (name, last_rowid, done, updated_at) VALUES (?, ?, 1, ?)
+        ON CONFLICT (name) DO UPDATE SET done = 1, updated_at = excluded.updated_at
+    ''', (name, last_rowid, datetime.now().isoformat()))
+    conn.commit()
+    return processed
+
+# ==================== Migrations ====================
+def migration_001_base_schema(conn, batch_size):
+    c = conn.cursor()
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS places (
+            place_id TEXT PRIMARY KEY,
+            location TEXT,
+            scraped_at TEXT,
+            data JSON,
+            wp_synced INTEGER DEFAULT 0,
+            wp_post_id INTEGER,
+            wp_sync_date TEXT
+        )
+    ''')
+    # Databases created before WordPress sync existed
+    add_column_if_missing(c, 'places', 'wp_synced', 'INTEGER DEFAULT 0')
+    add_column_if_missing(c, 'places', 'wp_post_id', 'INTEGER')
+    add_column_if_missing(c, 'places', 'wp_sync_date', 'TEXT')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_location ON places (location)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_wp_synced ON places (wp_synced)')
+
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS search_keywords (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            keyword TEXT NOT NULL,
+            category TEXT,
+            active INTEGER DEFAULT 1,
+            created_at TEXT,
+            last_used TEXT
+        )
+    ''')
+    c.execute("SELECT COUNT(*) FROM search_keywords")
+    if c.fetchone()[0] == 0:
+        created_at = datetime.now().isoformat()
+        c.executemany("INSERT INTO search_keywords (keyword, category, active, created_at) VALUES (?, ?, 1, ?)",
+                      [(keyword, category, created_at) for keyword, category in DEFAULT_KEYWORDS])
+    conn.commit()
+
+def migration_002_location_counts(conn, batch_size):
+    c = conn.cursor()
+    add_column_if_missing(c, 'places', 'country', 'TEXT')
+    add_column_if_missing(c, 'places', 'state', 'TEXT')
+    add_column_if_missing(c, 'places', 'city', 'TEXT')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_location_path ON places (country, state, city)')
+
+    # Level 1 = country, 2 = state, 3 = city
+    created = not table_exists(c, 'location_counts')
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS location_counts (
+            level INTEGER NOT NULL,
+            country TEXT NOT NULL,
+            state TEXT NOT NULL DEFAULT '',
+            city TEXT NOT NULL DEFAULT '',
+            total INTEGER NOT NULL DEFAULT 0,
+            unsynced INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (level, country, state, city)
+        )
+    ''')
+    for trigger_sql in location_count_triggers():
+        c.execute(trigger_sql)
+    if created:
+        rebuild_location_counts(c)
+    conn.commit()
+
+    # The update trigger folds each backfilled row into location_counts
+    def apply_rows(c, rows):
+        for rowid, data in rows:
+            location = decode_place(data).get('Location', '')
+            c.execute("UPDATE places SET country = ?, state = ?, city = ? WHERE rowid = ?",
+                      (*split_location_path(location), rowid))
+
+    run_backfill(conn, 'location_path',
+                 "SELECT rowid, data FROM places WHERE rowid > ? AND country IS NULL ORDER BY rowid LIMIT ?",
+                 apply_rows, batch_size)
+
+def migration_003_fts(conn, batch_size):
+    c = conn.cursor()
+    try:
         c.execute('''
-            CREATE TABLE IF NOT EXISTS search_keywords (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                keyword TEXT NOT NULL,
-                category TEXT,
-                active INTEGER DEFAULT 1,
-                created_at TEXT,
-                last_used TEXT
+            CREATE VIRTUAL TABLE IF NOT EXISTS places_fts USING fts5 (
+                title, description, tags, features, category, address,
+                tokenize = 'unicode61 remove_diacritics 2'
             )
         ''')
-        print("[OK] search_keywords table created")
-        
-        # Check if keywords table is empty
-        c.execute("SELECT COUNT(*) FROM search_keywords")
-        if c.fetchone()[0] == 0:
-            print("Inserting default keywords...")
-            default_keywords = [
-                ("autism therapy centers", "Autism Core", 1),
-                ("autism treatment clinics", "Autism Core", 1),
-                ("autism support services", "Autism Core", 1),
-                ("ABA therapy centers", "Autism Core", 1),
-                ("autism behavioral therapy", "Autism Core", 1),
-                ("autism diagnostic centers", "Autism Core", 1),
-                ("developmental disabilities services", "Special Needs", 1),
-                ("special needs therapy", "Special Needs", 1),
-                ("ADHD therapy centers", "ADHD", 1),
-                ("ADHD coaching clinics", "ADHD", 1),
-                ("behavioral therapy ADHD", "ADHD", 1),
-                ("parent training autism ADHD", "Training", 1),
-                ("speech therapy autism ADHD", "Therapy", 1),
-                ("occupational therapy sensory integration", "Therapy", 1),
-                ("sensory integration therapy", "Therapy", 1),
-                ("sensory gyms autism ADHD", "Recreation", 1),
-                ("dyslexia learning centers", "Learning", 1),
-                ("learning disability centers", "Learning", 1),
-                ("social skills groups autism ADHD", "Community", 1),
-                ("special needs camps autism ADHD", "Recreation", 1),
-                ("adaptive sports autism ADHD", "Recreation", 1),
-                ("autism ADHD inclusive recreation centers", "Recreation", 1),
-                ("autism ADHD support groups", "Community", 1)
-            ]
-            c.executemany(
-                "INSERT INTO search_keywords (keyword, category, active) VALUES (?, ?, ?)",
-                default_keywords
-            )
-            print(f"[OK] Inserted {len(default_keywords)} default keywords")
-        else:
-            print("[OK] Keywords already exist")
-        
-        conn.commit()
-    
-    print("\n[SUCCESS] Database migration completed successfully!")
-    print("\nYou can now run: python app-latest-4.py")
+    except sqlite3.OperationalError as e:
+        raise MigrationDeferred(f"FTS5 not available, full-text index not created: {e}")
+    # rowid mirrors places.rowid
+    c.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_places_fts_delete AFTER DELETE ON places
+        BEGIN
+            DELETE FROM places_fts WHERE rowid = OLD.rowid;
+        END
+    ''')
+    conn.commit()
+
+    def apply_rows(c, rows):
+        for rowid, data in rows:
+            index_place_for_search(c, rowid, decode_place(data))
+
+    run_backfill(conn, 'places_fts',
+                 "SELECT rowid, data FROM places WHERE rowid > ? ORDER BY rowid LIMIT ?",
+                 apply_rows, batch_size)
+
+def migration_004_compact_encoding(conn, batch_size):
+    c = conn.cursor()
+    c.execute("SELECT COUNT(*), SUM(length(data)) FROM places WHERE typeof(data) = 'text'")
+    pending, before_bytes = c.fetchone()
+    if not pending:
+        return
+    c.execute("SELECT data FROM places WHERE typeof(data) = 'text' LIMIT 1000")
+    sample = [row[0] for row in c.fetchall()]
+    after = {'bytes': 0}
+
+    def apply_rows(c, rows):
+        for rowid, data in rows:
+            encoded = encode_place(decode_place(data))
+            c.execute("UPDATE places SET data = ? WHERE rowid = ?", (encoded, rowid))
+            after['bytes'] += len(encoded)
+
+    converted = run_backfill(conn, 'compact_encoding',
+                             "SELECT rowid, data FROM places WHERE rowid > ? AND typeof(data) = 'text' ORDER BY rowid LIMIT ?",
+                             apply_rows, batch_size)
+    if converted:
+        stats = measure(sample)
+        logger.info(f"Encoded {converted} rows: {before_bytes} -> {after['bytes']} bytes "
+                    f"({before_bytes / after['bytes']:.2f}x smaller)")
+        logger.info(f"Decode throughput: {stats['decode_rows_per_sec']} rows/s "
+                    f"({stats['decode_mb_per_sec']} MB/s), plain JSON: {stats['json_decode_rows_per_sec']} rows/s")
+
+def migration_005_row_version(conn, batch_size):
+    c = conn.cursor()
+    add_column_if_missing(c, 'places', 'row_version', 'INTEGER')
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS change_seq (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            value INTEGER NOT NULL
+        )
+    ''')
+    c.execute("INSERT OR IGNORE INTO change_seq (id, value) VALUES (1, 0)")
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS place_tombstones (
+            row_version INTEGER PRIMARY KEY,
+            place_id TEXT NOT NULL,
+            deleted_at TEXT
+        )
+    ''')
+    conn.commit()
+
+    # Number existing rows before the triggers start handing out versions
+    def apply_rows(c, rows):
+        for (rowid,) in rows:
+            c.execute("UPDATE change_seq SET value = value + 1 WHERE id = 1")
+            c.execute("UPDATE places SET row_version = (SELECT value FROM change_seq WHERE id = 1) WHERE rowid = ?",
+                      (rowid,))
+
+    run_backfill(conn, 'row_version',
+                 "SELECT rowid FROM places WHERE rowid > ? AND row_version IS NULL ORDER BY rowid LIMIT ?",
+                 apply_rows, batch_size)
+
+    # row_version itself is not in the UPDATE OF list, so bumping it does not re-fire the trigger
+    c.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_row_version_insert AFTER INSERT ON places
+        BEGIN
+            UPDATE change_seq SET value = value + 1 WHERE id = 1;
+            UPDATE places SET row_version = (SELECT value FROM change_seq WHERE id = 1) WHERE rowid = NEW.rowid;
+        END
+    ''')
+    c.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_row_version_update
+        AFTER UPDATE OF location, scraped_at, data, wp_synced, wp_post_id, wp_sync_date ON places
+        BEGIN
+            UPDATE change_seq SET value = value + 1 WHERE id = 1;
+            UPDATE places SET row_version = (SELECT value FROM change_seq WHERE id = 1) WHERE rowid = NEW.rowid;
+        END
+    ''')
+    c.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_row_version_delete AFTER DELETE ON places
+        BEGIN
+            UPDATE change_seq SET value = value + 1 WHERE id = 1;
+            INSERT INTO place_tombstones (row_version, place_id, deleted_at)
+            VALUES ((SELECT value FROM change_seq WHERE id = 1), OLD.place_id, datetime('now'));
+        END
+    ''')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_row_version ON places (row_version)')
+    conn.commit()
+
+def listing_columns(place):
+    """Indexed listing columns derived from a place dict (see migration 6)"""
+    category = place.get('Category') or ''
+    if isinstance(category, list):
+        category = ', '.join(str(v) for v in category)
+    return {
+        'title': place.get('Title') or '',
+        'category': category,
+        'status': place.get('Status') or 'Old',
+        'has_website': 1 if place.get('Website') else 0,
+        'has_phone': 1 if place.get('Phone') else 0
+    }
+
+def migration_006_listing_columns(conn, batch_size):
+    c = conn.cursor()
+    add_column_if_missing(c, 'places', 'title', "TEXT NOT NULL DEFAULT ''")
+    add_column_if_missing(c, 'places', 'category', "TEXT NOT NULL DEFAULT ''")
+    add_column_if_missing(c, 'places', 'status', "TEXT NOT NULL DEFAULT ''")
+    add_column_if_missing(c, 'places', 'has_website', "INTEGER NOT NULL DEFAULT 0")
+    add_column_if_missing(c, 'places', 'has_phone', "INTEGER NOT NULL DEFAULT 0")
+    conn.commit()
+
+    def apply_rows(c, rows):
+        for rowid, data in rows:
+            cols = listing_columns(decode_place(data))
+            c.execute('''
+                UPDATE places SET title = ?, category = ?, status = ?, has_website = ?, has_phone = ?
+                WHERE rowid = ?
+            ''', (cols['title'], cols['category'], cols['status'], cols['has_website'], cols['has_phone'], rowid))
+
+    run_backfill(conn, 'listing_columns',
+                 "SELECT rowid, data FROM places WHERE rowid > ? ORDER BY rowid LIMIT ?",
+                 apply_rows, batch_size)
+
+    # Keyset pagination indexes - place_id is the tie-breaker for every sort
+    c.execute('CREATE INDEX IF NOT EXISTS idx_places_title ON places (title COLLATE NOCASE, place_id)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_places_category ON places (category, place_id)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_places_status ON places (status, place_id)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_places_scraped_at ON places (scraped_at, place_id)')
+    conn.commit()
+
+def migration_007_wp_sync_hash(conn, batch_size):
+    # Hash of the WordPress payload last pushed for each place; NULL until its next sync
+    c = conn.cursor()
+    add_column_if_missing(c, 'places', 'wp_sync_hash', 'TEXT')
+    conn.commit()
+
+def migration_008_wp_sync_payload(conn, batch_size):
+    # zlib-compressed JSON of the payload last pushed, so updates can send only changed fields
+    c = conn.cursor()
+    add_column_if_missing(c, 'places', 'wp_sync_payload', 'BLOB')
+    conn.commit()
+
+def migration_009_media_cache(conn, batch_size):
+    # Content-addressed record of images already uploaded to each WordPress site
+    c = conn.cursor()
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS media_cache (
+            site TEXT NOT NULL,
+            content_hash TEXT NOT NULL,
+            media_url TEXT NOT NULL,
+            media_id INTEGER,
+            bytes INTEGER,
+            uploaded_at TEXT,
+            PRIMARY KEY (site, content_hash)
+        )
+    ''')
+    # Source image URL -> content hash, so a known image isn't downloaded again
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS media_sources (
+            site TEXT NOT NULL,
+            source_key TEXT NOT NULL,
+            content_hash TEXT NOT NULL,
+            PRIMARY KEY (site, source_key)
+        )
+    ''')
+    conn.commit()
+
+def migration_010_sync_jobs(conn, batch_size):
+    c = conn.cursor()
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS sync_jobs (
+            job_id TEXT PRIMARY KEY,
+            label TEXT,
+            status TEXT NOT NULL,
+            params TEXT,
+            total INTEGER DEFAULT 0,
+            synced INTEGER DEFAULT 0,
+            skipped INTEGER DEFAULT 0,
+            unchanged INTEGER DEFAULT 0,
+            failed INTEGER DEFAULT 0,
+            results TEXT,
+            created_at TEXT,
+            updated_at TEXT,
+            finished_at TEXT
+        )
+    ''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_sync_jobs_created ON sync_jobs(created_at)")
+    conn.commit()
+
+def migration_011_sync_outbox(conn, batch_size):
+    # Failed syncs waiting for a retry ('pending') or given up on ('dead')
+    c = conn.cursor()
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS sync_outbox (
+            place_id TEXT PRIMARY KEY,
+            wp_url TEXT NOT NULL,
+            sync_mode TEXT NOT NULL,
+            upload_images INTEGER DEFAULT 0,
+            status TEXT NOT NULL,
+            attempts INTEGER DEFAULT 0,
+            last_error TEXT,
+            last_http_status INTEGER,
+            next_attempt_at TEXT,
+            job_id TEXT,
+            created_at TEXT,
+            updated_at TEXT
+        )
+    ''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_sync_outbox_due ON sync_outbox(status, next_attempt_at)")
+    conn.commit()
+
+def migration_012_wp_reconcile(conn, batch_size):
+    c = conn.cursor()
+    # Per-site checkpoint: remote 'modified' high-water mark and when the last full scan ran
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS wp_reconcile_state (
+            site TEXT PRIMARY KEY,
+            checkpoint TEXT,
+            last_full_at TEXT,
+            last_run_at TEXT,
+            last_summary TEXT
+        )
+    ''')
+    # Places whose WordPress listing was deleted, never recorded ('missing') or edited remotely
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS wp_drift (
+            place_id TEXT PRIMARY KEY,
+            site TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            wp_post_id INTEGER,
+            fields TEXT,
+            detected_at TEXT,
+            requeued_at TEXT
+        )
+    ''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_wp_drift_kind ON wp_drift(site, kind)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_places_wp_post_id ON places(wp_post_id)")
+    conn.commit()
+
+def migration_013_fts_retry(conn, batch_size):
+    # Version 3 used to be recorded even when FTS5 was missing, leaving search off for good
+    if not table_exists(conn.cursor(), 'places_fts'):
+        migration_003_fts(conn, batch_size)
+
+# (version, description, function) - append only, never renumber
+MIGRATIONS = [
+    (1, "Base schema: places, search_keywords and default keywords", migration_001_base_schema),
+    (2, "Location hierarchy columns and location_counts", migration_002_location_counts),
+    (3, "FTS5 full-text index over places", migration_003_fts),
+    (4, "Compact encoding for places.data", migration_004_compact_encoding),
+    (5, "Row versions and tombstones for delta exports", migration_005_row_version),
+    (6, "Indexed listing columns for paginated browsing", migration_006_listing_columns),
+    (7, "WordPress payload hash for change detection", migration_007_wp_sync_hash),
+    (8, "Last synced WordPress payload for field-level updates", migration_008_wp_sync_payload),
+    (9, "Media upload cache", migration_009_media_cache),
+    (10, "Background WordPress sync jobs", migration_010_sync_jobs),
+    (11, "Retry outbox for failed WordPress syncs", migration_011_sync_outbox),
+    (12, "WordPress reconciliation checkpoints and drift", migration_012_wp_reconcile),
+    (13, "FTS5 full-text index where version 3 skipped it", migration_013_fts_retry),
+]
+
+def _ensure_version_tables(conn):
+    c = conn.cursor()
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT,
+            applied_at TEXT
+        )
+    ''')
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS backfill_progress (
+            name TEXT PRIMARY KEY,
+            last_rowid INTEGER NOT NULL DEFAULT 0,
+            done INTEGER NOT NULL DEFAULT 0,
+            updated_at TEXT
+        )
+    ''')
+    conn.commit()
+
+def applied_versions(conn):
+    _ensure_version_tables(conn)
+    c = conn.cursor()
+    c.execute("SELECT version FROM schema_version")
+    return {row[0] for row in c.fetchall()}
+
+def migrate(db_path=DB_PATH, target=None, batch_size=BACKFILL_BATCH_SIZE):
+    """Apply pending migrations up to target (default: latest). Returns the versions applied."""
+    applied = []
+    with sqlite3.connect(db_path, timeout=30) as conn:
+        done = applied_versions(conn)
+        for version, description, func in MIGRATIONS:
+            if version in done or (target is not None and version > target):
+                continue
+            logger.info(f"Applying migration {version}: {description}")
+            try:
+                func(conn, batch_size)
+            except MigrationDeferred as e:
+                conn.rollback()
+                logger.warning(f"Migration {version} deferred: {e}")
+                continue
+            conn.execute("INSERT INTO schema_version (version, description, applied_at) VALUES (?, ?, ?)",
+                         (version, description, datetime.now().isoformat()))
+            conn.commit()
+            applied.append(version)
+    return applied
+
+def print_status(db_path=DB_PATH):
+    with sqlite3.connect(db_path) as conn:
+        done = applied_versions(conn)
+        c = conn.cursor()
+        c.execute("SELECT name, last_rowid, done FROM backfill_progress ORDER BY name")
+        backfills = c.fetchall()
+    for version, description, _ in MIGRATIONS:
+        print(f"[{'OK' if version in done else 'PENDING':7}] {version:3}  {description}")
+    for name, last_rowid, finished in backfills:
+        print(f"  backfill {name}: {'done' if finished else f'in progress (rowid {last_rowid})'}")
 
 if __name__ == "__main__":
-    if not os.path.exists(DB_PATH):
-        print(f"❌ Database file '{DB_PATH}' not found!")
-        print("The database will be created when you run the app.")
-    else:
-        migrate_database()
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    parser = argparse.ArgumentParser(description="Apply versioned database migrations")
+    parser.add_argument('--db', default=DB_PATH, help="SQLite database path")
+    parser.add_argument('--status', action='store_true', help="Show applied and pending migrations")
+    parser.add_argument('--target', type=int, help="Migrate up to this version only")
+    parser.add_argument('--batch-size', type=int, default=BACKFILL_BATCH_SIZE, help="Rows per backfill chunk")
+    args = parser.parse_args()
 
+    if args.status:
+        print_status(args.db)
+    else:
+        if not os.path.exists(args.db):
+            print(f"Database file '{args.db}' not found - it will be created.")
+        applied = migrate(args.db, args.target, args.batch_size)
+        print(f"\n[SUCCESS] Applied {len(applied)} migration(s)" + (f": {applied}" if applied else " - already up to date"))
+        print("\nYou can now run: python app-latest-4.py")
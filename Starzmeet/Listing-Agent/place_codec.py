@@ -0,0 +1,171 @@
+"""
+Place Storage Codec
+Compact binary encoding for the places.data column
+
+Layout: MAGIC, dictionary id, then a zlib stream (compressed with a preset
+dictionary) of fields. Each field is one header byte (2-bit type, 6-bit field
+id), a varint length and the payload. Rows that are still plain JSON text are
+decoded as before, so old and new rows can live side by side.
+"""
+import json
+import struct
+import time
+import zlib
+
+MAGIC = b'\xa7'
+
+# Field ids are stored on disk - only ever append to this list
+FIELDS = [
+    'Place ID', 'Title', 'Description', 'Tagline', 'Google Address', 'Latitude', 'Longitude',
+    'Phone', 'Email', 'Website', 'Twitter', 'Facebook', 'Linkedin', 'Google_plus',
+    'Youtube', 'Instagram', 'Youtube Video URL', 'Logo Image', 'Banner Image',
+    'Price Status ($-moderate)', 'Price From', 'Price To', 'Claim Status',
+    'Faq Question (sep. by pipe sign | )', 'Faq Answer (sep. by pipe sign | )',
+    'Gallery', 'Pricing Plan ID', 'Business Hours (Day,OpenTime,CloseTime)',
+    'Category', 'Features', 'Tags (Keywords)', 'Location', 'Status'
+]
+FIELD_IDS = {name: idx for idx, name in enumerate(FIELDS)}
+
+TYPE_STR = 0     # utf-8 text
+TYPE_FLOAT = 1   # little-endian float64
+TYPE_JSON = 2    # any other value as JSON
+TYPE_EXTRA = 3   # unknown key: JSON [key, value]
+
+# Preset dictionaries, keyed by the id stored in each row. zlib favours the
+# end of the dictionary, so the most frequent substrings come last.
+DICTIONARIES = {
+    1: ''.join([
+        'Monday,Tuesday,Wednesday,Thursday,Friday,Saturday,Sunday,Closed,Closed|',
+        '09:00,17:00|08:00,18:00|',
+        'OPERATIONAL', 'Autism Services', 'ABA Therapy', 'Autism Center', 'Speech Therapy',
+        'Occupational Therapy', 'autism, ABA, therapy, ADHD, special needs, ',
+        'United States > ', 'California', 'Texas', 'Florida', 'New York',
+        'https://www.facebook.com/', 'https://www.instagram.com/', 'https://www.linkedin.com/company/',
+        'https://twitter.com/', 'https://www.youtube.com/', 'https://www.', '.com/', '.org/',
+        '<strong>Phone:</strong> ', '<br>', '<strong>Email:</strong> ', '<strong>Address:</strong> ',
+        'Please visit their website for more information.</p></div>',
+        ' provides autism-related services in ',
+        '<li>', '</li>',
+        '<ul style="color: #555; font-size: 14px; line-height: 1.5; padding-left: 20px;">',
+        '<h3 style="color: #333; font-size: 18px; margin: 15px 0 10px;">Contact Info</h3>',
+        '<h3 style="color: #333; font-size: 18px; margin: 15px 0 10px;">Services</h3>',
+        '<div style="font-family: Arial, sans-serif; max-width: 600px; margin: 0; padding: 10px;">',
+        '<div style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto; padding: 10px; background-color: #dbf0f5;">',
+        '<h3 style="color: #333; font-size: 18px; margin-bottom: 10px;">About the business</h3>',
+        '<p style="color: #555; font-size: 14px; line-height: 1.5;">',
+        ',https://places.googleapis.com/v1/places/',
+        '/media?maxHeightPx=800&maxWidthPx=800&key=',
+        '/photos/',
+    ]).encode('utf-8'),
+}
+CURRENT_DICT_ID = 1
+
+
+def _write_varint(out, value):
+    while value >= 0x80:
+        out.append((value & 0x7f) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(buf, pos):
+    value = shift = 0
+    while True:
+        byte = buf[pos]
+        pos += 1
+        value |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+def _pack_fields(place):
+    out = bytearray()
+    for key, value in place.items():
+        field_id = FIELD_IDS.get(key)
+        if field_id is None:
+            field_type, field_id = TYPE_EXTRA, 0
+            payload = json.dumps([key, value], separators=(',', ':')).encode('utf-8')
+        elif isinstance(value, str):
+            field_type, payload = TYPE_STR, value.encode('utf-8')
+        elif isinstance(value, float):
+            field_type, payload = TYPE_FLOAT, struct.pack('<d', value)
+        else:
+            field_type, payload = TYPE_JSON, json.dumps(value, separators=(',', ':')).encode('utf-8')
+        out.append((field_type << 6) | field_id)
+        _write_varint(out, len(payload))
+        out += payload
+    return bytes(out)
+
+
+def _unpack_fields(buf):
+    place = {}
+    pos = 0
+    while pos < len(buf):
+        header = buf[pos]
+        length, pos = _read_varint(buf, pos + 1)
+        payload = buf[pos:pos + length]
+        pos += length
+        field_type, field_id = header >> 6, header & 0x3f
+        if field_type == TYPE_STR:
+            place[FIELDS[field_id]] = payload.decode('utf-8')
+        elif field_type == TYPE_FLOAT:
+            place[FIELDS[field_id]] = struct.unpack('<d', payload)[0]
+        elif field_type == TYPE_JSON:
+            place[FIELDS[field_id]] = json.loads(payload)
+        else:
+            key, value = json.loads(payload)
+            place[key] = value
+    return place
+
+
+def encode_place(place):
+    """Encode a place dict for storage in places.data"""
+    compressor = zlib.compressobj(9, zlib.DEFLATED, -15, 9, zlib.Z_DEFAULT_STRATEGY,
+                                  DICTIONARIES[CURRENT_DICT_ID])
+    body = compressor.compress(_pack_fields(place)) + compressor.flush()
+    return MAGIC + bytes([CURRENT_DICT_ID]) + body
+
+
+def decode_place(value):
+    """Decode a places.data value - accepts both encoded blobs and legacy JSON text"""
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        value = bytes(value)
+        if value[:1] != MAGIC:
+            return json.loads(value)
+        decompressor = zlib.decompressobj(-15, DICTIONARIES[value[1]])
+        return _unpack_fields(decompressor.decompress(value[2:]) + decompressor.flush())
+    return json.loads(value)
+
+
+def is_encoded(value):
+    return isinstance(value, (bytes, bytearray, memoryview)) and bytes(value[:1]) == MAGIC
+
+
+def measure(values):
+    """Report compression ratio and decode throughput for a sample of stored data values"""
+    places = [decode_place(v) for v in values]
+    json_bytes = sum(len(json.dumps(p).encode('utf-8')) for p in places)
+    encoded = [encode_place(p) for p in places]
+    encoded_bytes = sum(len(e) for e in encoded)
+
+    start = time.perf_counter()
+    for e in encoded:
+        decode_place(e)
+    codec_seconds = time.perf_counter() - start
+
+    raw = [json.dumps(p) for p in places]
+    start = time.perf_counter()
+    for r in raw:
+        json.loads(r)
+    json_seconds = time.perf_counter() - start
+
+    return {
+        'rows': len(places),
+        'json_bytes': json_bytes,
+        'encoded_bytes': encoded_bytes,
+        'compression_ratio': round(json_bytes / encoded_bytes, 2) if encoded_bytes else None,
+        'decode_rows_per_sec': round(len(places) / codec_seconds) if codec_seconds else None,
+        'decode_mb_per_sec': round(json_bytes / codec_seconds / 1e6, 1) if codec_seconds else None,
+        'json_decode_rows_per_sec': round(len(places) / json_seconds) if json_seconds else None
+    }